@@ -0,0 +1,125 @@
+import argparse
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from utils.frame_composer import JET_CUSTOM, LOGO, FrameComposer
+from utils.texts import TitleHelper
+
+parser = argparse.ArgumentParser(
+    description="Per-stage host timing of the combined view, the former per-frame "
+    "pipeline against the cached one, on synthetic frames.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--frames", default=200, type=int)
+parser.add_argument(
+    "-s",
+    "--size",
+    default=[512, 288],
+    nargs=2,
+    type=int,
+    help="Native color and depth resolution.",
+)
+args = parser.parse_args()
+
+width, height = args.size
+rng = np.random.default_rng(0)
+yy, xx = np.mgrid[0:height, 0:width]
+
+
+def make_inputs(i):
+    color = np.dstack([(xx + i) % 256, (yy + 2 * i) % 256, (xx + yy) % 256])
+    # A tilted floor with a few objects and invalid (zero) pixels
+    depth = 800 + 30 * yy + 5 * xx + 10 * i
+    depth[height // 3 : height // 2, width // 4 : width // 2] = 1500 + i
+    depth[rng.random((height, width)) < 0.05] = 0
+    bird_view = np.full((300, 100, 3), 40, dtype=np.uint8)
+    return color.astype(np.uint8), depth.astype(np.uint16), bird_view
+
+
+title = TitleHelper()
+
+
+def legacy(color, depth, bird_view, timer):
+    """The former per-frame pipeline of CombineOutputs."""
+    with timer("normalize"):
+        depth = cv2.normalize(depth, None, 256, 0, cv2.NORM_INF, cv2.CV_8UC3)
+    with timer("equalize"):
+        depth = cv2.equalizeHist(depth)
+    with timer("colormap"):
+        depth = cv2.applyColorMap(depth, JET_CUSTOM)
+    with timer("merge"):
+        half_frame = depth.shape[1] // 2
+        color[:, half_frame:] = depth[:, half_frame:]
+    with timer("flip + resize"):
+        frame = cv2.resize(cv2.flip(color, 1), (1920, 1080))
+    h, w = frame.shape[:2]
+    with timer("titles"):
+        title.putText(frame, "DEPTH", (30, 50))
+        title.putText(frame, "RGB", (w // 2 + 30, 50))
+    with timer("logo"):
+        cv2.rectangle(
+            frame, (w // 2 - 140, h - 90), (w // 2 + 140, h - 10), (255, 255, 255), -1
+        )
+        frame[(h - 82) : (h - 15), (w // 2 - 125) : (w // 2 + 125)] = LOGO
+    with timer("birds-eye view"):
+        cv2.rectangle(frame, (10, 390), (110, 690), (255, 255, 255), 3)
+        frame[390:690, 10:110] = bird_view
+    return frame
+
+
+def cached(color, depth, bird_view, timer, composer=FrameComposer()):
+    with timer("colorize shown half"):
+        composer.colorize(color, depth)
+    with timer("flip + resize"):
+        frame = composer.flip_resize(color)
+    with timer("overlays + birds-eye view"):
+        composer.draw_overlays(frame, bird_view)
+    return frame
+
+
+class Timer:
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    def __call__(self, stage):
+        timer = self
+
+        class Stage:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.totals[stage] += time.perf_counter() - self.start
+
+        return Stage()
+
+    def report(self, name, frames):
+        total = sum(self.totals.values())
+        print(f"{name}: {1000 * total / frames:.2f} ms/frame")
+        for stage, seconds in self.totals.items():
+            print(
+                f"  {stage:>26}: {1000 * seconds / frames:6.3f} ms "
+                f"({100 * seconds / total:4.1f}%)"
+            )
+
+
+inputs = [make_inputs(i) for i in range(8)]
+max_diff = 0
+pipelines = {"per-frame": (legacy, Timer()), "cached": (cached, Timer())}
+# Interleaved, so both see the same load of the host
+for i in range(args.frames):
+    color, depth, bird_view = inputs[i % len(inputs)]
+    for pipeline, timer in pipelines.values():
+        pipeline(color.copy(), depth, bird_view, timer)
+for name, (_, timer) in pipelines.items():
+    timer.report(name, args.frames)
+
+for color, depth, bird_view in inputs:
+    reference = legacy(color.copy(), depth, bird_view, Timer())
+    frame = cached(color.copy(), depth, bird_view, Timer())
+    diff = cv2.absdiff(reference, frame)
+    max_diff = max(max_diff, int(diff.max()))
+print(f"Max difference to the per-frame pipeline: {max_diff} (of 255)")
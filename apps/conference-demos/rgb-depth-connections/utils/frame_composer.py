@@ -0,0 +1,154 @@
+from pathlib import Path
+from typing import Callable, Tuple
+
+import cv2
+import numpy as np
+
+from .texts import TitleHelper
+
+JET_CUSTOM = cv2.applyColorMap(
+    np.arange(256, dtype=np.uint8).reshape(256, 1), cv2.COLORMAP_JET
+)
+JET_CUSTOM = JET_CUSTOM[::-1]
+JET_CUSTOM[0] = [0, 0, 0]
+
+logo_path = Path(__file__).parent.parent / "assets" / "logo.jpeg"
+
+LOGO = cv2.imread(str(logo_path))
+LOGO = cv2.resize(LOGO, (250, 67))
+
+OUTPUT_SIZE = (1920, 1080)
+BIRD_VIEW_ORIGIN = (10, 390)
+BIRD_VIEW_SIZE = (100, 300)
+
+
+def colorize_depth(depth: np.ndarray, columns: slice = slice(None)) -> np.ndarray:
+    """Normalize, equalize and colormap the `columns` of a uint16 depth frame.
+
+    Normalization and equalization use the whole frame, only the requested columns
+    are colormapped.
+    """
+    normalized = cv2.normalize(depth, None, 256, 0, cv2.NORM_INF, cv2.CV_8U)
+    equalized = cv2.equalizeHist(normalized)
+    return cv2.applyColorMap(equalized[:, columns], JET_CUSTOM)
+
+
+class OverlayPatch:
+    """Static overlay drawn once and stored pre-multiplied by its alpha.
+
+    The patch is drawn on a black and on a white canvas. The black one is the
+    pre-multiplied color and their difference the inverse alpha, so anti-aliased
+    text blends exactly as if it was drawn on the frame. Patches without partial
+    transparency are copied instead of blended.
+    """
+
+    def __init__(self, origin: Tuple[int, int], size: Tuple[int, int], draw: Callable):
+        self.x, self.y = origin
+        width, height = size
+        black = np.zeros((height, width, 3), dtype=np.uint8)
+        white = np.full((height, width, 3), 255, dtype=np.uint8)
+        draw(black)
+        draw(white)
+        self.premultiplied = black
+        self.inverse_alpha = white - black
+        self.opaque = self.inverse_alpha == 0
+        self.fully_opaque = bool(np.all(self.opaque))
+        self.binary = bool(np.all(self.opaque | (self.inverse_alpha == 255)))
+
+    def composite(self, frame: np.ndarray) -> None:
+        height, width = self.premultiplied.shape[:2]
+        roi = frame[self.y : self.y + height, self.x : self.x + width]
+        if self.fully_opaque:
+            roi[:] = self.premultiplied
+            return
+        if self.binary:
+            np.copyto(roi, self.premultiplied, where=self.opaque)
+            return
+        roi[:] = cv2.add(
+            cv2.multiply(roi, self.inverse_alpha, scale=1 / 255), self.premultiplied
+        )
+
+
+class FrameComposer:
+    """Builds the combined view: RGB and colored depth side by side, mirrored and
+    upscaled, with titles, logo and the birds-eye view on top.
+
+    Depth is colored at its native resolution and only for the half that is shown.
+    Flip and resize run once on the small frame, into a reused output buffer, and
+    all static overlays are prepared in the constructor.
+    """
+
+    def __init__(self, output_size: Tuple[int, int] = OUTPUT_SIZE) -> None:
+        self.output_size = output_size
+        self.overlays = self._create_overlays()
+        self._frame = np.empty((output_size[1], output_size[0], 3), dtype=np.uint8)
+
+    def _create_overlays(self) -> list:
+        width, height = self.output_size
+        title = TitleHelper()
+        overlays = [
+            self._title_overlay(title, "DEPTH", (30, 50)),
+            self._title_overlay(title, "RGB", (width // 2 + 30, 50)),
+        ]
+
+        # Luxonis logo on a white box
+        logo_origin = (width // 2 - 140, height - 90)
+
+        def draw_logo(canvas):
+            cv2.rectangle(canvas, (0, 0), (280, 80), (255, 255, 255), -1)
+            canvas[8:75, 15:265] = LOGO
+
+        overlays.append(OverlayPatch(logo_origin, (281, 81), draw_logo))
+
+        # Border of the birds-eye view, its inside is covered by the view
+        x, y = BIRD_VIEW_ORIGIN
+        bird_width, bird_height = BIRD_VIEW_SIZE
+
+        def draw_border(canvas):
+            cv2.rectangle(
+                canvas, (2, 2), (bird_width + 2, bird_height + 2), (255, 255, 255), 3
+            )
+
+        overlays.append(
+            OverlayPatch((x - 2, y - 2), (bird_width + 5, bird_height + 5), draw_border)
+        )
+        return overlays
+
+    @staticmethod
+    def _title_overlay(title: TitleHelper, text: str, org: Tuple[int, int]):
+        # The outline is 6 px thick, leave room for it and the anti-aliasing
+        (text_width, text_height), baseline = cv2.getTextSize(
+            text, title.text_type, 1.2, 6
+        )
+        pad = 8
+        origin = (org[0] - pad, org[1] - text_height - pad)
+        size = (text_width + 2 * pad, text_height + baseline + 2 * pad)
+        return OverlayPatch(
+            origin,
+            size,
+            lambda canvas: title.putText(canvas, text, (pad, text_height + pad)),
+        )
+
+    def colorize(self, color: np.ndarray, depth: np.ndarray) -> np.ndarray:
+        """Replace the right half of `color` with colored depth, in place."""
+        half_frame = depth.shape[1] // 2
+        color[:, half_frame:] = colorize_depth(depth, slice(half_frame, None))
+        return color
+
+    def flip_resize(self, frame: np.ndarray) -> np.ndarray:
+        # The output buffer is reused, it is copied when the ImgFrame is created
+        return cv2.resize(cv2.flip(frame, 1), self.output_size, dst=self._frame)
+
+    def draw_overlays(self, frame: np.ndarray, bird_view: np.ndarray) -> np.ndarray:
+        for overlay in self.overlays:
+            overlay.composite(frame)
+        x, y = BIRD_VIEW_ORIGIN
+        frame[y : y + bird_view.shape[0], x : x + bird_view.shape[1]] = bird_view
+        return frame
+
+    def compose(
+        self, color: np.ndarray, depth: np.ndarray, bird_view: np.ndarray
+    ) -> np.ndarray:
+        frame = self.colorize(color, depth)
+        frame = self.flip_resize(frame)
+        return self.draw_overlays(frame, bird_view)
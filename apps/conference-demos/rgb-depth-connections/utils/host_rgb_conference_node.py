@@ -1,20 +1,9 @@
-from pathlib import Path
-import cv2
 import depthai as dai
-import numpy as np
 from depthai_nodes.utils import AnnotationHelper
 from typing import List
 
-from .texts import TextHelper, TitleHelper
-
-JET_CUSTOM = cv2.applyColorMap(np.arange(256, dtype=np.uint8), cv2.COLORMAP_JET)
-JET_CUSTOM = JET_CUSTOM[::-1]
-JET_CUSTOM[0] = [0, 0, 0]
-
-logo_path = Path(__file__).parent.parent / "assets" / "logo.jpeg"
-
-LOGO = cv2.imread(str(logo_path))
-LOGO = cv2.resize(LOGO, (250, 67))
+from .frame_composer import FrameComposer
+from .texts import TextHelper
 
 
 class CombineOutputs(dai.node.HostNode):
@@ -31,7 +20,7 @@ class CombineOutputs(dai.node.HostNode):
             ]
         )
         self.text = TextHelper()
-        self.title = TitleHelper()
+        self.composer = FrameComposer()
         self.label_map = None
 
     def build(
@@ -57,23 +46,12 @@ class CombineOutputs(dai.node.HostNode):
         assert isinstance(depth_frame, dai.ImgFrame)
         assert isinstance(spatial_dets, dai.SpatialImgDetections)
 
-        combined_frame = color_frame.getCvFrame()
+        color = color_frame.getCvFrame()
         depth = depth_frame.getCvFrame()
         bird_view = bird_frame.getCvFrame()
         detections = spatial_dets.detections
 
-        depth = cv2.normalize(depth, None, 256, 0, cv2.NORM_INF, cv2.CV_8UC3)
-        depth = cv2.equalizeHist(depth)
-        depth = cv2.applyColorMap(depth, JET_CUSTOM)
-        half_frame = depth.shape[1] // 2
-        combined_frame[:, half_frame:] = depth[:, half_frame:]
-
-        height = combined_frame.shape[0]
-        width = combined_frame.shape[1]
-        combined_frame = cv2.flip(combined_frame, 1)
-
-        resized_frame = cv2.resize(combined_frame, (1920, 1080))
-        height, width = resized_frame.shape[:2]
+        resized_frame = self.composer.compose(color, depth, bird_view)
 
         annotation_helper = AnnotationHelper()
         for detection in detections:
@@ -102,29 +80,8 @@ class CombineOutputs(dai.node.HostNode):
                 size=32,
             )
 
-        self.title.putText(resized_frame, "DEPTH", (30, 50))
-        self.title.putText(resized_frame, "RGB", (width // 2 + 30, 50))
-
-        # Add Luxonis logo
-        cv2.rectangle(
-            resized_frame,
-            (width // 2 - 140, height - 90),
-            (width // 2 + 140, height - 10),
-            (255, 255, 255),
-            -1,
-        )
-        resized_frame[
-            (height - 82) : (height - 15), (width // 2 - 125) : (width // 2 + 125)
-        ] = LOGO
-
-        # Birdseye view
-        cv2.rectangle(resized_frame, (10, 390), (110, 690), (255, 255, 255), 3)
-        resized_frame[390:690, 10:110] = bird_view
-
         output_frame = dai.ImgFrame()
-        output_frame.setCvFrame(
-            resized_frame, dai.ImgFrame.Type.BGR888i
-        )  # TODO: first resize then add birdframe and logo
+        output_frame.setCvFrame(resized_frame, dai.ImgFrame.Type.BGR888i)
 
         annotations_msg = annotation_helper.build(
             timestamp=output_frame.getTimestamp(),
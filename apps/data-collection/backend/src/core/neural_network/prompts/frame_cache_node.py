@@ -3,17 +3,35 @@ import numpy as np
 
 
 class FrameCacheNode(dai.node.HostNode):
+    """
+    Keeps the last raw frame and converts it to BGR only when it is requested.
+
+    Storing the ImgFrame is just a reference, while getCvFrame() is a full NV12 -> BGR
+    conversion. Frames are requested rarely (e.g. for a bbox prompt), so conversion is
+    deferred until then. The last converted frame is memoized by sequence number.
+    """
+
     def __init__(self) -> None:
         super().__init__()
-        self._last_frame: np.ndarray | None = None
+        self._last_frame: dai.ImgFrame | None = None
+        self._converted: tuple[int, np.ndarray] | None = None
 
     def build(self, frame: dai.Node.Output) -> "FrameCacheNode":
         self.link_args(frame)
         return self
 
     def process(self, frame: dai.ImgFrame) -> dai.ImgFrame:
-        self._last_frame = frame.getCvFrame()
+        self._last_frame = frame
         return frame
 
     def get_last_frame(self) -> np.ndarray | None:
-        return self._last_frame
+        frame = self._last_frame
+        if frame is None:
+            return None
+        seq = frame.getSequenceNum()
+        converted = self._converted
+        if converted is not None and converted[0] == seq:
+            return converted[1]
+        image = frame.getCvFrame()
+        self._converted = (seq, image)
+        return image
@@ -3,6 +3,7 @@ from typing import Dict, Any, List, Optional
 
 from core.snapping.front_end_config_service.snap_payload import ConditionConfig
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.frame_features import FrameFeatures
 from time import time
 
 
@@ -35,8 +36,8 @@ class Condition(ABC):
         self._last_trigger_time: Optional[float] = None
 
     @abstractmethod
-    def should_trigger(self, *args, **kwargs) -> bool:
-        """Return True if this condition should trigger."""
+    def should_trigger(self, features: FrameFeatures) -> bool:
+        """Return True if this condition should trigger for the given frame features."""
         pass
 
     @abstractmethod
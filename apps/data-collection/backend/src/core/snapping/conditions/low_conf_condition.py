@@ -1,8 +1,8 @@
 from core.snapping.front_end_config_service.snap_payload import ConditionConfig
 from core.snapping.conditions.base_condition import Condition
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.frame_features import FrameFeatures
 from typing import Dict, Any
-import depthai as dai
 
 
 class LowConfidenceCondition(Condition):
@@ -26,17 +26,17 @@ class LowConfidenceCondition(Condition):
         base["threshold"] = self.threshold
         return base
 
-    def should_trigger(self, detections: list[dai.ImgDetection], **kwargs) -> bool:
+    def should_trigger(self, features: FrameFeatures) -> bool:
         if self.enabled and self._cooldown_passed():
-            if self._check_detections(detections):
+            if self._check_detections(features):
                 self.mark_triggered()
                 return True
         return False
 
-    def _check_detections(self, detections: list[dai.ImgDetection]) -> bool:
-        if not detections:
+    def _check_detections(self, features: FrameFeatures) -> bool:
+        if features.num_detections == 0:
             return False
-        self.last_lowest = min((float(d.confidence) for d in detections), default=1.0)
+        self.last_lowest = features.min_confidence
         return self.last_lowest < self.threshold
 
     def make_extras(self) -> Dict[str, str]:
@@ -1,7 +1,7 @@
 from core.snapping.conditions.base_condition import Condition
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.frame_features import FrameFeatures
 from typing import Dict
-import depthai as dai
 
 
 class NoDetectionsCondition(Condition):
@@ -12,9 +12,9 @@ class NoDetectionsCondition(Condition):
     def __init__(self, name: str, default_cooldown: float, tags: list[str]):
         super().__init__(name, default_cooldown, tags or [])
 
-    def should_trigger(self, detections: list[dai.ImgDetection], **kwargs) -> bool:
+    def should_trigger(self, features: FrameFeatures) -> bool:
         if self.enabled and self._cooldown_passed():
-            if not detections or len(detections) == 0:
+            if features.num_detections == 0:
                 self.mark_triggered()
                 return True
         return False
@@ -1,5 +1,6 @@
 from core.snapping.conditions.base_condition import Condition
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.frame_features import FrameFeatures
 from typing import Dict
 
 
@@ -11,7 +12,7 @@ class TimedCondition(Condition):
     def __init__(self, name: str, default_cooldown: float, tags: list[str]):
         super().__init__(name, default_cooldown, tags or [])
 
-    def should_trigger(self, **kwargs) -> bool:
+    def should_trigger(self, features: FrameFeatures) -> bool:
         if self.enabled and self._cooldown_passed():
             self.mark_triggered()
             return True
@@ -1,22 +1,23 @@
 from core.snapping.front_end_config_service.snap_payload import ConditionConfig
 from core.snapping.conditions.base_condition import Condition
-from core.snapping.conditions.tracker_conditions.tracklet_analyzer import (
-    TrackletAnalyzer,
-)
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.frame_features import FrameFeatures
 from typing import Dict, Any
-import depthai as dai
 
 
 class LostMidCondition(Condition):
-    """Triggers when an object is lost inside the frame center region."""
+    """
+    Triggers when an object is lost inside the frame center region.
+
+    Track state is kept by the TrackletAnalyzer of the SnapsProducer, which updates it
+    on every frame, also while this condition is disabled or cooling down.
+    """
 
     KEY = ConditionKey.LOST_MID
 
     def __init__(self, name: str, default_cooldown: float, tags: list[str]):
         super().__init__(name, default_cooldown, tags or [])
         self.margin: float = 0.2
-        self.prev_tracked: dict[int, bool] = {}
 
     def apply_config(self, conf: ConditionConfig):
         super().apply_config(conf)
@@ -29,32 +30,19 @@ class LostMidCondition(Condition):
         base["margin"] = self.margin
         return base
 
-    def should_trigger(self, tracklets: dai.Tracklet, **kwargs) -> bool:
+    def should_trigger(self, features: FrameFeatures) -> bool:
         if self.enabled and self._cooldown_passed():
-            if self._check_tracklets(tracklets):
+            if self._check_lost_centers(features):
                 self.mark_triggered()
                 return True
         return False
 
-    def _check_tracklets(self, tracklets) -> bool:
-        if tracklets is None:
+    def _check_lost_centers(self, features: FrameFeatures) -> bool:
+        centers = features.lost_centers
+        if len(centers) == 0:
             return False
-
-        triggered = False
-        for t in getattr(tracklets, "tracklets", []):
-            tr = TrackletAnalyzer(t)
-            if tr.is_lost and tr.was_tracked(self.prev_tracked):
-                rc = tr.center_area()
-                if rc is not None:
-                    cx, cy, _ = rc
-                    if (
-                        self.margin <= cx <= 1 - self.margin
-                        and self.margin <= cy <= 1 - self.margin
-                    ):
-                        triggered = True
-            tr.update_state(self.prev_tracked)
-
-        return triggered
+        inside = (centers >= self.margin) & (centers <= 1 - self.margin)
+        return bool(inside.all(axis=1).any())
 
     def make_extras(self) -> Dict[str, str]:
         return {"reason": "lost_in_middle", "margin": f"{round(self.margin, 3)}"}
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+import depthai as dai
+import numpy as np
+
+from core.snapping.conditions.tracker_conditions.tracklet_analyzer import (
+    TrackletAnalyzer,
+)
+
+
+@dataclass
+class FrameFeatures:
+    """
+    Features of one pipeline tick, computed once and shared by all snap conditions.
+    """
+
+    num_detections: int
+    min_confidence: float
+    lost_centers: np.ndarray  # (N, 2) centers of tracks lost in this tick
+
+    @classmethod
+    def from_messages(
+        cls,
+        detections: dai.ImgDetections,
+        tracklets: dai.Tracklets,
+        analyzer: TrackletAnalyzer,
+    ) -> "FrameFeatures":
+        dets = detections.detections
+        return cls(
+            num_detections=len(dets),
+            min_confidence=min((d.confidence for d in dets), default=1.0),
+            lost_centers=analyzer.newly_lost_centers(tracklets),
+        )
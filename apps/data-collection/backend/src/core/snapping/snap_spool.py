@@ -0,0 +1,400 @@
+import hashlib
+import json
+import logging as log
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Protocol, Tuple
+
+import cv2
+import depthai as dai
+import numpy as np
+
+# Every spool file is a little-endian uint32 header length, a JSON header and the
+# JPEG bytes of the frame. Files are written to a temporary name and renamed, so a
+# crash never leaves a half written snap in the queue.
+HEADER = struct.Struct("<I")
+SPOOL_SUFFIX = ".snap"
+TMP_SUFFIX = ".tmp"
+# Consecutive failures after which the backoff stops growing, far beyond max_backoff
+MAX_BACKOFF_EXPONENT = 16
+
+
+@dataclass
+class SpooledSnap:
+    """A snap as stored in the spool, with the frame already JPEG-encoded."""
+
+    name: str
+    file_name: Optional[str]
+    tags: List[str]
+    extras: Dict[str, str]
+    jpeg: bytes
+    # rows of (label, confidence, xmin, ymin, xmax, ymax)
+    detections: np.ndarray = field(
+        default_factory=lambda: np.empty((0, 6), dtype=np.float32)
+    )
+    created: float = field(default_factory=time.time)
+    # Size of the frame, so the JPEG can be uploaded without decoding it
+    width: int = 0
+    height: int = 0
+
+    @property
+    def digest(self) -> str:
+        h = hashlib.sha1(self.name.encode())
+        h.update(self.jpeg)
+        return h.hexdigest()[:16]
+
+    @classmethod
+    def from_messages(
+        cls,
+        name: str,
+        file_name: Optional[str],
+        frame: dai.ImgFrame,
+        detections: Optional[dai.ImgDetections],
+        tags: List[str],
+        extras: Dict[str, str],
+        jpeg_quality: int = 90,
+    ) -> "SpooledSnap":
+        ok, jpeg = cv2.imencode(
+            ".jpg", frame.getCvFrame(), [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        )
+        if not ok:
+            raise ValueError("Failed to JPEG-encode snap frame")
+        rows = [
+            (d.label, d.confidence, d.xmin, d.ymin, d.xmax, d.ymax)
+            for d in (detections.detections if detections is not None else [])
+        ]
+        return cls(
+            name=name,
+            file_name=file_name,
+            tags=list(tags or []),
+            extras=dict(extras or {}),
+            jpeg=jpeg.tobytes(),
+            detections=np.array(rows, dtype=np.float32).reshape(-1, 6),
+            width=frame.getWidth(),
+            height=frame.getHeight(),
+        )
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps(
+            {
+                "name": self.name,
+                "file_name": self.file_name,
+                "tags": self.tags,
+                "extras": self.extras,
+                "detections": self.detections.tolist(),
+                "created": self.created,
+                "width": self.width,
+                "height": self.height,
+            }
+        ).encode()
+        return HEADER.pack(len(header)) + header + self.jpeg
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpooledSnap":
+        (size,) = HEADER.unpack_from(data)
+        header = json.loads(data[HEADER.size : HEADER.size + size])
+        return cls(
+            name=header["name"],
+            file_name=header["file_name"],
+            tags=header["tags"],
+            extras=header["extras"],
+            jpeg=data[HEADER.size + size :],
+            detections=np.array(header["detections"], dtype=np.float32).reshape(-1, 6),
+            created=header["created"],
+            width=header.get("width", 0),
+            height=header.get("height", 0),
+        )
+
+
+class SnapUploader(Protocol):
+    def upload(self, snap: SpooledSnap) -> None:
+        """Upload a snap, raise on failure so it is retried later."""
+        ...
+
+
+class HubSnapUploader:
+    """Uploads spooled snaps to Hub through the DepthAI EventsManager."""
+
+    def __init__(self):
+        self._events_manager: Optional[dai.EventsManager] = None
+
+    def upload(self, snap: SpooledSnap) -> None:
+        if self._events_manager is None:
+            self._events_manager = dai.EventsManager()
+            self._events_manager.setLogResponse(False)
+
+        width, height = snap.width, snap.height
+        if not width or not height:
+            # Spooled by an older version without the frame size
+            image = cv2.imdecode(np.frombuffer(snap.jpeg, np.uint8), cv2.IMREAD_COLOR)
+            height, width = image.shape[:2]
+        # The stored JPEG is uploaded as it is, never decoded and encoded again
+        frame = dai.EncodedFrame()
+        frame.setProfile(dai.EncodedFrame.Profile.JPEG)
+        frame.setWidth(width)
+        frame.setHeight(height)
+        frame.setData(np.frombuffer(snap.jpeg, np.uint8))
+
+        detections = dai.ImgDetections()
+        dets = []
+        for label, conf, xmin, ymin, xmax, ymax in snap.detections.tolist():
+            det = dai.ImgDetection()
+            det.label = int(label)
+            det.confidence, det.xmin, det.ymin, det.xmax, det.ymax = (
+                conf,
+                xmin,
+                ymin,
+                xmax,
+                ymax,
+            )
+            dets.append(det)
+        detections.detections = dets
+
+        file_group = dai.FileGroup()
+        file_group.addImageDetectionsPair(snap.file_name, frame, detections)
+        sent = self._events_manager.sendSnap(
+            name=snap.name,
+            fileGroup=file_group,
+            tags=snap.tags,
+            extras=snap.extras,
+        )
+        if not sent:
+            raise ConnectionError(f"Hub rejected snap '{snap.name}'")
+
+
+class FakeSnapUploader:
+    """
+    Offline stand-in for HubSnapUploader. Each upload takes `delay` seconds and fails
+    with probability `failure_rate`, which is enough to exercise the spool backoff.
+    """
+
+    def __init__(
+        self, delay: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None
+    ):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.uploaded: List[SpooledSnap] = []
+        self._rng = random.Random(seed)
+
+    def upload(self, snap: SpooledSnap) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        if self._rng.random() < self.failure_rate:
+            raise ConnectionError("Simulated upload failure")
+        self.uploaded.append(snap)
+        log.info(f"[fake upload] {snap.name} ({len(snap.jpeg)} B)")
+
+
+class SnapSpool:
+    """
+    Bounded, crash-safe on-disk queue of snaps drained by a background uploader.
+
+    `put` never blocks: snaps go to a small in-memory handoff queue and a writer thread
+    persists them. A second thread uploads the oldest spooled snap, deletes it on
+    success and retries with exponential backoff on failure. When the spool exceeds
+    `max_items` or `max_bytes`, the oldest snaps are dropped. Snaps with the same name
+    and image are deduplicated. Snaps left on disk from a previous run are uploaded
+    after restart.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        uploader: SnapUploader,
+        max_items: int = 500,
+        max_bytes: int = 256 * 1024 * 1024,
+        handoff_size: int = 16,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.directory = Path(directory)
+        self.uploader = uploader
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.dropped = 0
+        self.duplicates = 0
+        self.uploaded = 0
+        self.failures = 0
+
+        self._handoff: "queue.Queue[SpooledSnap]" = queue.Queue(maxsize=handoff_size)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._index: Deque[Tuple[Path, int]] = deque()
+        self._digests: set[str] = set()
+        self._recent_uploads: Deque[str] = deque(maxlen=256)
+        self._in_flight: Optional[Path] = None
+        self._bytes = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+        self._threads = [
+            threading.Thread(target=self._write_loop, name="SnapSpoolWriter"),
+            threading.Thread(target=self._upload_loop, name="SnapSpoolUploader"),
+        ]
+        for t in self._threads:
+            t.daemon = True
+            t.start()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._index)
+
+    def put(self, snap: SpooledSnap) -> bool:
+        """Queue a snap for upload without blocking. Returns False if it was dropped."""
+        try:
+            self._handoff.put_nowait(snap)
+            return True
+        except queue.Full:
+            with self._cond:
+                self.dropped += 1
+            log.warning(f"Snap spool is busy, dropping snap '{snap.name}'")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pending": len(self._index),
+                "pending_bytes": self._bytes,
+                "uploaded": self.uploaded,
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "duplicates": self.duplicates,
+            }
+
+    def close(self, timeout: float = 2.0):
+        """Stop the worker threads. Spooled snaps stay on disk for the next run."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _recover(self):
+        for tmp in self.directory.glob(f"*{TMP_SUFFIX}"):
+            tmp.unlink(missing_ok=True)
+        for path in sorted(self.directory.glob(f"*{SPOOL_SUFFIX}")):
+            size = path.stat().st_size
+            self._index.append((path, size))
+            self._digests.add(self._digest_of(path))
+            self._bytes += size
+        if self._index:
+            log.info(f"Recovered {len(self._index)} spooled snaps")
+
+    @staticmethod
+    def _digest_of(path: Path) -> str:
+        return path.stem.rsplit("_", 1)[-1]
+
+    def _write_loop(self):
+        while not self._stop.is_set():
+            try:
+                snap = self._handoff.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._write(snap)
+            except OSError as e:
+                with self._cond:
+                    self.dropped += 1
+                log.error(f"Failed to spool snap '{snap.name}': {e}")
+
+    def _write(self, snap: SpooledSnap):
+        digest = snap.digest
+        with self._cond:
+            if digest in self._digests or digest in self._recent_uploads:
+                self.duplicates += 1
+                return
+            name = f"{time.time_ns():020d}_{digest}"
+
+        data = snap.to_bytes()
+        path = self.directory / f"{name}{SPOOL_SUFFIX}"
+        tmp = path.with_suffix(TMP_SUFFIX)
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        with self._cond:
+            self._index.append((path, len(data)))
+            self._digests.add(digest)
+            self._bytes += len(data)
+            self._enforce_bounds()
+            self._cond.notify_all()
+
+    def _enforce_bounds(self):
+        # Called with the lock held, never evicts the snap being uploaded
+        while len(self._index) > 1 and (
+            len(self._index) > self.max_items or self._bytes > self.max_bytes
+        ):
+            idx = 1 if self._index[0][0] == self._in_flight else 0
+            path, size = self._index[idx]
+            del self._index[idx]
+            self._forget(path, size)
+            path.unlink(missing_ok=True)
+            self.dropped += 1
+
+    def _forget(self, path: Path, size: int):
+        self._digests.discard(self._digest_of(path))
+        self._bytes -= size
+
+    def _upload_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._index and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                path, size = self._index[0]
+                self._in_flight = path
+
+            try:
+                snap = SpooledSnap.from_bytes(path.read_bytes())
+            except FileNotFoundError:
+                self._finish(path, size, uploaded=False)
+                continue
+            except (OSError, ValueError, struct.error) as e:
+                log.error(f"Discarding unreadable spooled snap {path.name}: {e}")
+                self._finish(path, size, uploaded=False)
+                continue
+
+            try:
+                self.uploader.upload(snap)
+            except Exception as e:
+                failures = self._backoff(failures, e)
+                continue
+
+            failures = 0
+            self._finish(path, size, uploaded=True)
+
+    def _backoff(self, failures: int, error: Exception) -> int:
+        with self._cond:
+            self._in_flight = None
+            self.failures += 1
+        delay = min(self.max_backoff, self.base_backoff * 2**failures)
+        delay *= random.uniform(0.5, 1.0)
+        log.warning(f"Snap upload failed ({error}), retrying in {delay:.1f}s")
+        self._stop.wait(delay)
+        return min(failures + 1, MAX_BACKOFF_EXPONENT)
+
+    def _finish(self, path: Path, size: int, uploaded: bool):
+        with self._cond:
+            self._in_flight = None
+            if self._index and self._index[0][0] == path:
+                self._index.popleft()
+                self._forget(path, size)
+            if uploaded:
+                self.uploaded += 1
+                self._recent_uploads.append(self._digest_of(path))
+        path.unlink(missing_ok=True)
@@ -1,16 +1,17 @@
 import depthai as dai
 from box import Box
+from pathlib import Path
 
 from core.snapping.conditions.base_condition import Condition
 from core.snapping.conditions.condition_key import ConditionKey
 from core.snapping.conditions_factory import ConditionsFactory
 from core.snapping.snaps_producer import SnapsProducer
 from core.snapping.front_end_config_service.snapping_service import SnappingService
+from core.snapping.snap_spool import HubSnapUploader, SnapSpool
+from core.snapping.spooled_snaps_uploader import SpooledSnapsUploader
 
 from depthai_nodes.node import ImgDetectionsBridge
 
-from depthai_nodes.node import SnapsUploader
-
 
 class SnappingServiceManager:
     """
@@ -30,7 +31,8 @@ class SnappingServiceManager:
         self._tracker = tracker
         self._detections = detections
         self._conditions_config = conditions_config
-        self._uploader: SnapsUploader = None
+        self._uploader: SpooledSnapsUploader = None
+        self._spool: SnapSpool = None
 
         self._conditions: dict[ConditionKey, Condition] = None
         self._snap_service: SnappingService = None
@@ -47,7 +49,18 @@ class SnappingServiceManager:
             self._tracker.out,
         )
 
-        self._uploader = self._pipeline.create(SnapsUploader).build(producer.out)
+        spool_config = self._conditions_config.spool
+        # relative spool directories are resolved against backend/src
+        spool_dir = Path(__file__).parents[2] / spool_config.directory
+        self._spool = SnapSpool(
+            directory=str(spool_dir),
+            uploader=HubSnapUploader(),
+            max_items=spool_config.max_items,
+            max_bytes=spool_config.max_mb * 1024 * 1024,
+        )
+        self._uploader = self._pipeline.create(SpooledSnapsUploader).build(
+            producer.out, self._spool, jpeg_quality=spool_config.jpeg_quality
+        )
 
         self._snap_service = SnappingService(self._conditions)
 
@@ -3,6 +3,10 @@ import time
 
 from core.snapping.conditions.base_condition import Condition
 from core.snapping.conditions.condition_key import ConditionKey
+from core.snapping.conditions.tracker_conditions.tracklet_analyzer import (
+    TrackletAnalyzer,
+)
+from core.snapping.frame_features import FrameFeatures
 from depthai_nodes.message import SnapData
 import logging as log
 
@@ -16,11 +20,14 @@ class SnapsProducer(dai.node.HostNode):
     ----------
     _conditions : dict[ConditionKey, Condition]
         A dictionary mapping condition keys to their respective snapping conditions.
+    _tracklet_analyzer : TrackletAnalyzer
+        Track state shared by all tracker based conditions, updated once per tick.
     """
 
     def __init__(self):
         super().__init__()
         self._conditions: dict[ConditionKey, Condition] = {}
+        self._tracklet_analyzer = TrackletAnalyzer()
 
     def build(
         self,
@@ -40,10 +47,11 @@ class SnapsProducer(dai.node.HostNode):
         tracklets: dai.Tracklets,
     ) -> None:
         assert isinstance(detections, dai.ImgDetections)
+        features = FrameFeatures.from_messages(
+            detections, tracklets, self._tracklet_analyzer
+        )
         for cond in self._conditions.values():
-            if not cond.should_trigger(
-                detections=detections.detections, tracklets=tracklets
-            ):
+            if not cond.should_trigger(features):
                 continue
 
             snap = SnapData(
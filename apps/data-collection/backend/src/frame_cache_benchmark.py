@@ -0,0 +1,72 @@
+import argparse
+import time
+from datetime import timedelta
+
+import depthai as dai
+import numpy as np
+
+from core.neural_network.prompts.frame_cache_node import FrameCacheNode
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+
+parser = argparse.ArgumentParser(
+    description="Compare host CPU time per frame of eager and lazy frame caching.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-f", "--frames", default=300, type=int, help="Number of frames per run."
+)
+parser.add_argument(
+    "-r",
+    "--request_every",
+    default=100,
+    type=int,
+    help="Request a cached frame every N frames, as a bbox prompt would.",
+)
+args = parser.parse_args()
+
+
+def make_nv12_frames(width: int, height: int, count: int = 8) -> list[dai.ImgFrame]:
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = dai.ImgFrame()
+        frame.setData(rng.integers(0, 256, width * height * 3 // 2, dtype=np.uint8))
+        frame.setWidth(width)
+        frame.setHeight(height)
+        frame.setStride(width)
+        frame.setType(dai.ImgFrame.Type.NV12)
+        frame.setSequenceNum(i)
+        frame.setTimestamp(timedelta(milliseconds=33 * i))
+        frames.append(frame)
+    return frames
+
+
+def run_eager(frames: list[dai.ImgFrame]) -> float:
+    """Previous behaviour: convert every frame as it arrives."""
+    start = time.process_time()
+    for i in range(args.frames):
+        frames[i % len(frames)].getCvFrame()
+    return (time.process_time() - start) / args.frames
+
+
+def run_lazy(frames: list[dai.ImgFrame]) -> float:
+    node = pipeline.create(FrameCacheNode)
+    start = time.process_time()
+    for i in range(args.frames):
+        frame = frames[i % len(frames)]
+        # Renumber so the memoized conversion is not reused across requests
+        frame.setSequenceNum(i)
+        node.process(frame)
+        if i % args.request_every == 0:
+            node.get_last_frame()
+    return (time.process_time() - start) / args.frames
+
+
+pipeline = dai.Pipeline(False)
+print(f"{'resolution':>10} {'eager ms/frame':>15} {'lazy ms/frame':>14} {'speedup':>8}")
+for name, (width, height) in RESOLUTIONS.items():
+    frames = make_nv12_frames(width, height)
+    eager = run_eager(frames) * 1000
+    lazy = run_lazy(frames) * 1000
+    print(f"{name:>10} {eager:>15.3f} {lazy:>14.3f} {eager / max(lazy, 1e-9):>7.1f}x")
@@ -0,0 +1,135 @@
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import depthai as dai
+import numpy as np
+
+from core.snapping.conditions.low_conf_condition import LowConfidenceCondition
+from core.snapping.conditions.tracker_conditions.lost_mid_condition import (
+    LostMidCondition,
+)
+from core.snapping.conditions.tracker_conditions.tracklet_analyzer import (
+    TrackletAnalyzer,
+)
+from core.snapping.frame_features import FrameFeatures
+from core.snapping.front_end_config_service.snap_payload import ConditionConfig
+
+parser = argparse.ArgumentParser(
+    description="Replay synthetic tracklets with churning track ids through the "
+    "shared frame features and the lost-mid and low-confidence conditions, and check "
+    "that track state and memory stay bounded.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--frames", default=20000, type=int)
+parser.add_argument(
+    "-t", "--tracks", default=20, type=int, help="Live tracks per frame."
+)
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+Status = dai.Tracklet.TrackingStatus
+rng = np.random.default_rng(args.seed)
+
+
+class SyntheticTracker:
+    """Tracks that are NEW, TRACKED for a while, LOST for a few frames and then
+    REMOVED once, after which their id is never used again."""
+
+    def __init__(self):
+        self._next_id = 0
+        self._tracks = {}  # id -> [status, frames left in it, center x, center y]
+
+    def _spawn(self):
+        x, y = rng.uniform(0.05, 0.95, 2)
+        self._tracks[self._next_id] = [Status.NEW, 1, x, y]
+        self._next_id += 1
+
+    def step(self):
+        while len(self._tracks) < args.tracks:
+            self._spawn()
+        tracklets = []
+        for tid, track in list(self._tracks.items()):
+            status, left, x, y = track
+            roi = SimpleNamespace(x=x - 0.05, y=y - 0.05, width=0.1, height=0.1)
+            tracklets.append(SimpleNamespace(id=tid, status=status, roi=roi))
+            track[1] -= 1
+            if track[1] > 0:
+                continue
+            if status == Status.NEW:
+                track[:2] = [Status.TRACKED, int(rng.integers(5, 60))]
+            elif status == Status.TRACKED:
+                track[:2] = [Status.LOST, int(rng.integers(1, 5))]
+            elif status == Status.LOST:
+                track[:2] = [Status.REMOVED, 1]
+            else:
+                del self._tracks[tid]
+        return SimpleNamespace(tracklets=tracklets)
+
+
+def detections(count):
+    return SimpleNamespace(
+        detections=[SimpleNamespace(confidence=c) for c in rng.uniform(0.2, 1.0, count)]
+    )
+
+
+def condition(cls, cooldown, **config):
+    cond = cls(cls.__name__, default_cooldown=cooldown, tags=[])
+    cond.apply_config(ConditionConfig(enabled=True, cooldown=cooldown, **config))
+    return cond
+
+
+def state_size(obj) -> int:
+    """Items held in the containers among the attributes of an object."""
+    return sum(
+        len(value)
+        for value in vars(obj).values()
+        if isinstance(value, (dict, list, set, tuple))
+    )
+
+
+tracker = SyntheticTracker()
+analyzer = TrackletAnalyzer()
+conditions = {
+    "lost_mid": condition(LostMidCondition, 0.0, margin=0.2),
+    "low_conf": condition(LowConfidenceCondition, 0.0, threshold=0.25),
+    # Fires once, then stays in its cooldown for the rest of the replay
+    "lost_mid_cooldown": condition(LostMidCondition, 3600.0, margin=0.2),
+}
+triggers = dict.fromkeys(conditions, 0)
+
+tracemalloc.start()
+warm_up = args.frames // 10
+start = time.perf_counter()
+for frame in range(args.frames):
+    tracklets = tracker.step()
+    features = FrameFeatures.from_messages(
+        detections(len(tracklets.tracklets)), tracklets, analyzer
+    )
+    for name, cond in conditions.items():
+        triggers[name] += cond.should_trigger(features)
+
+    assert len(analyzer) <= len(tracklets.tracklets), len(analyzer)
+    for cond in conditions.values():
+        assert state_size(cond) <= args.tracks, vars(cond)
+    if frame == warm_up:
+        baseline, _ = tracemalloc.get_traced_memory()
+elapsed = time.perf_counter() - start
+current, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+print(
+    f"{args.frames} frames, {tracker._next_id} track ids, {args.tracks} live: "
+    f"{1e6 * elapsed / args.frames:.0f} us per frame (traced)"
+)
+print(f"Triggers: {triggers}")
+print(
+    f"Analyzer holds {len(analyzer)} tracks. Traced memory after warm-up "
+    f"{baseline / 1024:.1f} KiB, at the end {current / 1024:.1f} KiB, peak "
+    f"{peak / 1024:.1f} KiB"
+)
+assert tracker._next_id > 10 * args.tracks, "Track ids did not churn"
+assert triggers["lost_mid"] > 0 and triggers["low_conf"] > 0, triggers
+assert triggers["lost_mid_cooldown"] == 1, triggers
+assert current - baseline < 64 * 1024, "Memory grew with the number of track ids"
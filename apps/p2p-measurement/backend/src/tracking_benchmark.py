@@ -0,0 +1,145 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.sparse_motion import SparseMotionEstimator
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 400
+
+parser = argparse.ArgumentParser(
+    description="Compare host CPU time and accuracy of the former dense tracking "
+    "(Farneback global motion and one CSRT tracker per point) with sparse LK "
+    "tracking. A known camera shake is applied to the frames, so tracking errors "
+    "can be measured against the ground truth. Use a clip of a static scene.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-v",
+    "--video",
+    default=None,
+    type=str,
+    help="Recorded clip. A synthetic textured scene is used if not set.",
+)
+parser.add_argument("-f", "--frames", default=300, type=int, help="Max frames.")
+parser.add_argument("-p", "--points", default=2, type=int, help="Measured points.")
+parser.add_argument(
+    "-s", "--shake", default=4.0, type=float, help="Camera shake per frame in px."
+)
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+rng = np.random.default_rng(args.seed)
+
+
+def read_frames():
+    if args.video is None:
+        noise = rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH), dtype=np.uint8)
+        scene = cv2.cvtColor(cv2.GaussianBlur(noise, (0, 0), 2), cv2.COLOR_GRAY2BGR)
+        for _ in range(args.frames):
+            yield scene
+        return
+    capture = cv2.VideoCapture(args.video)
+    for _ in range(args.frames):
+        ok, frame = capture.read()
+        if not ok:
+            break
+        yield cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+    capture.release()
+
+
+def shaken(frames):
+    """Warp frames by a random walk similarity transform, yield it with the frame."""
+    angle, scale, shift = 0.0, 1.0, np.zeros(2)
+    center = (FRAME_WIDTH / 2, FRAME_HEIGHT / 2)
+    for frame in frames:
+        transform = cv2.getRotationMatrix2D(center, angle, scale)
+        transform[:, 2] += shift
+        yield cv2.warpAffine(frame, transform, (FRAME_WIDTH, FRAME_HEIGHT)), transform
+        # Drift back towards the origin, so the points stay in the frame
+        shift = 0.9 * shift + rng.normal(0, args.shake, 2)
+        angle = 0.9 * angle + rng.normal(0, 0.2)
+        scale = 1 + 0.9 * (scale - 1) + rng.normal(0, 0.002)
+
+
+class DenseTracking:
+    """The former tracking: one CSRT tracker per point and dense global motion."""
+
+    name = "dense (CSRT + Farneback)"
+    bbox_radius = 30
+
+    def __init__(self, frame, points):
+        self.trackers = []
+        for x, y in points:
+            tracker = cv2.TrackerCSRT.create()
+            r = self.bbox_radius
+            tracker.init(frame, (int(x) - r, int(y) - r, 2 * r, 2 * r))
+            self.trackers.append(tracker)
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def step(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        positions = []
+        for tracker in self.trackers:
+            _, (x, y, w, h) = tracker.update(frame)
+            positions.append((x + w / 2, y + h / 2))
+            cv2.calcOpticalFlowFarneback(
+                self.prev_gray[::10, ::10], gray[::10, ::10], None,
+                0.5, 1, 13, 2, 5, 1.1, 0,
+            )  # fmt: skip
+        self.prev_gray = gray
+        return np.array(positions)
+
+
+class SparseTracking:
+    name = "sparse (LK)"
+
+    def __init__(self, frame, points):
+        self.estimator = SparseMotionEstimator()
+        self.estimator.update(frame)
+        self.positions = np.asarray(points, dtype=np.float32)
+
+    def step(self, frame):
+        self.estimator.update(frame)
+        self.positions, _ = self.estimator.track_points(self.positions)
+        return self.positions
+
+
+def run(method_class, frames, transforms, points):
+    method = method_class(frames[0], points)
+    durations, errors = [], []
+    base = np.hstack([points, np.ones((len(points), 1))])
+    # Ground truth positions in the first frame coordinates, mapped to each frame
+    first_inverse = cv2.invertAffineTransform(transforms[0])
+    scene_points = base @ first_inverse.T
+    scene_points = np.hstack([scene_points, np.ones((len(points), 1))])
+    for frame, transform in zip(frames[1:], transforms[1:]):
+        start = time.perf_counter()
+        positions = method.step(frame)
+        durations.append(time.perf_counter() - start)
+        truth = scene_points @ transform.T
+        errors.append(np.linalg.norm(positions - truth, axis=1))
+    errors = np.concatenate(errors)
+    print(
+        f"{method.name:>26}: {1000 * np.mean(durations):6.2f} ms/frame, "
+        f"error mean {errors.mean():5.2f} px, p95 {np.percentile(errors, 95):5.2f} px, "
+        f"max {errors.max():6.2f} px"
+    )
+
+
+frames, transforms = zip(*shaken(read_frames()))
+gray = cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY)
+# Measured points are clicked on structure, pick strong corners in the center area
+mask = np.zeros_like(gray)
+mask[FRAME_HEIGHT // 4 : -FRAME_HEIGHT // 4, FRAME_WIDTH // 4 : -FRAME_WIDTH // 4] = 1
+corners = cv2.goodFeaturesToTrack(gray, 50, 0.01, 20, mask=mask).reshape(-1, 2)
+points = corners[rng.choice(len(corners), args.points, replace=False)]
+
+print(f"{len(frames)} frames of {FRAME_WIDTH}x{FRAME_HEIGHT}, {args.points} points")
+if hasattr(cv2, "TrackerCSRT"):
+    run(DenseTracking, frames, transforms, points)
+else:
+    print("CSRT is not available (needs opencv-contrib-python), skipping dense")
+run(SparseTracking, frames, transforms, points)
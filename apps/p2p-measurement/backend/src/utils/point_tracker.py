@@ -4,6 +4,7 @@ import cv2
 from typing import List, Tuple, Optional
 from depthai_nodes.utils import AnnotationHelper
 from .distance_calculator import DistanceCalculator
+from .sparse_motion import SparseMotionEstimator
 
 Point = Tuple[int, int]
 
@@ -22,7 +23,8 @@ class PointTracker(dai.node.HostNode):
     max_bbox_radius = 200
     similarity_threshold = 0.3
     debounce_threshold = 2
-    motion_threshold = 0.5
+    # Mean global motion in pixels (0.5 px of the former 10x subsampled dense flow)
+    motion_threshold = 5.0
 
     modes = {
         1: {"name": "tracking", "tracking": 2},
@@ -45,7 +47,7 @@ class PointTracker(dai.node.HostNode):
         self.distance_calculator: Optional[DistanceCalculator] = None
 
         self.current_frame: Optional[np.ndarray] = None
-        self.prev_frame: Optional[np.ndarray] = None
+        self.motion_estimator = SparseMotionEstimator()
 
         self.mode = self.modes[1]
 
@@ -71,7 +73,6 @@ class PointTracker(dai.node.HostNode):
             self.distance_calculator.clear_distances()
 
     def set_frame(self, frame: np.ndarray):
-        self.prev_frame = self.current_frame
         self.current_frame = frame.copy() if frame is not None else None
 
     def add_point(self, x: float, y: float, frame_width: int, frame_height: int):
@@ -85,75 +86,25 @@ class PointTracker(dai.node.HostNode):
             self._add_simple_point(pixel_x, pixel_y)
             return
 
-        try:
-            bbox_radius = self._calculate_bbox_radius((pixel_x, pixel_y))
-
-            x1 = max(0, pixel_x - bbox_radius)
-            y1 = max(0, pixel_y - bbox_radius)
-            x2 = min(frame_width, pixel_x + bbox_radius)
-            y2 = min(frame_height, pixel_y + bbox_radius)
-
-            bbox = (x1, y1, x2 - x1, y2 - y1)
-
-            tracker = cv2.TrackerCSRT.create()
-
-            if tracker is None:
-                raise ValueError("No tracker available")
-
-            x, y, w, h = bbox
-            if (
-                x < 0
-                or y < 0
-                or w <= 0
-                or h <= 0
-                or x + w > self.current_frame.shape[1]
-                or y + h > self.current_frame.shape[0]
-            ):
-                raise ValueError("Bbox out of bounds or invalid dimensions")
-
-            if self.current_frame.dtype != np.uint8:
-                frame_for_tracker = (
-                    (self.current_frame * 255).astype(np.uint8)
-                    if self.current_frame.dtype == np.float32
-                    else self.current_frame.astype(np.uint8)
-                )
-            else:
-                frame_for_tracker = self.current_frame.copy()
+        bbox_radius = self._calculate_bbox_radius((pixel_x, pixel_y))
 
-            if len(frame_for_tracker.shape) == 3 and frame_for_tracker.shape[2] == 3:
-                pass
-            elif len(frame_for_tracker.shape) == 2:
-                frame_for_tracker = cv2.cvtColor(frame_for_tracker, cv2.COLOR_GRAY2BGR)
-
-            try:
-                tracker.init(frame_for_tracker, bbox)
-                success = True
-            except Exception as e:
-                success = False
-
-            if success:
-                # Extract ROI for comparison
-                x, y, w, h = bbox
-                roi = (
-                    self.current_frame[y : y + h, x : x + w]
-                    if y + h <= self.current_frame.shape[0]
-                    and x + w <= self.current_frame.shape[1]
-                    else None
-                )
-
-                point_data = {
-                    "bbox": bbox,
-                    "tracker": tracker,
-                    "roi": roi,
-                    "pixel_coords": (pixel_x, pixel_y),
-                }
-                self.points.append(point_data)
-            else:
-                self._add_simple_point(pixel_x, pixel_y)
+        x1 = max(0, pixel_x - bbox_radius)
+        y1 = max(0, pixel_y - bbox_radius)
+        x2 = min(frame_width, pixel_x + bbox_radius)
+        y2 = min(frame_height, pixel_y + bbox_radius)
 
-        except Exception as e:
-            print(f"Error adding point: {e}, pixel_x: {pixel_x}, pixel_y: {pixel_y}")
+        bbox = (x1, y1, x2 - x1, y2 - y1)
+        if bbox[2] <= 0 or bbox[3] <= 0:
             self._add_simple_point(pixel_x, pixel_y)
+            return
+
+        point_data = {
+            "bbox": bbox,
+            "roi": self.current_frame[y1:y2, x1:x2],
+            "pixel_coords": (pixel_x, pixel_y),
+            "position": (float(pixel_x), float(pixel_y)),
+        }
+        self.points.append(point_data)
 
     def _add_simple_point(self, pixel_x: int, pixel_y: int):
         bbox_size = 20
@@ -166,9 +117,9 @@ class PointTracker(dai.node.HostNode):
 
         point_data = {
             "bbox": bbox,
-            "tracker": None,
             "roi": None,
             "pixel_coords": (pixel_x, pixel_y),
+            "position": (float(pixel_x), float(pixel_y)),
         }
         self.points.append(point_data)
 
@@ -214,39 +165,44 @@ class PointTracker(dai.node.HostNode):
         return np.sum(edges) / (roi.shape[0] * roi.shape[1]) if roi.size > 0 else 0.0
 
     def update_tracking(self):
-        if not self.points or self.current_frame is None:
+        if self.current_frame is None:
             return
 
-        for i, point_data in enumerate(self.points):
-            tracker = point_data.get("tracker")
-            old_bbox = point_data["bbox"]
-
-            if tracker is None:
-                continue
+        # Global motion is estimated once per frame, also without points, so the
+        # corner set is ready when the first point is added
+        motion = self.motion_estimator.update(self.current_frame)
+        if not self.points:
+            return
 
-            if self.mode["tracking"] == 2 or (self.mode["tracking"] == 1 and i == 1):
-                try:
-                    success, new_bbox = tracker.update(self.current_frame)
-                except Exception as e:
-                    continue
+        tracked = [
+            i
+            for i in range(len(self.points))
+            if self.mode["tracking"] == 2 or (self.mode["tracking"] == 1 and i == 1)
+        ]
+        if not tracked:
+            return
 
-                if success and not self._is_bbox_out_of_frame(new_bbox):
-                    if (
-                        self._debounce(old_bbox, new_bbox)
-                        and self._calculate_global_motion() < self.motion_threshold
-                    ):
-                        new_bbox = old_bbox  # Keep old bbox
+        positions = np.array([self.points[i]["position"] for i in tracked])
+        new_positions, _ = self.motion_estimator.track_points(positions)
 
-                    point_data["bbox"] = new_bbox
+        for i, (x, y) in zip(tracked, new_positions):
+            point_data = self.points[i]
+            old_bbox = point_data["bbox"]
+            w, h = old_bbox[2], old_bbox[3]
+            new_bbox = (int(round(x)) - w // 2, int(round(y)) - h // 2, w, h)
 
-                    x, y, w, h = [int(v) for v in new_bbox]
-                    if (
-                        y + h <= self.current_frame.shape[0]
-                        and x + w <= self.current_frame.shape[1]
-                    ):
-                        point_data["roi"] = self.current_frame[y : y + h, x : x + w]
+            if self._is_bbox_out_of_frame(new_bbox):
+                continue
+            # The sub-pixel position always follows the flow, only the displayed
+            # bbox is debounced, as the internal state of a tracker would be
+            point_data["position"] = (float(x), float(y))
+            if self._debounce(old_bbox, new_bbox) and motion < self.motion_threshold:
+                continue  # Keep old bbox
 
-                        point_data["pixel_coords"] = (x + w // 2, y + h // 2)
+            point_data["bbox"] = new_bbox
+            x, y = new_bbox[0], new_bbox[1]
+            point_data["roi"] = self.current_frame[y : y + h, x : x + w]
+            point_data["pixel_coords"] = (x + w // 2, y + h // 2)
 
     def _debounce(self, old_bbox: Tuple, new_bbox: Tuple) -> bool:
         return all(
@@ -264,47 +220,6 @@ class PointTracker(dai.node.HostNode):
             or y + h > self.current_frame.shape[0]
         )
 
-    def _calculate_global_motion(self) -> float:
-        if self.prev_frame is None or self.current_frame is None:
-            return 0.0
-
-        # Convert to grayscale
-        prev_gray = (
-            cv2.cvtColor(self.prev_frame, cv2.COLOR_BGR2GRAY)
-            if len(self.prev_frame.shape) == 3
-            else self.prev_frame
-        )
-        curr_gray = (
-            cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2GRAY)
-            if len(self.current_frame.shape) == 3
-            else self.current_frame
-        )
-
-        # Subsample for performance
-        subsample_factor = 10
-        prev_sub = prev_gray[::subsample_factor, ::subsample_factor]
-        curr_sub = curr_gray[::subsample_factor, ::subsample_factor]
-
-        try:
-            flow = cv2.calcOpticalFlowFarneback(
-                prev_sub,
-                curr_sub,
-                None,
-                pyr_scale=0.5,
-                levels=1,
-                winsize=13,
-                iterations=2,
-                poly_n=5,
-                poly_sigma=1.1,
-                flags=0,
-            )
-
-            motion_magnitude = np.sqrt(flow[..., 0] ** 2 + flow[..., 1] ** 2)
-            return np.mean(motion_magnitude)
-            # print(mean_motion)
-        except Exception:
-            return 0.0
-
     def clear_points(self):
         self.points.clear()
         self.latest_distance = None
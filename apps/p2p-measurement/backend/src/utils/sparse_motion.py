@@ -0,0 +1,163 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class SparseMotionEstimator:
+    """Estimates global camera motion and propagates points with sparse optical flow.
+
+    A small set of corners is tracked with pyramidal Lucas-Kanade flow on a
+    downscaled frame and a partial affine transform (rotation, uniform scale,
+    translation) is fitted to them with RANSAC. The corners are refreshed every
+    `refresh_interval` frames or when too few of them survive. Measurement points
+    are tracked on the full resolution frame.
+    """
+
+    def __init__(
+        self,
+        motion_scale: float = 0.5,
+        max_corners: int = 100,
+        min_corners: int = 30,
+        refresh_interval: int = 15,
+        corner_quality: float = 0.01,
+        corner_distance: int = 8,
+        win_size: Tuple[int, int] = (15, 15),
+        point_win_size: Tuple[int, int] = (31, 31),
+        max_level: int = 2,
+        point_max_level: int = 3,
+        ransac_threshold: float = 1.0,
+        fb_threshold: float = 1.0,
+    ):
+        self.motion_scale = motion_scale
+        self.max_corners = max_corners
+        self.min_corners = min_corners
+        self.refresh_interval = refresh_interval
+        self.corner_quality = corner_quality
+        self.corner_distance = corner_distance
+        self.win_size = win_size
+        self.point_win_size = point_win_size
+        self.max_level = max_level
+        self.point_max_level = point_max_level
+        self.ransac_threshold = ransac_threshold
+        self.fb_threshold = fb_threshold
+        self.criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+
+        self.prev_gray: Optional[np.ndarray] = None
+        self.curr_gray: Optional[np.ndarray] = None
+        self.prev_small: Optional[np.ndarray] = None
+        self.curr_small: Optional[np.ndarray] = None
+        self.corners: Optional[np.ndarray] = None
+        self.frames_since_refresh = 0
+
+        # Global motion between the previous and the current frame, in full
+        # resolution pixels
+        self.affine: Optional[np.ndarray] = None
+        self.motion = 0.0
+
+    def update(self, frame: np.ndarray) -> float:
+        """Add a new frame and return the mean global motion in pixels."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(
+            gray,
+            None,
+            fx=self.motion_scale,
+            fy=self.motion_scale,
+            interpolation=cv2.INTER_AREA,
+        )
+        self.prev_gray, self.curr_gray = self.curr_gray, gray
+        self.prev_small, self.curr_small = self.curr_small, small
+
+        self.affine = None
+        self.motion = 0.0
+        if self.prev_small is not None and self.corners is not None:
+            if len(self.corners):
+                self._estimate_motion()
+
+        self.frames_since_refresh += 1
+        if (
+            self.corners is None
+            or len(self.corners) < self.min_corners
+            or self.frames_since_refresh >= self.refresh_interval
+        ):
+            self._refresh_corners(small)
+        return self.motion
+
+    def _estimate_motion(self):
+        corners, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_small,
+            self.curr_small,
+            self.corners,
+            None,
+            winSize=self.win_size,
+            maxLevel=self.max_level,
+            criteria=self.criteria,
+        )
+        tracked = status.ravel() == 1
+        prev_pts = self.corners[tracked].reshape(-1, 2)
+        curr_pts = corners[tracked].reshape(-1, 2)
+        if len(prev_pts) >= 3:
+            affine, inliers = cv2.estimateAffinePartial2D(
+                prev_pts,
+                curr_pts,
+                method=cv2.RANSAC,
+                ransacReprojThreshold=self.ransac_threshold,
+            )
+            if affine is not None:
+                # Same rotation and scale at full resolution, the shift scales up
+                affine[:, 2] /= self.motion_scale
+                self.affine = affine
+                prev_full = prev_pts / self.motion_scale
+                moved = prev_full @ affine[:, :2].T + affine[:, 2]
+                self.motion = float(np.linalg.norm(moved - prev_full, axis=1).mean())
+                curr_pts = curr_pts[inliers.ravel() == 1]
+        self.corners = curr_pts.reshape(-1, 1, 2)
+
+    def _refresh_corners(self, small: np.ndarray):
+        corners = cv2.goodFeaturesToTrack(
+            small,
+            maxCorners=self.max_corners,
+            qualityLevel=self.corner_quality,
+            minDistance=self.corner_distance,
+        )
+        self.corners = (
+            corners.astype(np.float32)
+            if corners is not None
+            else np.empty((0, 1, 2), np.float32)
+        )
+        self.frames_since_refresh = 0
+
+    def track_points(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Propagate (N, 2) points from the previous to the current frame.
+
+        All points are tracked in one batched LK call with a forward-backward
+        consistency check. Points that fail it follow the global motion, or stay
+        in place if there is none. Returns the new points and a mask of the points
+        LK tracked successfully.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if self.prev_gray is None or len(points) == 0:
+            return points.reshape(-1, 2), np.zeros(len(points), dtype=bool)
+
+        lk_params = dict(
+            winSize=self.point_win_size,
+            maxLevel=self.point_max_level,
+            criteria=self.criteria,
+        )
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, self.curr_gray, points, None, **lk_params
+        )
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            self.curr_gray, self.prev_gray, forward, None, **lk_params
+        )
+        fb_error = np.linalg.norm((backward - points).reshape(-1, 2), axis=1)
+        ok = (status.ravel() == 1) & (back_status.ravel() == 1)
+        ok &= fb_error < self.fb_threshold
+
+        new_points = forward.reshape(-1, 2)
+        if not ok.all():
+            fallback = points.reshape(-1, 2)
+            if self.affine is not None:
+                fallback = fallback @ self.affine[:, :2].T + self.affine[:, 2]
+            new_points = np.where(ok[:, None], new_points, fallback)
+        return new_points, ok
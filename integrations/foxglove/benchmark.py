@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+from utils.foxglove_protobuf import encode_pointcloud
+from utils.foxglove_utils import encode_pointcloud_json
+
+parser = argparse.ArgumentParser(
+    description="Compare JSON/base64 and protobuf serialization of point clouds.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-n",
+    "--points",
+    default=[100_000, 300_000, 1_000_000],
+    nargs="+",
+    type=int,
+    help="Point cloud sizes to benchmark.",
+)
+parser.add_argument(
+    "-i", "--iterations", default=20, type=int, help="Serializations per size."
+)
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+now = time.time_ns()
+sec, nsec = divmod(now, 1_000_000_000)
+
+
+def measure(encode, points):
+    encode(points)  # warm-up
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        payload = encode(points)
+    return (time.perf_counter() - start) / args.iterations * 1000, len(payload)
+
+
+print(
+    f"{'points':>9} {'json ms':>9} {'json MB':>9} {'proto ms':>9} {'proto MB':>9} "
+    f"{'speedup':>8}"
+)
+for n in args.points:
+    # Open3D returns float64 points, as process_pointcloud does
+    points = rng.uniform(-5, 5, (n, 3))
+    json_ms, json_size = measure(lambda p: encode_pointcloud_json(p, sec, nsec), points)
+    proto_ms, proto_size = measure(lambda p: encode_pointcloud(p, now), points)
+    print(
+        f"{n:>9} {json_ms:>9.2f} {json_size / 1e6:>9.2f} {proto_ms:>9.2f} "
+        f"{proto_size / 1e6:>9.2f} {json_ms / proto_ms:>7.1f}x"
+    )
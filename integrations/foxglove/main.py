@@ -1,14 +1,20 @@
 import argparse as argparse
 import asyncio
-import math
 import time
 
 import depthai as dai
 from foxglove_websocket import run_cancellable
 from foxglove_websocket.server import FoxgloveServer
 from utils.arguments import initialize_argparser
+from utils.foxglove_protobuf import (
+    create_protobuf_channels,
+    encode_compressed_image,
+    encode_pointcloud,
+    encode_raw_image,
+)
 from utils.foxglove_utils import (
     Listener,
+    RateLimiter,
     create_channels,
     process_pointcloud,
     send_frame,
@@ -93,39 +99,76 @@ async def main():
         async with FoxgloveServer("0.0.0.0", 8765, "DepthAI server") as server:
             server.set_listener(Listener())
 
-            (
-                color_channel,
-                pointcloud_channel,
-                left_channel,
-                right_channel,
-            ) = await create_channels(
-                server, not args.no_color, args.pointcloud, args.left, args.right
+            if args.encoding == "protobuf":
+                channels = await create_protobuf_channels(
+                    server,
+                    not args.no_color,
+                    args.pointcloud,
+                    args.left,
+                    args.right,
+                    args.raw_images,
+                )
+            else:
+                channels = await create_channels(
+                    server, not args.no_color, args.pointcloud, args.left, args.right
+                )
+            color_channel, pointcloud_channel, left_channel, right_channel = channels
+
+            rate_limiter = RateLimiter(
+                {
+                    color_channel: args.image_rate,
+                    left_channel: args.image_rate,
+                    right_channel: args.image_rate,
+                    pointcloud_channel: args.pointcloud_rate,
+                }
             )
 
-            while pipeline.isRunning():
-                tmpTime = time.time_ns()
-                sec = math.trunc(tmpTime / 1e9)
-                nsec = tmpTime - sec
+            async def publish_frame(queue, channel, now):
+                msg = queue.get()
+                # Skipped frames are never converted or encoded
+                if not rate_limiter.allow(channel, now):
+                    return
+                frame = msg.getCvFrame()
+                if args.encoding == "json":
+                    sec, nsec = divmod(now, 1_000_000_000)
+                    await send_frame(server, frame, sec, nsec, channel)
+                elif args.raw_images:
+                    await server.send_message(
+                        channel, now, encode_raw_image(frame, now)
+                    )
+                else:
+                    await server.send_message(
+                        channel, now, encode_compressed_image(frame, now)
+                    )
 
+            while pipeline.isRunning():
                 await asyncio.sleep(0.01)
+                now = time.time_ns()
 
                 if color_q is not None and color_q.has():
-                    frame = color_q.get().getCvFrame()
-                    await send_frame(server, frame, sec, nsec, color_channel)
+                    await publish_frame(color_q, color_channel, now)
                 if left_q is not None and left_q.has():
-                    frame = left_q.get().getCvFrame()
-                    await send_frame(server, frame, sec, nsec, left_channel)
+                    await publish_frame(left_q, left_channel, now)
                 if right_q is not None and right_q.has():
-                    frame = right_q.get().getCvFrame()
-                    await send_frame(server, frame, sec, nsec, right_channel)
+                    await publish_frame(right_q, right_channel, now)
                 if pcl_q is not None and pcl_q.has():
                     pcl_data = pcl_q.get()
+                    if not rate_limiter.allow(pointcloud_channel, now):
+                        continue
                     pcl_processed = process_pointcloud(
                         pcl_data.getPoints(), downsample_pcl
                     )
-                    await send_pointcloud(
-                        server, pcl_processed, sec, nsec, pointcloud_channel
-                    )
+                    if args.encoding == "json":
+                        sec, nsec = divmod(now, 1_000_000_000)
+                        await send_pointcloud(
+                            server, pcl_processed, sec, nsec, pointcloud_channel
+                        )
+                    else:
+                        await server.send_message(
+                            pointcloud_channel,
+                            now,
+                            encode_pointcloud(pcl_processed, now),
+                        )
 
 
 if __name__ == "__main__":
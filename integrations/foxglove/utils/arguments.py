@@ -54,6 +54,39 @@ def initialize_argparser():
         help="Disable color camera stream.",
     )
 
+    parser.add_argument(
+        "-e",
+        "--encoding",
+        default="protobuf",
+        choices=["protobuf", "json"],
+        help="Message encoding. 'json' sends base64 payloads, 'protobuf' sends binary messages.",
+    )
+    parser.add_argument(
+        "-raw",
+        "--raw-images",
+        default=False,
+        action="store_true",
+        help="Send uncompressed images (foxglove.RawImage) instead of JPEG. Requires protobuf encoding.",
+    )
+    parser.add_argument(
+        "-ir",
+        "--image-rate",
+        help="Maximum rate in Hz of every image channel, 0 for no limit.",
+        required=False,
+        default=0,
+        type=float,
+    )
+    parser.add_argument(
+        "-pr",
+        "--pointcloud-rate",
+        help="Maximum rate in Hz of the point cloud channel, 0 for no limit.",
+        required=False,
+        default=10,
+        type=float,
+    )
+
     args = parser.parse_args()
+    if args.raw_images and args.encoding != "protobuf":
+        parser.error("--raw-images requires --encoding protobuf")
 
     return parser, args
@@ -0,0 +1,112 @@
+from base64 import b64encode
+
+import cv2
+import numpy as np
+from foxglove_schemas_protobuf.CompressedImage_pb2 import CompressedImage
+from foxglove_schemas_protobuf.PackedElementField_pb2 import PackedElementField
+from foxglove_schemas_protobuf.PointCloud_pb2 import PointCloud
+from foxglove_schemas_protobuf.RawImage_pb2 import RawImage
+from foxglove_websocket.server import FoxgloveServer
+from foxglove_websocket.types import ChannelId
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+# x, y, z as little-endian float32, the layout of the packed point cloud data
+POINT_FIELDS = [
+    PackedElementField(name=name, offset=4 * i, type=PackedElementField.FLOAT32)
+    for i, name in enumerate("xyz")
+]
+POINT_STRIDE = 12
+
+
+def build_file_descriptor_set(message_class) -> FileDescriptorSet:
+    """Build the FileDescriptorSet of a protobuf message, including its imports."""
+    file_descriptor_set = FileDescriptorSet()
+    seen = set()
+
+    def append(file_descriptor):
+        for dependency in file_descriptor.dependencies:
+            if dependency.name not in seen:
+                seen.add(dependency.name)
+                append(dependency)
+        file_descriptor.CopyToProto(file_descriptor_set.file.add())
+
+    append(message_class.DESCRIPTOR.file)
+    return file_descriptor_set
+
+
+async def add_protobuf_channel(
+    server: FoxgloveServer, topic: str, message_class
+) -> ChannelId:
+    # The schema is base64 encoded only once here, messages are sent as raw bytes
+    schema = build_file_descriptor_set(message_class).SerializeToString()
+    return await server.add_channel(
+        {
+            "topic": topic,
+            "encoding": "protobuf",
+            "schemaName": message_class.DESCRIPTOR.full_name,
+            "schema": b64encode(schema).decode("ascii"),
+            "schemaEncoding": "protobuf",
+        }
+    )
+
+
+def encode_compressed_image(
+    frame: np.ndarray, timestamp_ns: int, frame_id: str = "front", quality: int = 90
+) -> bytes:
+    _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    msg = CompressedImage(frame_id=frame_id, format="jpeg", data=jpeg.tobytes())
+    msg.timestamp.FromNanoseconds(timestamp_ns)
+    return msg.SerializeToString()
+
+
+def encode_raw_image(
+    frame: np.ndarray, timestamp_ns: int, frame_id: str = "front"
+) -> bytes:
+    frame = np.ascontiguousarray(frame)
+    height, width = frame.shape[:2]
+    msg = RawImage(
+        frame_id=frame_id,
+        width=width,
+        height=height,
+        encoding="bgr8" if frame.ndim == 3 else "mono8",
+        step=frame.strides[0],
+        data=frame.tobytes(),
+    )
+    msg.timestamp.FromNanoseconds(timestamp_ns)
+    return msg.SerializeToString()
+
+
+def encode_pointcloud(
+    points: np.ndarray, timestamp_ns: int, frame_id: str = "front"
+) -> bytes:
+    """Pack an (N, 3+) array of points into a foxglove.PointCloud message.
+
+    The point data is a single buffer copy of the NumPy array, there is no
+    per-point Python work.
+    """
+    data = np.ascontiguousarray(np.asarray(points)[:, :3], dtype="<f4")
+    msg = PointCloud(
+        frame_id=frame_id,
+        point_stride=POINT_STRIDE,
+        fields=POINT_FIELDS,
+        data=data.tobytes(),
+    )
+    msg.timestamp.FromNanoseconds(timestamp_ns)
+    msg.pose.orientation.w = 1.0
+    return msg.SerializeToString()
+
+
+async def create_protobuf_channels(server, color, pointcloud, left, right, raw):
+    image_class = RawImage if raw else CompressedImage
+    return (
+        await add_protobuf_channel(server, "colorImage", image_class)
+        if color
+        else None,
+        await add_protobuf_channel(server, "pointCloud", PointCloud)
+        if pointcloud
+        else None,
+        await add_protobuf_channel(server, "leftImage", image_class) if left else None,
+        await add_protobuf_channel(server, "rightImage", image_class)
+        if right
+        else None,
+    )
@@ -1,6 +1,7 @@
 import base64
 import json
 import time
+from typing import Dict
 
 import cv2
 import numpy as np
@@ -171,7 +172,26 @@ async def create_channels(server, color, pointcloud, left, right):
     return color_channel, pointcloud_channel, left_channel, right_channel
 
 
-async def send_frame(server, frame, sec, nsec, channel):
+class RateLimiter:
+    """Per-channel rate limit, messages above `max_rate` Hz are skipped."""
+
+    def __init__(self, max_rate: Dict[ChannelId, float]):
+        self._period_ns = {
+            channel: int(1e9 / rate) for channel, rate in max_rate.items() if rate
+        }
+        self._last_sent: Dict[ChannelId, int] = {}
+
+    def allow(self, channel: ChannelId, now_ns: int) -> bool:
+        period = self._period_ns.get(channel)
+        if period is None:
+            return True
+        if now_ns - self._last_sent.get(channel, -period) < period:
+            return False
+        self._last_sent[channel] = now_ns
+        return True
+
+
+def encode_frame_json(frame, sec, nsec) -> bytes:
     is_success, im_buf_arr = cv2.imencode(".jpg", frame)
 
     # Read from .jpeg format to buffer of bytes
@@ -181,49 +201,53 @@ async def send_frame(server, frame, sec, nsec, channel):
     data = base64.b64encode(byte_im).decode("ascii")
 
     # Data is sent with json (data must be in above schema order)
+    return json.dumps(
+        {
+            "header": {"stamp": {"sec": sec, "nsec": nsec}, "frame_id": "front"},
+            "format": "jpeg",
+            "data": data,
+        }
+    ).encode("utf8")
+
+
+async def send_frame(server, frame, sec, nsec, channel):
     await server.send_message(
-        channel,
-        time.time_ns(),
-        json.dumps(
-            {
-                "header": {"stamp": {"sec": sec, "nsec": nsec}, "frame_id": "front"},
-                "format": "jpeg",
-                "data": data,
-            }
-        ).encode("utf8"),
+        channel, time.time_ns(), encode_frame_json(frame, sec, nsec)
     )
 
 
-async def send_pointcloud(server, pcl_data, sec, nsec, channel):
+def encode_pointcloud_json(pcl_data, sec, nsec) -> bytes:
     buf = np.asarray(pcl_data)[:, :3].astype(np.float32).tobytes()
 
     # Data needs to be encoded in base64
     data = base64.b64encode(buf).decode("ascii")
 
     # Data is sent with json (data must be in above schema order)
+    return json.dumps(
+        {
+            "header": {
+                "stamp": {"sec": sec, "nsec": nsec},
+                "frame_id": "front",
+            },
+            "height": 1,
+            "width": len(pcl_data),
+            "fields": [
+                {"name": "x", "offset": 0, "datatype": 7, "count": 1},
+                {"name": "y", "offset": 4, "datatype": 7, "count": 1},
+                {"name": "z", "offset": 8, "datatype": 7, "count": 1},
+            ],
+            "is_bigendian": False,
+            "point_step": 12,
+            "row_step": 12 * len(pcl_data),
+            "data": data,
+            "is_dense": True,
+        }
+    ).encode("utf8")
+
+
+async def send_pointcloud(server, pcl_data, sec, nsec, channel):
     await server.send_message(
-        channel,
-        time.time_ns(),
-        json.dumps(
-            {
-                "header": {
-                    "stamp": {"sec": sec, "nsec": nsec},
-                    "frame_id": "front",
-                },
-                "height": 1,
-                "width": len(pcl_data),
-                "fields": [
-                    {"name": "x", "offset": 0, "datatype": 7, "count": 1},
-                    {"name": "y", "offset": 4, "datatype": 7, "count": 1},
-                    {"name": "z", "offset": 8, "datatype": 7, "count": 1},
-                ],
-                "is_bigendian": False,
-                "point_step": 12,
-                "row_step": 12 * len(pcl_data),
-                "data": data,
-                "is_dense": True,
-            }
-        ).encode("utf8"),
+        channel, time.time_ns(), encode_pointcloud_json(pcl_data, sec, nsec)
     )
 
 
@@ -7,9 +7,10 @@ from depthai_nodes.node import (
     ParsingNeuralNetwork,
     ImgDetectionsFilter,
 )
-from depthai_nodes.node import SnapsUploader
 
 from utils.snaps_producer import SnapsProducer
+from utils.snap_spool import FakeSnapUploader, HubSnapUploader, SnapSpool
+from utils.spooled_snaps_uploader import SpooledSnapsUploader
 from utils.arguments import initialize_argparser
 
 load_dotenv(override=True)
@@ -80,7 +81,15 @@ with dai.Pipeline(device) as pipeline:
         detections=det_process_filter.out,
         time_interval=args.time_interval,
     )
-    snaps_uploader = pipeline.create(SnapsUploader).build(snaps_producer.out)
+    uploader = (
+        FakeSnapUploader(delay=1.0, failure_rate=0.3)
+        if args.offline
+        else HubSnapUploader()
+    )
+    spool = SnapSpool(args.spool_dir, uploader)
+    snaps_uploader = pipeline.create(SpooledSnapsUploader).build(
+        snaps_producer.out, spool
+    )
 
     visualizer.addTopic("Video", nn_with_parser.passthrough, "images")
     visualizer.addTopic("Visualizations", det_process_filter.out, "images")
@@ -95,3 +104,6 @@ with dai.Pipeline(device) as pipeline:
         if key == ord("q"):
             print("Got q key from the remote connection!")
             break
+
+    spool.close()
+    print(f"Snap spool: {spool.stats()}")
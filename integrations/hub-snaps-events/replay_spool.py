@@ -0,0 +1,85 @@
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from utils.snap_spool import (
+    MAX_BACKOFF_EXPONENT,
+    FakeSnapUploader,
+    SnapSpool,
+    SpooledSnap,
+)
+
+parser = argparse.ArgumentParser(
+    description="Offline runs of the snap spool against the fake uploader: a flaky "
+    "connection, and an outage with more consecutive failures than the backoff cap "
+    "after which the spool must still drain.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-n", "--snaps", default=200, type=int)
+parser.add_argument(
+    "--outage_failures",
+    default=1500,
+    type=int,
+    help="Failed uploads in a row, past the ~1024 at which an uncapped exponent "
+    "overflowed.",
+)
+args = parser.parse_args()
+
+# Every failed upload logs a warning
+logging.getLogger().setLevel(logging.ERROR)
+
+
+def make_snap(i):
+    rng = np.random.default_rng(i)
+    return SpooledSnap(
+        name=f"snap-{i}",
+        file_name=None,
+        tags=["replay"],
+        extras={"index": str(i)},
+        jpeg=rng.bytes(2048),
+    )
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def run(name, uploader, snaps, **spool_args):
+    with tempfile.TemporaryDirectory() as directory:
+        spool = SnapSpool(directory, uploader, **spool_args)
+        for i in range(snaps):
+            # Wait for the writer instead of dropping snaps, they are all checked
+            wait_until(lambda: not spool._handoff.full(), 10)
+            spool.put(make_snap(i))
+        yield spool
+        spool.close()
+        print(f"{name}: {spool.stats()}")
+
+
+# Flaky connection, every snap ends up uploaded exactly once
+uploader = FakeSnapUploader(failure_rate=0.3, seed=0)
+for spool in run("flaky", uploader, args.snaps, base_backoff=0.001, max_backoff=0.01):
+    assert wait_until(lambda: spool.stats()["uploaded"] == args.snaps, 60)
+    assert len(uploader.uploaded) == args.snaps
+    assert len({snap.name for snap in uploader.uploaded}) == args.snaps
+    assert spool.stats()["dropped"] == 0
+
+# Outage: every upload fails until the failures are well past the backoff cap
+uploader = FakeSnapUploader(failure_rate=1.0, seed=0)
+for spool in run("outage", uploader, 10, base_backoff=1e-6, max_backoff=1e-5):
+    assert wait_until(
+        lambda: spool.stats()["failures"] >= args.outage_failures, 120
+    ), spool.stats()
+    assert all(thread.is_alive() for thread in spool._threads), "Uploader died"
+    assert spool.stats()["failures"] > MAX_BACKOFF_EXPONENT
+    uploader.failure_rate = 0.0
+    assert wait_until(lambda: len(spool) == 0, 10), spool.stats()
+    assert len(uploader.uploaded) == 10
@@ -69,6 +69,22 @@ def initialize_argparser():
         default=60.0,
         type=float,
     )
+    parser.add_argument(
+        "-sd",
+        "--spool_dir",
+        help="Directory where snaps are queued until they are uploaded.",
+        required=False,
+        default="snap_spool",
+        type=str,
+    )
+
+    parser.add_argument(
+        "-off",
+        "--offline",
+        help="Use a fake uploader that is slow and fails randomly instead of uploading to Hub.",
+        required=False,
+        action="store_true",
+    )
     args = parser.parse_args()
 
     return parser, args
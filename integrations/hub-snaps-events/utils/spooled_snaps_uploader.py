@@ -0,0 +1,52 @@
+import depthai as dai
+import logging as log
+
+from utils.snap_spool import SnapSpool, SpooledSnap
+from depthai_nodes.message import SnapData
+
+
+class SpooledSnapsUploader(dai.node.HostNode):
+    """
+    Drop-in replacement for depthai_nodes' SnapsUploader that never blocks the
+    pipeline on network or disk I/O.
+
+    Each SnapData is JPEG-encoded once and handed to a SnapSpool, whose background
+    workers persist it and upload it with retries.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._spool: SnapSpool = None
+        self._jpeg_quality: int = 90
+
+    def build(
+        self,
+        snaps: dai.Node.Output,
+        spool: SnapSpool,
+        jpeg_quality: int = 90,
+    ) -> "SpooledSnapsUploader":
+        self._spool = spool
+        self._jpeg_quality = jpeg_quality
+        self.link_args(snaps)
+        return self
+
+    def process(self, snap: dai.Buffer) -> None:
+        assert isinstance(snap, SnapData)
+        try:
+            spooled = SpooledSnap.from_messages(
+                name=snap.snap_name,
+                file_name=snap.file_name,
+                frame=snap.frame,
+                detections=snap.detections,
+                tags=snap.tags,
+                extras=snap.extras,
+                jpeg_quality=self._jpeg_quality,
+            )
+        except ValueError as e:
+            log.error(f"Skipping snap '{snap.snap_name}': {e}")
+            return
+        self._spool.put(spooled)
+
+    @property
+    def spool(self) -> SnapSpool:
+        return self._spool
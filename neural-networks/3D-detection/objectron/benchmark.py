@@ -0,0 +1,146 @@
+import argparse
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from utils.keypoint_transform import (
+    detection_rects,
+    frame_keypoints,
+    uncrop_keypoints,
+    uncrop_message,
+)
+
+parser = argparse.ArgumentParser(
+    description="Check the batched keypoint un-cropping against the former per "
+    "point math, and time both from the messages to the points and lines that are "
+    "drawn.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-o", "--objects", default=[1, 10, 30, 60], type=int, nargs="+")
+parser.add_argument("-k", "--keypoints", default=[9, 21, 33], type=int, nargs="+")
+parser.add_argument("--padding", default=0.2, type=float)
+parser.add_argument("-r", "--repeats", default=50, type=int)
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+
+
+def make_messages(objects, keypoints):
+    """Detections and Keypoints messages as the annotation node gets them."""
+    detections = []
+    for xmin, ymin, width, height in zip(
+        *rng.uniform([0, 0, 0.05, 0.05], [0.8, 0.8, 0.3, 0.3], (objects, 4)).T
+    ):
+        detections.append(
+            SimpleNamespace(xmin=xmin, ymin=ymin, xmax=xmin + width, ymax=ymin + height)
+        )
+    messages = [
+        SimpleNamespace(
+            keypoints=[
+                SimpleNamespace(x=x, y=y) for x, y in rng.uniform(0, 1, (keypoints, 2))
+            ]
+        )
+        for _ in range(objects)
+    ]
+    # Chain with one pair out of range, as the former code skipped those
+    pairs = [[i, i + 1] for i in range(keypoints)]
+    return detections, messages, pairs
+
+
+def former(detections, messages, pairs, padding):
+    """The points and lines of the former AnnotationNode.process."""
+    points, lines = [], []
+    for ix, detection in enumerate(detections):
+        keypoints_msg = messages[ix]
+        slope_x = (detection.xmax + padding) - (detection.xmin - padding)
+        slope_y = (detection.ymax + padding) - (detection.ymin - padding)
+        xs = []
+        ys = []
+        for kp in keypoints_msg.keypoints:
+            x = min(max(detection.xmin - padding + slope_x * kp.x, 0.0), 1.0)
+            y = min(max(detection.ymin - padding + slope_y * kp.y, 0.0), 1.0)
+            xs.append(x)
+            ys.append(y)
+        points.append([(x, y) for x, y in zip(xs, ys)])
+        for pt1_idx, pt2_idx in pairs:
+            if pt1_idx < len(xs) and pt2_idx < len(ys):
+                lines.append(((xs[pt1_idx], ys[pt1_idx]), (xs[pt2_idx], ys[pt2_idx])))
+    return points, lines
+
+
+def batched(detections, messages, pairs, padding):
+    rects = detection_rects(detections, padding)
+    points, segments = frame_keypoints(messages, rects, pairs)
+    return points, [line for lines in segments for line in lines]
+
+
+def check(inputs, batched_inputs):
+    """Largest difference of the points and lines to the former ones."""
+    expected_points, expected_lines = former(*inputs)
+    points, lines = batched(*batched_inputs)
+    assert len(points) == len(expected_points) and len(lines) == len(expected_lines)
+    point_error = max(
+        (
+            np.abs(np.array(a) - np.array(b)).max(initial=0.0)
+            for a, b in zip(points, expected_points)
+        ),
+        default=0.0,
+    )
+    line_error = np.abs(np.array(lines) - np.array(expected_lines)).max(initial=0.0)
+    assert point_error < 1e-6 and line_error < 1e-6, (point_error, line_error)
+    return max(point_error, line_error)
+
+
+def timed(function, *inputs):
+    """Median time of one call in microseconds."""
+    times = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        function(*inputs)
+        times.append(time.perf_counter() - start)
+    return 1e6 * float(np.median(times))
+
+
+# Rotated crops: the crop corners must land on the corners of the rectangle
+rects = np.array([[0.5, 0.4, 0.3, 0.2, 30.0], [0.3, 0.6, 0.2, 0.4, -75.0]])
+corners = np.array([[[0, 1], [0, 0], [1, 0], [1, 1]]] * 2, np.float32)
+corner_msg = SimpleNamespace(
+    keypoints=[SimpleNamespace(x=x, y=y) for x, y in corners[0].tolist()]
+)
+for aspect_ratio in (1.0, 16 / 9):
+    mapped = uncrop_keypoints(corners, rects, aspect_ratio, clip=False)
+    for rect, points in zip(rects, mapped):
+        # The same rectangle in pixels of a frame with a height of 1
+        scale = np.array([aspect_ratio, 1.0])
+        expected = cv2.boxPoints(
+            (tuple(rect[:2] * scale), tuple(rect[2:4] * scale), float(rect[4]))
+        )
+        assert np.abs(points * scale - expected).max() < 1e-5, (points, expected)
+        # The single object path must agree
+        single = np.array(uncrop_message(corner_msg, rect, aspect_ratio, clip=False))
+        assert np.abs(single * scale - expected).max() < 1e-5, (single, expected)
+print("Rotated crops map to the corners of their rectangles")
+
+for objects in args.objects:
+    for keypoints in args.keypoints:
+        detections, messages, pairs = make_messages(objects, keypoints)
+        inputs = (detections, messages, pairs, args.padding)
+        # AnnotationNode converts the connection pairs to an array once in build()
+        batched_inputs = (detections, messages, np.asarray(pairs), args.padding)
+        error = check(inputs, batched_inputs)
+        print(
+            f"{objects} objects x {keypoints} keypoints: former "
+            f"{timed(former, *inputs):.0f} us, batched {timed(batched, *batched_inputs):.0f} "
+            f"us, largest difference {error:.1e}"
+        )
+
+# Objects with different numbers of keypoints are mapped one at a time
+detections, messages, pairs = make_messages(3, 9)
+messages[1].keypoints = messages[1].keypoints[:5]
+error = check(
+    (detections, messages, pairs, args.padding),
+    (detections, messages, np.asarray(pairs), args.padding),
+)
+print(f"Objects with different numbers of keypoints: largest difference {error:.1e}")
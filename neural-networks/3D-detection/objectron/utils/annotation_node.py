@@ -1,7 +1,7 @@
 import depthai as dai
+import numpy as np
 from depthai_nodes import (
     ImgDetectionsExtended,
-    Keypoints,
     GatheredData,
     PRIMARY_COLOR,
     SECONDARY_COLOR,
@@ -9,6 +9,8 @@ from depthai_nodes import (
 from depthai_nodes.utils.annotation_helper import AnnotationHelper
 from typing import List
 
+from utils.keypoint_transform import detection_rects, frame_keypoints
+
 
 class AnnotationNode(dai.node.HostNode):
     def __init__(
@@ -28,7 +30,8 @@ class AnnotationNode(dai.node.HostNode):
         connection_pairs: List[List[int]],
         padding: float,
     ) -> "AnnotationNode":
-        self.connection_pairs = connection_pairs
+        # Converted once, connection_segments then uses the array as it is
+        self.connection_pairs = np.asarray(connection_pairs, dtype=np.intp)
         self.padding = padding
         self.link_args(gathered_data)
         return self
@@ -41,37 +44,28 @@ class AnnotationNode(dai.node.HostNode):
 
         annotation_helper = AnnotationHelper()
 
-        padding = self.padding
-
-        for ix, detection in enumerate(detections_list):
-            keypoints_msg: Keypoints = gathered_data.gathered[ix]
-
-            slope_x = (detection.xmax + padding) - (detection.xmin - padding)
-            slope_y = (detection.ymax + padding) - (detection.ymin - padding)
-            xs = []
-            ys = []
-            for kp in keypoints_msg.keypoints:
-                x = min(max(detection.xmin - padding + slope_x * kp.x, 0.0), 1.0)
-                y = min(max(detection.ymin - padding + slope_y * kp.y, 0.0), 1.0)
-                xs.append(x)
-                ys.append(y)
+        rects = detection_rects(detections_list, self.padding)
+        points, segments = frame_keypoints(
+            gathered_data.gathered[: len(detections_list)],
+            rects,
+            self.connection_pairs,
+        )
 
+        for detection, detection_points, detection_segments in zip(
+            detections_list, points, segments
+        ):
             annotation_helper.draw_points(
-                points=[(x, y) for x, y in zip(xs, ys)],
+                points=detection_points,
                 color=SECONDARY_COLOR,
                 thickness=2.0,
             )
 
-            for connection in self.connection_pairs:
-                pt1_idx, pt2_idx = connection
-                if pt1_idx < len(xs) and pt2_idx < len(ys):
-                    x1, y1 = xs[pt1_idx], ys[pt1_idx]
-                    x2, y2 = xs[pt2_idx], ys[pt2_idx]
-                    annotation_helper.draw_line(
-                        pt1=(x1, y1),
-                        pt2=(x2, y2),
-                        color=PRIMARY_COLOR,
-                    )
+            for pt1, pt2 in detection_segments:
+                annotation_helper.draw_line(
+                    pt1=pt1,
+                    pt2=pt2,
+                    color=PRIMARY_COLOR,
+                )
 
             annotation_helper.draw_text(
                 text=f"{(detection.confidence * 100):.2f}%",
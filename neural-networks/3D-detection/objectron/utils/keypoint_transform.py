@@ -0,0 +1,168 @@
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+Point = Tuple[float, float]
+# Up to this many objects, mapping them one at a time in plain Python is faster
+# than the fixed cost of the NumPy calls
+SMALL_BATCH = 3
+
+
+def detection_rects(detections: Sequence, padding: float = 0.0) -> np.ndarray:
+    """(N, 5) center x, center y, width, height and angle in degrees of the crops
+    taken around the detections, grown by `padding` on every side, all in
+    normalized coordinates.
+
+    Detections with a `rotated_rect` (`ImgDetectionExtended`) use it, others
+    (`dai.ImgDetection`) their axis aligned xmin, ymin, xmax, ymax.
+    """
+    rects = np.empty((len(detections), 5), np.float32)
+    for i, detection in enumerate(detections):
+        rect = getattr(detection, "rotated_rect", None)
+        if rect is not None:
+            rects[i] = (
+                rect.center.x,
+                rect.center.y,
+                rect.size.width,
+                rect.size.height,
+                rect.angle,
+            )
+        else:
+            rects[i] = (
+                (detection.xmin + detection.xmax) / 2,
+                (detection.ymin + detection.ymax) / 2,
+                detection.xmax - detection.xmin,
+                detection.ymax - detection.ymin,
+                0.0,
+            )
+    rects[:, 2:4] += 2 * padding
+    return rects
+
+
+def keypoints_array(keypoints_msgs: Sequence) -> np.ndarray:
+    """(N, K, 2) x, y of the keypoints of N `Keypoints` messages, each with K."""
+    count = len(keypoints_msgs[0].keypoints) if len(keypoints_msgs) else 0
+    values = np.fromiter(
+        (
+            value
+            for message in keypoints_msgs
+            for keypoint in message.keypoints
+            for value in (keypoint.x, keypoint.y)
+        ),
+        np.float32,
+    )
+    if values.size != 2 * count * len(keypoints_msgs):
+        raise ValueError("All messages must have the same number of keypoints.")
+    return values.reshape(len(keypoints_msgs), count, 2)
+
+
+def uncrop_keypoints(
+    keypoints: np.ndarray,
+    rects: np.ndarray,
+    aspect_ratio: float = 1.0,
+    clip: bool = True,
+) -> np.ndarray:
+    """Map (N, K, 2) keypoints, normalized to the crops of N `rects` (see
+    `detection_rects`), to normalized frame coordinates.
+
+    The crops are rotated by their angle around their center, clockwise for a
+    positive angle as in `dai.RotatedRect`. The rotation is done in pixels, so
+    `aspect_ratio`, the frame width over its height, is needed for rotated
+    crops of frames that are not square. With `clip` the points are clipped to
+    the frame.
+    """
+    keypoints = np.asarray(keypoints, np.float32)
+    rects = np.asarray(rects, np.float32)
+    center = rects[:, None, 0:2]
+    offsets = (keypoints - 0.5) * rects[:, None, 2:4]
+    angles = rects[:, 4]
+    if angles.any():
+        radians = np.deg2rad(angles)[:, None]
+        cos, sin = np.cos(radians), np.sin(radians)
+        dx = offsets[..., 0] * aspect_ratio
+        dy = offsets[..., 1]
+        offsets = np.stack(
+            [(cos * dx - sin * dy) / aspect_ratio, sin * dx + cos * dy], axis=-1
+        )
+    points = center + offsets
+    if clip:
+        # Cheaper than np.clip, whose overhead dominates for a few objects
+        np.minimum(np.maximum(points, 0.0, out=points), 1.0, out=points)
+    return points
+
+
+def connection_segments(
+    points: np.ndarray, connection_pairs: Sequence[Tuple[int, int]]
+) -> np.ndarray:
+    """(N, E, 2, 2) start and end points of the connections of (N, K, 2) points.
+
+    Connections to keypoints beyond K are left out.
+    """
+    pairs = np.asarray(connection_pairs, dtype=np.intp).reshape(-1, 2)
+    pairs = pairs[(pairs < points.shape[1]).all(axis=1)]
+    return points[:, pairs]
+
+
+def uncrop_message(
+    keypoints_msg, rect: Sequence[float], aspect_ratio: float = 1.0, clip: bool = True
+) -> List[Point]:
+    """Map the keypoints of one `Keypoints` message, normalized to the crop of
+    `rect`, to normalized frame coordinates, as `uncrop_keypoints` does.
+
+    Plain Python, which is faster than NumPy for a single object.
+    """
+    center_x, center_y, width, height, angle = rect
+    if angle:
+        radians = math.radians(angle)
+        cos, sin = math.cos(radians), math.sin(radians)
+    points = []
+    for keypoint in keypoints_msg.keypoints:
+        dx = (keypoint.x - 0.5) * width
+        dy = (keypoint.y - 0.5) * height
+        if angle:
+            dx *= aspect_ratio
+            dx, dy = (cos * dx - sin * dy) / aspect_ratio, sin * dx + cos * dy
+        x, y = center_x + dx, center_y + dy
+        if clip:
+            # Cheaper than min() and max() calls
+            x = 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
+            y = 0.0 if y < 0.0 else 1.0 if y > 1.0 else y
+        points.append((x, y))
+    return points
+
+
+def frame_keypoints(
+    keypoints_msgs: Sequence,
+    rects: np.ndarray,
+    connection_pairs: Sequence[Tuple[int, int]],
+    aspect_ratio: float = 1.0,
+) -> Tuple[List[List[Point]], List[List[Tuple[Point, Point]]]]:
+    """Points and connection segments in normalized frame coordinates of the
+    keypoints of N `Keypoints` messages and the N `rects` of their crops, as lists
+    ready to be drawn.
+
+    More than `SMALL_BATCH` messages with the same number of keypoints are mapped
+    all at once with NumPy. Fewer messages, or messages with different numbers of
+    keypoints, are mapped one at a time in plain Python.
+    """
+    counts = {len(message.keypoints) for message in keypoints_msgs}
+    if len(keypoints_msgs) > SMALL_BATCH and len(counts) == 1:
+        points = uncrop_keypoints(keypoints_array(keypoints_msgs), rects, aspect_ratio)
+        segments = connection_segments(points, connection_pairs)
+        return points.tolist(), segments.tolist()
+
+    pairs = np.asarray(connection_pairs, dtype=np.intp).reshape(-1, 2).tolist()
+    points, segments = [], []
+    for message, rect in zip(keypoints_msgs, rects.tolist()):
+        message_points = uncrop_message(message, rect, aspect_ratio)
+        count = len(message_points)
+        points.append(message_points)
+        segments.append(
+            [
+                (message_points[start], message_points[end])
+                for start, end in pairs
+                if start < count and end < count
+            ]
+        )
+    return points, segments
@@ -65,7 +65,12 @@ with dai.Pipeline(device) as pipeline:
 
     # annotation
     annotation_node = pipeline.create(AnnotationNode).build(
-        objectTracker.out, axis=args.axis, roi_position=args.roi_position
+        objectTracker.out,
+        axis=args.axis,
+        roi_position=args.roi_position,
+        zones_path=args.zones,
+        lost_timeout=args.lost_timeout,
+        counts_path=args.counts_path,
     )
 
     # visualization
@@ -82,3 +87,5 @@ with dai.Pipeline(device) as pipeline:
         if key_pressed == ord("q"):
             print("Got q key. Exiting...")
             break
+
+    annotation_node.save_counts()
@@ -0,0 +1,233 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.counting_engine import (
+    CountingEngine,
+    DirectionZone,
+    LineZone,
+    PolygonZone,
+    TrackStatus,
+)
+
+parser = argparse.ArgumentParser(
+    description="Replay synthetic tracklet updates through the counting engine and "
+    "check that its per-frame cost and memory stay constant. The crossings of the "
+    "line zones are compared with the former counter, which keeps every centroid.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "--updates", default=3_000_000, type=int, help="Tracklet updates to replay."
+)
+parser.add_argument("--fps", default=30, type=int)
+parser.add_argument(
+    "--arrivals", default=1.0, type=float, help="New objects per second."
+)
+parser.add_argument(
+    "--dwell", default=[5, 30], nargs=2, type=float, help="Seconds in view."
+)
+parser.add_argument(
+    "--lost", default=0.3, type=float, help="Share of objects lost for a while."
+)
+parser.add_argument(
+    "--vanish",
+    default=0.05,
+    type=float,
+    help="Share of objects the tracker never reports as removed.",
+)
+parser.add_argument("--jitter", default=0.005, type=float)
+parser.add_argument(
+    "--legacy_updates",
+    default=300_000,
+    type=int,
+    help="Updates to also run the former counter for, its memory keeps growing.",
+)
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+
+class LegacyLineCounter:
+    """The former counter: every centroid of every object is kept and the mean
+    of the whole history is recomputed on each update."""
+
+    def __init__(self, axis, roi_position):
+        self.axis = 0 if axis == "y" else 1
+        self.roi_position = roi_position
+        self.objects = {}
+        self.counter = [0, 0]
+
+    def update(self, observations):
+        for track_id, status, centroid in observations:
+            to = self.objects.get(track_id)
+            if status is TrackStatus.NEW:
+                to = {"centroids": [centroid], "counted": False}
+            elif to is not None:
+                if not to["counted"]:
+                    mean = np.mean([c[self.axis] for c in to["centroids"]])
+                    value = centroid[self.axis]
+                    if value > self.roi_position and mean < self.roi_position:
+                        self.counter[1] += 1
+                        to["counted"] = True
+                    elif value < self.roi_position and mean > self.roi_position:
+                        self.counter[0] += 1
+                        to["counted"] = True
+                to["centroids"].append(centroid)
+            self.objects[track_id] = to
+
+    def stored_centroids(self):
+        return sum(len(to["centroids"]) for to in self.objects.values() if to)
+
+
+def simulate():
+    """Yield the (id, status, centroid) observations of every frame."""
+    rng = random.Random(args.seed)
+    next_id = 0
+    objects = {}  # id -> [x, y, vx, vy, frames left, lost frames left, new]
+    while True:
+        arrivals = args.arrivals / args.fps
+        while rng.random() < arrivals:
+            arrivals -= 1
+            frames = int(rng.uniform(*args.dwell) * args.fps)
+            lost = rng.randint(5, 40) if rng.random() < args.lost else 0
+            objects[next_id] = [
+                rng.uniform(0.05, 0.95),
+                rng.uniform(0.05, 0.95),
+                rng.uniform(-0.3, 0.3) / args.fps,
+                rng.uniform(-0.3, 0.3) / args.fps,
+                frames,
+                lost,
+                True,
+            ]
+            next_id += 1
+
+        observations = []
+        for track_id, obj in list(objects.items()):
+            x, y, vx, vy, frames, lost, new = obj
+            obj[6] = False
+            if new:
+                status = TrackStatus.NEW
+            elif frames > 0:
+                status = TrackStatus.TRACKED
+                obj[0] = x = min(max(x + vx, 0.0), 1.0)
+                obj[1] = y = min(max(y + vy, 0.0), 1.0)
+                x = min(max(x + rng.gauss(0, args.jitter), 0.0), 1.0)
+                y = min(max(y + rng.gauss(0, args.jitter), 0.0), 1.0)
+            elif lost > 0:
+                status = TrackStatus.LOST
+                obj[5] -= 1
+            else:
+                del objects[track_id]
+                if rng.random() < args.vanish:
+                    continue
+                status = TrackStatus.REMOVED
+            obj[4] -= 1
+            observations.append((track_id, status, (x, y)))
+        yield observations
+
+
+def create_engine(counts_path=None):
+    zones = [
+        LineZone("vertical", (0.5, 0.0), (0.5, 1.0), labels=("left", "right")),
+        LineZone("horizontal", (1.0, 0.5), (0.0, 0.5), labels=("up", "down")),
+        PolygonZone("corner", [(0.1, 0.1), (0.4, 0.1), (0.4, 0.4), (0.1, 0.4)]),
+        DirectionZone("direction", 0.25),
+    ]
+    return CountingEngine(zones, counts_path=counts_path, save_interval=1.0)
+
+
+def replay(n_updates, counters, windows=6, trace_memory=False):
+    latencies = {name: [] for name in counters}
+    totals = dict.fromkeys(counters, 0.0)
+    frames = updates = 0
+    window_size = n_updates // windows
+    next_report = window_size
+    if trace_memory:
+        tracemalloc.start()
+    for observations in simulate():
+        for name, counter in counters.items():
+            start = time.perf_counter()
+            counter.update(observations)
+            latencies[name].append(time.perf_counter() - start)
+            totals[name] += latencies[name][-1]
+        frames += 1
+        updates += len(observations)
+        if updates >= next_report:
+            next_report += window_size
+            hours = frames / args.fps / 3600
+            line = f"  {updates / 1e6:5.2f}M updates ({hours:5.1f} h):"
+            for name, counter in counters.items():
+                chunk = 1e6 * np.array(latencies[name])
+                latencies[name].clear()
+                line += f" {name} {chunk.mean():6.1f} us/frame,"
+            engine = counters["engine"]
+            line += f" {len(engine)} live tracks"
+            if "legacy" in counters:
+                legacy = counters["legacy"]
+                line += (
+                    f", legacy {len(legacy.objects)} objects, "
+                    f"{legacy.stored_centroids()} centroids"
+                )
+            if trace_memory:
+                current, _ = tracemalloc.get_traced_memory()
+                line += f", {current / 1e6:.2f} MB traced"
+            print(line)
+        if updates >= n_updates:
+            break
+    if trace_memory:
+        tracemalloc.stop()
+    return frames, updates, totals
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    counts_path = os.path.join(tmp_dir, "counts.json")
+
+    print(f"Engine, {args.updates / 1e6:g}M updates:")
+    engine = create_engine(counts_path)
+    frames, updates, totals = replay(args.updates, {"engine": engine})
+    print(
+        f"  {updates / totals['engine'] / 1e6:.2f}M updates/s, "
+        f"{frames / args.fps / 3600:.1f} h of {args.fps} FPS video"
+    )
+    for name, counts in engine.counts.items():
+        print(f"  {name}: {counts}")
+
+    engine.save()
+    restored = create_engine(counts_path)
+    assert restored.counts == engine.counts, "Counts were not restored"
+    print(f"Counts restored from {os.path.basename(counts_path)} after restart.")
+
+print(f"\nEngine and former line counters, {args.legacy_updates / 1e6:g}M updates:")
+engine = create_engine()
+legacy_vertical = LegacyLineCounter("y", 0.5)
+legacy_horizontal = LegacyLineCounter("x", 0.5)
+
+
+class LegacyPair:
+    def __init__(self):
+        self.objects = legacy_vertical.objects
+
+    def update(self, observations):
+        legacy_vertical.update(observations)
+        legacy_horizontal.update(observations)
+
+    def stored_centroids(self):
+        return legacy_vertical.stored_centroids()
+
+
+replay(args.legacy_updates, {"engine": engine, "legacy": LegacyPair()})
+engine_counts = [
+    list(engine.counts["vertical"].values()),
+    list(engine.counts["horizontal"].values()),
+]
+legacy_counts = [legacy_vertical.counter, legacy_horizontal.counter]
+print(f"  engine left/right, up/down: {engine_counts}")
+print(f"  legacy left/right, up/down: {legacy_counts}")
+assert engine_counts == legacy_counts, "Line crossings differ from the former counter"
+
+print("\nMemory of the engine alone:")
+replay(args.legacy_updates, {"engine": create_engine()}, trace_memory=True)
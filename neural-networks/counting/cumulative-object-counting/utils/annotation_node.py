@@ -1,17 +1,16 @@
-from typing import Dict, Tuple
-import numpy as np
+from typing import List, Optional, Tuple
 import depthai as dai
 
 from depthai_nodes.utils import AnnotationHelper
 
+from .counting_engine import CountingEngine, LineZone, TrackStatus, load_zones
 
-# from https://www.pyimagesearch.com/2018/08/13/opencv-people-counter/
-class TrackableObject:
-    def __init__(self, objectID, centroid):
-        self.objectID = objectID
-        self.centroids = [centroid]
-
-        self.counted = False
+TRACK_STATUS = {
+    dai.Tracklet.TrackingStatus.NEW: TrackStatus.NEW,
+    dai.Tracklet.TrackingStatus.TRACKED: TrackStatus.TRACKED,
+    dai.Tracklet.TrackingStatus.LOST: TrackStatus.LOST,
+    dai.Tracklet.TrackingStatus.REMOVED: TrackStatus.REMOVED,
+}
 
 
 class AnnotationNode(dai.node.HostNode):
@@ -19,20 +18,30 @@ class AnnotationNode(dai.node.HostNode):
         super().__init__()
         self._axis = "x"
         self._roi_position = 0.5
-        self._trackable_objects: Dict[int, TrackableObject] = {}
-        self._counter = [0, 0, 0, 0]
+        self._zones_path: Optional[str] = None
+        self._lost_timeout = 10
+        self._counts_path: Optional[str] = None
+        self._engine: Optional[CountingEngine] = None
 
     def build(
         self,
         tracklets: dai.Node.Output,
         axis: bool = None,
         roi_position: float = None,
+        zones_path: str = None,
+        lost_timeout: int = None,
+        counts_path: str = None,
     ) -> "AnnotationNode":
         self.link_args(tracklets)
         if axis is not None:
             self.set_axis(axis)
         if roi_position is not None:
             self.set_roi_position(roi_position)
+        if lost_timeout is not None:
+            self._lost_timeout = lost_timeout
+        self._zones_path = zones_path
+        self._counts_path = counts_path
+        self._engine = self._create_engine()
         return self
 
     def set_axis(self, axis: str) -> None:
@@ -45,30 +54,55 @@ class AnnotationNode(dai.node.HostNode):
             raise ValueError("ROI position must be between 0 and 1.")
         self._roi_position = roi_position
 
+    def _create_engine(self) -> CountingEngine:
+        if self._zones_path is not None:
+            zones = load_zones(self._zones_path)
+        elif self._axis == "y":
+            # Vertical line, objects are counted moving left or right
+            zones = [
+                LineZone(
+                    "roi",
+                    (self._roi_position, 0.0),
+                    (self._roi_position, 1.0),
+                    labels=("left", "right"),
+                )
+            ]
+        else:
+            # Horizontal line, objects are counted moving up or down
+            zones = [
+                LineZone(
+                    "roi",
+                    (1.0, self._roi_position),
+                    (0.0, self._roi_position),
+                    labels=("up", "down"),
+                )
+            ]
+        return CountingEngine(
+            zones, lost_timeout=self._lost_timeout, counts_path=self._counts_path
+        )
+
+    def save_counts(self) -> None:
+        if self._engine is not None:
+            self._engine.save()
+
     def process(self, tracklets: dai.Buffer) -> None:
         assert isinstance(tracklets, dai.Tracklets)
 
         self._annotations = AnnotationHelper()
 
+        observations = []
         for t in tracklets.tracklets:
-            to = self._trackable_objects.get(t.id, None)
             centroid = self._calculate_centroid(t.roi)
-
-            if t.status == dai.Tracklet.TrackingStatus.NEW:
-                to = TrackableObject(t.id, centroid)
-            elif isinstance(to, TrackableObject):
-                self._update_counter(to, centroid)
-                to.centroids.append(centroid)
-
-            self._trackable_objects[t.id] = to
+            observations.append((t.id, TRACK_STATUS[t.status], centroid))
 
             if (
                 t.status != dai.Tracklet.TrackingStatus.LOST
                 and t.status != dai.Tracklet.TrackingStatus.REMOVED
             ):
                 self._draw_tracklet(t.id, centroid)
+        self._engine.update(observations)
 
-        self._draw_roi_line()
+        self._draw_zones()
         self._draw_count_and_status()
 
         annotations_msg = self._annotations.build(
@@ -85,45 +119,6 @@ class AnnotationNode(dai.node.HostNode):
         y2 = roi.bottomRight().y
         return ((x2 - x1) / 2 + x1, (y2 - y1) / 2 + y1)
 
-    def _update_counter(self, to: TrackableObject, centroid: Tuple[int, int]) -> None:
-        if self._axis == "y" and not to.counted:
-            x = [c[0] for c in to.centroids]
-            direction = centroid[0] - np.mean(x)
-
-            if (
-                centroid[0] > self._roi_position
-                and direction > 0
-                and np.mean(x) < self._roi_position
-            ):
-                self._counter[1] += 1
-                to.counted = True
-            elif (
-                centroid[0] < self._roi_position
-                and direction < 0
-                and np.mean(x) > self._roi_position
-            ):
-                self._counter[0] += 1
-                to.counted = True
-
-        elif self._axis == "x" and not to.counted:
-            y = [c[1] for c in to.centroids]
-            direction = centroid[1] - np.mean(y)
-
-            if (
-                centroid[1] > self._roi_position
-                and direction > 0
-                and np.mean(y) < self._roi_position
-            ):
-                self._counter[3] += 1
-                to.counted = True
-            elif (
-                centroid[1] < self._roi_position
-                and direction < 0
-                and np.mean(y) > self._roi_position
-            ):
-                self._counter[2] += 1
-                to.counted = True
-
     def _draw_tracklet(self, id: int, centroid: Tuple[float, float]) -> None:
         self._annotations.draw_text(
             text="ID {}".format(id),
@@ -132,22 +127,23 @@ class AnnotationNode(dai.node.HostNode):
         )
         self._annotations.draw_circle(center=centroid, radius=0.01, thickness=1)
 
-    def _draw_roi_line(self) -> None:
-        pt1, pt2 = (
-            ((self._roi_position, 0.0), (self._roi_position, 1.0))
-            if self._axis == "y"
-            else ((0.0, self._roi_position), (1.0, self._roi_position))
-        )
-        self._annotations.draw_line(pt1, pt2)
+    def _draw_zones(self) -> None:
+        for zone in self._engine.zones:
+            if zone.closed:
+                self._annotations.draw_polyline(zone.points, closed=True)
+            elif len(zone.points) == 2:
+                self._annotations.draw_line(*zone.points)
 
     def _draw_count_and_status(self) -> None:
-        text = (
-            f"Left: {self._counter[0]}; Right: {self._counter[1]}"
-            if self._axis == "y"
-            else f"Up: {self._counter[2]}; Down: {self._counter[3]}"
-        )
-        self._annotations.draw_text(
-            text=text,
-            position=(0.1, 0.1),
-            size=16,
-        )
+        lines: List[str] = []
+        for name, counts in self._engine.counts.items():
+            text = "; ".join(
+                f"{label.capitalize()}: {count}" for label, count in counts.items()
+            )
+            lines.append(text if len(self._engine.counts) == 1 else f"{name}: {text}")
+        for i, text in enumerate(lines):
+            self._annotations.draw_text(
+                text=text,
+                position=(0.1, 0.1 + 0.05 * i),
+                size=16,
+            )
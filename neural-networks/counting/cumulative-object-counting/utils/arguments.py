@@ -61,6 +61,33 @@ def initialize_argparser():
         type=float,
     )
 
+    parser.add_argument(
+        "-z",
+        "--zones",
+        help="Path to a JSON file with line and polygon zones to count in. Replaces the line set by --axis and --roi_position.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
+    parser.add_argument(
+        "-lt",
+        "--lost_timeout",
+        help="Number of frames a lost object is kept before it is forgotten.",
+        required=False,
+        default=10,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-c",
+        "--counts_path",
+        help="Path to a JSON file the counts are saved to and restored from on start. If not set, counts are not persisted.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
     args = parser.parse_args()
 
     return parser, args
@@ -0,0 +1,254 @@
+import argparse
+import math
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from utils.face_landmarks import (
+    DIST_COEFFS,
+    LEFT_EYE_IDX,
+    MODEL_POINTS,
+    POSE_IDX,
+    RIGHT_EYE_IDX,
+    determine_fatigue,
+    extract_landmarks,
+    get_camera_matrix,
+)
+from utils.fatigue_state import FatigueTracker
+
+parser = argparse.ArgumentParser(
+    description="Replay synthetic face landmark sequences of several faces and "
+    "compare the per-face fatigue state with the former shared history, for "
+    "correctness against the ground truth and for host time per frame.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--faces", default=4, type=int)
+parser.add_argument("-s", "--seconds", default=60.0, type=float)
+parser.add_argument("-fps", "--fps", default=30, type=int)
+parser.add_argument("-w", "--window", default=1.0, type=float)
+parser.add_argument(
+    "--noise", default=0.5, type=float, help="Landmark noise in pixels."
+)
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+SHAPE = (768, 1024)  # h, w
+THRESHOLD = 0.75
+PITCH_ANGLE = 20
+
+# Eye landmarks in the 3D model, from the outer corner (shared with the pose
+# landmarks) to the inner one, with the lids in between
+EYE_OFFSETS = np.array(
+    [
+        (0.0, 0.0, 0.0),  # outer corner
+        (1.0, 0.5, 0.0),  # upper lid
+        (2.0, 0.5, 0.0),  # upper lid
+        (3.0, 0.0, 0.0),  # inner corner
+        (1.0, -0.5, 0.0),  # lower lid
+        (2.0, -0.5, 0.0),  # lower lid
+    ]
+)
+
+
+def face_model(eye_opening):
+    """3D landmarks of all used indices for the given eye opening (lid offset)."""
+    points = {}
+    for idx, model_point in zip(POSE_IDX, MODEL_POINTS):
+        points[idx] = model_point
+    for indices, side in ((LEFT_EYE_IDX, 1.0), (RIGHT_EYE_IDX, -1.0)):
+        corner = points[indices[0]]
+        offsets = EYE_OFFSETS * (side, eye_opening, 1.0)
+        for idx, offset in zip(indices, offsets):
+            points[idx] = corner + offset
+    return points
+
+
+class Face:
+    """One synthetic face, leaning forward and closing its eyes now and then."""
+
+    def __init__(self, index, rng):
+        self.rng = rng
+        self.center = np.array([-25.0 + 50.0 * index / max(args.faces - 1, 1), 0.0])
+        self.depth = rng.uniform(55, 80)
+        self.phase = rng.uniform(0, 2 * math.pi)
+        self.tilted_until = self.closed_until = -1.0
+
+    def step(self, t):
+        if t > self.tilted_until + 3 and self.rng.random() < 0.3 / args.fps:
+            self.tilted_until = t + self.rng.uniform(0.5, 4)
+        if t > self.closed_until + 2 and self.rng.random() < 0.3 / args.fps:
+            self.closed_until = t + self.rng.uniform(0.2, 3)
+        tilted = t < self.tilted_until
+        closed = t < self.closed_until
+        # Small head motion around frontal, or leaning forward by 35 degrees
+        pitch = 35.0 if tilted else 8 * math.sin(0.7 * t + self.phase)
+        yaw = 15 * math.sin(0.4 * t + self.phase)
+        position = self.center + 3 * np.array([math.sin(0.3 * t), 0.0])
+
+        rotation = cv2.Rodrigues(np.radians([180.0 + pitch, 0.0, 0.0]))[0]
+        rotation = cv2.Rodrigues(np.radians([0.0, yaw, 0.0]))[0] @ rotation
+        rvec = cv2.Rodrigues(rotation)[0]
+        tvec = np.array([[position[0]], [position[1]], [self.depth]])
+
+        model = face_model(0.15 if closed else 1.0)
+        indices = list(model)
+        image, _ = cv2.projectPoints(
+            np.array([model[i] for i in indices]), rvec, tvec, CAMERA, DIST_COEFFS
+        )
+        image = image.reshape(-1, 2) + self.rng.normal(0, args.noise, (len(indices), 2))
+
+        h, w = SHAPE
+        keypoints = [SimpleNamespace(x=0.5, y=0.5) for _ in range(478)]
+        for idx, (x, y) in zip(indices, image):
+            keypoints[idx] = SimpleNamespace(x=x / w, y=y / h)
+        xmin, ymin = image.min(0) / (w, h) - 0.03
+        xmax, ymax = image.max(0) / (w, h) + 0.03
+        box = (xmin, ymin, xmax, ymax)
+        return box, SimpleNamespace(keypoints=keypoints), tilted, closed
+
+
+CAMERA = get_camera_matrix(SHAPE)
+
+
+def legacy_determine_fatigue(shape, face_keypoints, pitch_angle=PITCH_ANGLE):
+    """The former per-face computation, cold solve and raw pitch."""
+    h, w = shape
+    face_points_2d = np.array(
+        [[int(kp.x * w), int(kp.y * h)] for kp in face_keypoints.keypoints]
+    )
+    left_eye = face_points_2d[LEFT_EYE_IDX]
+    right_eye = face_points_2d[RIGHT_EYE_IDX]
+    image_points = face_points_2d[POSE_IDX].astype("double")
+    camera_matrix = get_camera_matrix(shape)
+    success, rotation_vector, _ = cv2.solvePnP(
+        MODEL_POINTS,
+        image_points,
+        camera_matrix,
+        np.zeros((4, 1)),
+        flags=cv2.SOLVEPNP_ITERATIVE,
+    )
+    head_tilted = False
+    if success:
+        rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
+        pitch = math.degrees(math.atan2(rotation_matrix[2, 1], rotation_matrix[2, 2]))
+        head_tilted = pitch < -pitch_angle
+
+    def ear(eye):
+        a = np.linalg.norm(eye[1] - eye[4])
+        b = np.linalg.norm(eye[2] - eye[5])
+        c = np.linalg.norm(eye[0] - eye[3])
+        return (a + b) / (2.0 * c)
+
+    eyes_closed = (ear(left_eye) + ear(right_eye)) / 2.0 < 0.15
+    return head_tilted, eyes_closed
+
+
+class Legacy:
+    """The former annotation node, one history shared by all faces."""
+
+    def __init__(self):
+        self.closed = deque(maxlen=30)
+        self.tilted = deque(maxlen=30)
+
+    def process(self, timestamp, boxes, landmarks):
+        alerts = []
+        for face_landmarks in landmarks:
+            tilted, closed = legacy_determine_fatigue(SHAPE, face_landmarks)
+            self.tilted.append(tilted)
+            self.closed.append(closed)
+            alerts.append(
+                (
+                    sum(self.tilted) / len(self.tilted) >= THRESHOLD,
+                    sum(self.closed) / len(self.closed) >= THRESHOLD,
+                )
+            )
+        return alerts
+
+
+class PerFace:
+    """The annotation node's per-face processing."""
+
+    def __init__(self):
+        self.tracker = FatigueTracker(window=args.window, max_age=args.window)
+
+    def process(self, timestamp, boxes, landmarks):
+        alerts = []
+        for face, face_landmarks in zip(
+            self.tracker.match(boxes, timestamp), landmarks
+        ):
+            points = extract_landmarks(SHAPE, face_landmarks)
+            tilted, closed, face.pose = determine_fatigue(points, CAMERA, face.pose)
+            face.add(timestamp, tilted, closed)
+            alerts.append(
+                (
+                    face.percent_tilted >= THRESHOLD,
+                    face.percent_closed_eyes >= THRESHOLD,
+                )
+            )
+        return alerts
+
+
+def ground_truth():
+    """Per face, the expected alerts: the state held for most of the window."""
+    rng = np.random.default_rng(args.seed)
+    faces = [Face(i, rng) for i in range(args.faces)]
+    history = [deque() for _ in faces]
+    for frame in range(int(args.seconds * args.fps)):
+        t = frame / args.fps
+        samples = [face.step(t) for face in faces]
+        expected = []
+        for face_history, (_, _, tilted, closed) in zip(history, samples):
+            face_history.append((t, tilted, closed))
+            while face_history[0][0] <= t - args.window:
+                face_history.popleft()
+            full = t >= args.window
+            expected.append(
+                (
+                    full and np.mean([s[1] for s in face_history]) >= THRESHOLD,
+                    full and np.mean([s[2] for s in face_history]) >= THRESHOLD,
+                )
+            )
+        yield t, samples, expected
+
+
+def evaluate(name, processor):
+    elapsed = 0.0
+    frames = 0
+    # [tilted, closed] x [true positive, false positive, false negative]
+    confusion = np.zeros((2, 3), dtype=int)
+    for t, samples, expected in ground_truth():
+        boxes = [sample[0] for sample in samples]
+        landmarks = [sample[1] for sample in samples]
+        start = time.perf_counter()
+        alerts = processor.process(t, boxes, landmarks)
+        elapsed += time.perf_counter() - start
+        frames += 1
+        for alert, truth in zip(alerts, expected):
+            for kind in range(2):
+                if alert[kind] and truth[kind]:
+                    confusion[kind, 0] += 1
+                elif alert[kind]:
+                    confusion[kind, 1] += 1
+                elif truth[kind]:
+                    confusion[kind, 2] += 1
+
+    print(f"{name}: {1000 * elapsed / frames:.3f} ms per frame")
+    for kind, label in enumerate(("head tilted", "eyes closed")):
+        tp, fp, fn = confusion[kind]
+        precision = tp / max(tp + fp, 1)
+        recall = tp / max(tp + fn, 1)
+        print(
+            f"  {label:>11}: precision {100 * precision:5.1f}%, "
+            f"recall {100 * recall:5.1f}% of {tp + fn} face-frames"
+        )
+
+
+print(
+    f"{args.faces} faces, {args.seconds:g} s at {args.fps} FPS, "
+    f"{args.window:g} s window, alert at {100 * THRESHOLD:g}% of the window"
+)
+evaluate("shared history (former)", Legacy())
+evaluate("per-face state", PerFace())
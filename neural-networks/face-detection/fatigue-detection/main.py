@@ -102,7 +102,9 @@ with dai.Pipeline(device) as pipeline:
     det_nn.out.link(gather_data_node.input_reference)
 
     # annotation
-    annotation_node = pipeline.create(AnnotationNode).build(gather_data_node.out)
+    annotation_node = pipeline.create(AnnotationNode).build(
+        gather_data_node.out, window=args.window
+    )
 
     # visualization
     visualizer.addTopic("Video", det_nn.passthrough, "images")
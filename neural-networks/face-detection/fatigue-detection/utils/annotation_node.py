@@ -1,20 +1,26 @@
 from typing import List
-from collections import deque
 import depthai as dai
 from depthai_nodes.utils import AnnotationHelper
 from depthai_nodes import ImgDetectionsExtended, Keypoints
 
-from utils.face_landmarks import determine_fatigue
+from utils.face_landmarks import determine_fatigue, extract_landmarks, get_camera_matrix
+from utils.fatigue_state import FatigueTracker
 
 
 class AnnotationNode(dai.node.HostNode):
     def __init__(self) -> None:
         super().__init__()
-        self._closed_eye_duration = deque(maxlen=30)
-        self._head_tilted_duration = deque(maxlen=30)
+        self._threshold = 0.75
+        self._tracker = FatigueTracker()
+        self._camera_matrix = None
+        self._camera_shape = None
 
-    def build(self, gather_data_msg) -> "AnnotationNode":
+    def build(
+        self, gather_data_msg, window: float = 1.0, threshold: float = 0.75
+    ) -> "AnnotationNode":
         self.link_args(gather_data_msg)
+        self._tracker = FatigueTracker(window=window, max_age=window)
+        self._threshold = threshold
         return self
 
     def process(self, gather_data_msg) -> None:
@@ -27,31 +33,37 @@ class AnnotationNode(dai.node.HostNode):
         assert all(isinstance(rec_msg, Keypoints) for rec_msg in landmarks_msg_list)
         assert len(landmarks_msg_list) == len(detections_msg.detections)
 
-        annotations = AnnotationHelper()
+        if self._camera_shape != (src_h, src_w):
+            self._camera_shape = (src_h, src_w)
+            self._camera_matrix = get_camera_matrix(self._camera_shape)
 
-        for detection, landmarks in zip(detections_msg.detections, landmarks_msg_list):
-            pitch, eyes_closed = determine_fatigue((src_h, src_w), landmarks)
+        timestamp = detections_msg.getTimestamp().total_seconds()
+        boxes = [
+            tuple(detection.rotated_rect.getOuterRect())
+            for detection in detections_msg.detections
+        ]
+        faces = self._tracker.match(boxes, timestamp)
 
-            self._head_tilted_duration.append(pitch)
-            self._closed_eye_duration.append(eyes_closed)
+        annotations = AnnotationHelper()
 
-            percent_closed_eyes = sum(self._closed_eye_duration) / len(
-                self._closed_eye_duration
-            )
-            percent_tilted = sum(self._head_tilted_duration) / len(
-                self._head_tilted_duration
+        for face, landmarks_msg in zip(faces, landmarks_msg_list):
+            landmarks = extract_landmarks(self._camera_shape, landmarks_msg)
+            head_tilted, eyes_closed, face.pose = determine_fatigue(
+                landmarks, self._camera_matrix, face.pose
             )
+            face.add(timestamp, head_tilted, eyes_closed)
 
-            if percent_tilted >= 0.75:
+            xmin, ymin, _, ymax = face.box
+            if face.percent_tilted >= self._threshold:
                 annotations.draw_text(
                     text="Head Tilted!",
-                    position=(0.1, 0.1),
+                    position=(xmin, min(ymax + 0.05, 0.9)),
                 )
 
-            if percent_closed_eyes >= 0.75:
+            if face.percent_closed_eyes >= self._threshold:
                 annotations.draw_text(
                     text="Eyes Closed!",
-                    position=(0.1, 0.2),
+                    position=(xmin, min(ymax + 0.1, 0.95)),
                 )
 
         annotations_msg = annotations.build(
@@ -32,6 +32,15 @@ def initialize_argparser():
         type=str,
     )
 
+    parser.add_argument(
+        "-w",
+        "--window",
+        help="Time window in seconds over which the head tilt and closed eyes of each face are evaluated.",
+        required=False,
+        default=1.0,
+        type=float,
+    )
+
     args = parser.parse_args()
 
     return parser, args
@@ -1,85 +1,127 @@
-from typing import Tuple
+from typing import Optional, Tuple
 import cv2
 import math
 import numpy as np
 from depthai_nodes import Keypoints
 
+LEFT_EYE_IDX = [33, 160, 158, 133, 144, 153]
+RIGHT_EYE_IDX = [263, 387, 385, 362, 373, 380]
+POSE_IDX = [199, 4, 33, 263, 61, 291]
 
-def determine_fatigue(
-    shape: Tuple[int, int], face_keypoints: Keypoints, pitch_angle: int = 20
-):
+# Only the landmarks used below are extracted from the 478 of the face mesh
+LANDMARK_IDX = LEFT_EYE_IDX + RIGHT_EYE_IDX + POSE_IDX
+EYES_SLICE = slice(0, 12)
+POSE_SLICE = slice(12, 18)
+
+# 3D model points corresponding to the pose landmarks
+MODEL_POINTS = np.array(
+    [
+        (0.0, -7.9422, 5.1812),  # Chin
+        (0.0, -0.4632, 7.5866),  # Nose tip
+        (-4.4459, 2.6640, 3.1734),  # Left eye corner
+        (4.4459, 2.6640, 3.1734),  # Right eye corner
+        (-2.4562, -4.3426, 4.2839),  # Left mouth corner
+        (2.4562, -4.3426, 4.2839),  # Right mouth corner
+    ],
+    dtype="double",
+)
+
+# Assuming no lens distortion
+DIST_COEFFS = np.zeros((4, 1))
+
+Pose = Tuple[np.ndarray, np.ndarray]
+
+
+def extract_landmarks(shape: Tuple[int, int], face_keypoints: Keypoints) -> np.ndarray:
+    """Pixel coordinates of the landmarks in `LANDMARK_IDX`, as an (18, 2) array."""
     h, w = shape  # frame.shape[:2]
-    face_points_2d = np.array(
-        [[int(kp.x * w), int(kp.y * h)] for kp in face_keypoints.keypoints]
+    keypoints = face_keypoints.keypoints
+    points = np.array(
+        [(keypoints[i].x, keypoints[i].y) for i in LANDMARK_IDX], dtype="double"
     )
+    points *= (w, h)
+    return points
 
-    left_eye_idx = [33, 160, 158, 133, 144, 153]
-    right_eye_idx = [263, 387, 385, 362, 373, 380]
 
-    left_eye = face_points_2d[left_eye_idx]
-    right_eye = face_points_2d[right_eye_idx]
+def get_camera_matrix(shape: Tuple[int, int]) -> np.ndarray:
+    focal_length = shape[1]
+    center = (shape[1] / 2, shape[0] / 2)
+    return np.array(
+        [[focal_length, 0, center[0]], [0, focal_length, center[1]], [0, 0, 1]],
+        dtype="double",
+    )
 
-    pose_indices = [199, 4, 33, 263, 61, 291]
-    image_points = face_points_2d[pose_indices].astype("double")
 
-    success, rotation_vector, translation_vector, camera_matrix, dist_coeffs = (
-        get_pose_estimation(shape, image_points)
+def determine_fatigue(
+    landmarks: np.ndarray,
+    camera_matrix: np.ndarray,
+    previous_pose: Optional[Pose] = None,
+    pitch_angle: int = 20,
+    ear_threshold: float = 0.15,
+) -> Tuple[bool, bool, Optional[Pose]]:
+    """Whether the head leans forward and the eyes are closed for one face.
+
+    `landmarks` come from `extract_landmarks`. The head pose is solved starting
+    from `previous_pose` of the same face if given. Returns the new pose too, to
+    be passed in with the next landmarks of the face.
+    """
+    success, rotation_vector, translation_vector = get_pose_estimation(
+        landmarks[POSE_SLICE], camera_matrix, previous_pose
     )
 
     head_tilted = False
+    pose = None
     if success:
+        pose = (rotation_vector, translation_vector)
         pitch, yaw, roll = get_euler_angles(rotation_vector)
-        if pitch < -pitch_angle:
+        if pitch > pitch_angle:
             head_tilted = True
 
-    left_ear = calc_eye_aspect_ratio(left_eye)
-    right_ear = calc_eye_aspect_ratio(right_eye)
-    ear = (left_ear + right_ear) / 2.0
-    eyes_closed = True if ear < 0.15 else False
+    ear = calc_eye_aspect_ratio(landmarks[EYES_SLICE].reshape(2, 6, 2)).mean()
+    eyes_closed = bool(ear < ear_threshold)
 
-    return head_tilted, eyes_closed
+    return head_tilted, eyes_closed, pose
 
 
-def calc_eye_aspect_ratio(eye_points):
-    A = np.linalg.norm(eye_points[1] - eye_points[4])
-    B = np.linalg.norm(eye_points[2] - eye_points[5])
-    C = np.linalg.norm(eye_points[0] - eye_points[3])
+def calc_eye_aspect_ratio(eye_points: np.ndarray) -> np.ndarray:
+    """Eye aspect ratio of (..., 6, 2) eye landmarks."""
+    A = np.linalg.norm(eye_points[..., 1, :] - eye_points[..., 4, :], axis=-1)
+    B = np.linalg.norm(eye_points[..., 2, :] - eye_points[..., 5, :], axis=-1)
+    C = np.linalg.norm(eye_points[..., 0, :] - eye_points[..., 3, :], axis=-1)
     return (A + B) / (2.0 * C)
 
 
-def get_pose_estimation(shape, image_points):
-    # 3D model points corresponding to the landmarks above.
-    model_points = np.array(
-        [
-            (0.0, -7.9422, 5.1812),  # Chin
-            (0.0, -0.4632, 7.5866),  # Nose tip
-            (-4.4459, 2.6640, 3.1734),  # Left eye corner
-            (4.4459, 2.6640, 3.1734),  # Right eye corner
-            (-2.4562, -4.3426, 4.2839),  # Left mouth corner
-            (2.4562, -4.3426, 4.2839),  # Right mouth corner
-        ],
-        dtype="double",
-    )
-
-    focal_length = shape[1]
-    center = (shape[1] / 2, shape[0] / 2)
-    camera_matrix = np.array(
-        [[focal_length, 0, center[0]], [0, focal_length, center[1]], [0, 0, 1]],
-        dtype="double",
-    )
-
-    # Assuming no lens distortion
-    dist_coeffs = np.zeros((4, 1))
-
-    # Solve for pose
-    success, rotation_vector, translation_vector = cv2.solvePnP(
-        model_points,
+def get_pose_estimation(
+    image_points: np.ndarray,
+    camera_matrix: np.ndarray,
+    previous_pose: Optional[Pose] = None,
+):
+    if previous_pose is not None:
+        # Faces move little between frames, so the previous pose is a good
+        # initial guess and saves most of the iterations of a cold solve
+        rotation_vector = previous_pose[0].copy()
+        translation_vector = previous_pose[1].copy()
+        success, rotation_vector, translation_vector = cv2.solvePnP(
+            MODEL_POINTS,
+            image_points,
+            camera_matrix,
+            DIST_COEFFS,
+            rotation_vector,
+            translation_vector,
+            useExtrinsicGuess=True,
+            flags=cv2.SOLVEPNP_ITERATIVE,
+        )
+        # A face behind the camera means the guess led to the mirrored solution
+        if success and translation_vector[2, 0] > 0:
+            return success, rotation_vector, translation_vector
+
+    return cv2.solvePnP(
+        MODEL_POINTS,
         image_points,
         camera_matrix,
-        dist_coeffs,
+        DIST_COEFFS,
         flags=cv2.SOLVEPNP_ITERATIVE,
     )
-    return success, rotation_vector, translation_vector, camera_matrix, dist_coeffs
 
 
 def get_euler_angles(rotation_vector):
@@ -105,4 +147,9 @@ def get_euler_angles(rotation_vector):
     yaw_deg = yaw * 180 / math.pi
     roll_deg = roll * 180 / math.pi
 
+    # The model's y axis points up and the image's down, so a face looking at the
+    # camera has a pitch of +-180 degrees. Make it relative to that, positive
+    # when the head leans forward.
+    pitch_deg = (pitch_deg + 360) % 360 - 180
+
     return pitch_deg, yaw_deg, roll_deg
@@ -0,0 +1,114 @@
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .face_landmarks import Pose
+
+Box = Tuple[float, float, float, float]
+
+
+class FaceState:
+    """Fatigue history of one face over the last `window` seconds.
+
+    The number of samples with the head tilted and the eyes closed is kept as a
+    running sum, so the share of each in the window is O(1) per frame. Shares are
+    0 until the face has been seen for a whole window.
+    """
+
+    def __init__(self, face_id: int, box: Box, timestamp: float, window: float) -> None:
+        self.face_id = face_id
+        self.window = window
+        self.box = box
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.pose: Optional[Pose] = None
+        self._samples = deque()  # (timestamp, head tilted, eyes closed)
+        self._tilted = 0
+        self._closed = 0
+
+    def add(self, timestamp: float, head_tilted: bool, eyes_closed: bool) -> None:
+        self._samples.append((timestamp, head_tilted, eyes_closed))
+        self._tilted += head_tilted
+        self._closed += eyes_closed
+        while self._samples[0][0] <= timestamp - self.window:
+            _, tilted, closed = self._samples.popleft()
+            self._tilted -= tilted
+            self._closed -= closed
+
+    @property
+    def warmed_up(self) -> bool:
+        return bool(self._samples) and (
+            self._samples[-1][0] - self.first_seen >= self.window
+        )
+
+    @property
+    def percent_tilted(self) -> float:
+        return self._tilted / len(self._samples) if self.warmed_up else 0.0
+
+    @property
+    def percent_closed_eyes(self) -> float:
+        return self._closed / len(self._samples) if self.warmed_up else 0.0
+
+
+class FatigueTracker:
+    """Keeps a `FaceState` per face, identified across frames by box overlap.
+
+    Each detection is matched to the face whose last box overlaps it most, with
+    an IoU of at least `iou_threshold`, every face at most once per frame.
+    Unmatched detections start a new face. Faces not seen for `max_age` seconds
+    are forgotten.
+    """
+
+    def __init__(
+        self,
+        window: float = 1.0,
+        iou_threshold: float = 0.3,
+        max_age: float = 1.0,
+    ) -> None:
+        self.window = window
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.faces: Dict[int, FaceState] = {}
+        self._next_id = 0
+
+    def match(self, boxes: Sequence[Box], timestamp: float) -> List[FaceState]:
+        """Return the state of the face of each box, creating new ones as needed."""
+        self.faces = {
+            face_id: face
+            for face_id, face in self.faces.items()
+            if timestamp - face.last_seen <= self.max_age
+        }
+        faces = list(self.faces.values())
+        matched: List[Optional[FaceState]] = [None] * len(boxes)
+        if faces and len(boxes):
+            iou = box_iou(np.array(boxes), np.array([face.box for face in faces]))
+            # Greedy assignment by overlap, best pairs first
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                row, col = np.unravel_index(flat, iou.shape)
+                if iou[row, col] < self.iou_threshold:
+                    break
+                if matched[row] is None and faces[col] is not None:
+                    matched[row] = faces[col]
+                    faces[col] = None
+
+        for i, box in enumerate(boxes):
+            if matched[i] is None:
+                matched[i] = FaceState(self._next_id, box, timestamp, self.window)
+                self.faces[self._next_id] = matched[i]
+                self._next_id += 1
+            matched[i].box = box
+            matched[i].last_seen = timestamp
+        return matched
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every (N, 4) box in `a` with every (M, 4) box in `b`."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=-1)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=-1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=-1)
+    return intersection / np.maximum(
+        area_a[:, None] + area_b[None] - intersection, 1e-12
+    )
@@ -5,11 +5,15 @@ import depthai as dai
 from depthai_nodes import ImgDetectionsExtended, Predictions
 from depthai_nodes.utils import AnnotationHelper
 
+from utils.attribute_smoother import AttributeSmoother
+from utils.pose_decoder import PoseDecoder
+
 
 class AnnotationNode(dai.node.HostNode):
     def __init__(self) -> None:
         super().__init__()
-        self._min_threshold = 15
+        self._smoother = AttributeSmoother(dims=3)
+        self._pose_decoder = PoseDecoder()
 
     def build(
         self,
@@ -32,28 +36,34 @@ class AnnotationNode(dai.node.HostNode):
 
         annotations = AnnotationHelper()
 
-        for img_detection_extended_msg, pose_msg_group in zip(
-            img_detections_extended_msg.detections, pose_msg_group_list
-        ):
-            yaw_msg: Predictions = pose_msg_group["0"]
-            assert isinstance(yaw_msg, Predictions)
-            yaw = yaw_msg.prediction
-            roll_msg: Predictions = pose_msg_group["1"]
-            assert isinstance(roll_msg, Predictions)
-            roll = roll_msg.prediction
-            pitch_msg: Predictions = pose_msg_group["2"]
-            assert isinstance(pitch_msg, Predictions)
-            pitch = pitch_msg.prediction
-
-            pose_text = self._decode_pose(yaw, pitch, roll)
+        detections = img_detections_extended_msg.detections
+        boxes = np.array(
+            [detection.rotated_rect.getOuterRect() for detection in detections],
+            dtype=np.float32,
+        ).reshape(-1, 4)
+        angles = np.array(
+            [
+                [self._prediction(group, name) for name in ("2", "0", "1")]
+                for group in pose_msg_group_list
+            ],
+            dtype=np.float32,
+        ).reshape(-1, 3)  # pitch, yaw, roll
+
+        face_ids, angles = self._smoother.update(
+            boxes, angles, img_detections_extended_msg.getTimestamp().total_seconds()
+        )
+        pose_texts = self._pose_decoder.decode(face_ids.tolist(), angles)
+        self._pose_decoder.retain(self._smoother.face_ids.tolist())
 
+        # Faces are drawn in the order they appeared, the same in every frame
+        for i in np.argsort(face_ids, kind="stable"):
+            pitch, yaw, roll = angles[i]
             pose_information = f"Pitch: {pitch:.0f} \nYaw: {yaw:.0f} \nRoll: {roll:.0f}"
 
-            outer_points = img_detection_extended_msg.rotated_rect.getOuterRect()
-            x_min, y_min, x_max, _ = [np.round(x, 2) for x in outer_points]
+            x_min, y_min, x_max, _ = np.round(boxes[i], 2).tolist()
 
             annotations.draw_text(pose_information, (x_max, y_min + 0.1), size=16)
-            annotations.draw_text(pose_text, (x_min, y_min), size=28)
+            annotations.draw_text(pose_texts[i], (x_min, y_min), size=28)
 
         annotations_msg = annotations.build(
             timestamp=img_detections_extended_msg.getTimestamp(),
@@ -62,27 +72,8 @@ class AnnotationNode(dai.node.HostNode):
 
         self.out.send(annotations_msg)
 
-    def _decode_pose(self, yaw: float, pitch: float, roll: float) -> str:
-        vals = np.array([abs(pitch), abs(yaw), abs(roll)])
-        max_index = np.argmax(vals)
-
-        if vals[max_index] < self._min_threshold:
-            return ""
-
-        if max_index == 0:
-            if pitch > 0:
-                txt = "Look down"
-            else:
-                txt = "Look up"
-        elif max_index == 1:
-            if yaw > 0:
-                txt = "Turn left"
-            else:
-                txt = "Turn right"
-        elif max_index == 2:
-            if roll > 0:
-                txt = "Tilt left"
-            else:
-                txt = "Tilt right"
-
-        return txt
+    @staticmethod
+    def _prediction(pose_msg_group: dai.MessageGroup, name: str) -> float:
+        msg: Predictions = pose_msg_group[name]
+        assert isinstance(msg, Predictions)
+        return msg.prediction
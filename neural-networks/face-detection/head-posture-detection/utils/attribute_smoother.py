@@ -0,0 +1,124 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class AttributeSmoother:
+    """Smooths numeric attributes of faces (angles, age, emotion scores...) over time.
+
+    Each frame gives the (N, 4) xmin, ymin, xmax, ymax boxes of the faces and
+    their (N, D) attributes. Faces are identified across frames by box overlap:
+    each box goes to the known face it overlaps most, with an IoU of at least
+    `iou_threshold`, every face at most once per frame. Unmatched boxes start a
+    new face, and faces not seen for `max_age` seconds are forgotten.
+
+    The attributes of each face go through a One-Euro filter: a low-pass filter
+    whose cutoff frequency rises from `min_cutoff` Hz with the speed of the
+    attribute times `beta`, so a still face is smoothed strongly and a turning
+    one follows quickly. With `beta=0` it is an exponential moving average with
+    a fixed cutoff. The filter uses the time between frames, so it behaves the
+    same at any frame rate.
+    """
+
+    def __init__(
+        self,
+        dims: int,
+        min_cutoff: float = 1.0,
+        beta: float = 0.01,
+        d_cutoff: float = 1.0,
+        iou_threshold: float = 0.3,
+        max_age: float = 1.0,
+    ) -> None:
+        self.dims = dims
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        # State of the known faces, one row per face, oldest face first
+        self.face_ids = np.zeros(0, dtype=np.int64)
+        self._boxes = np.zeros((0, 4), np.float32)
+        self._values = np.zeros((0, dims), np.float32)
+        self._speeds = np.zeros((0, dims), np.float32)
+        self._last_seen = np.zeros(0, np.float64)
+        self._next_id = 0
+
+    def _match(self, boxes: np.ndarray) -> np.ndarray:
+        """Row of the known face of each box, -1 for new faces."""
+        rows = np.full(len(boxes), -1)
+        if not len(boxes) or not len(self.face_ids):
+            return rows
+        iou = box_iou(boxes, self._boxes)
+        taken = np.zeros(len(self.face_ids), dtype=bool)
+        # Greedy assignment by overlap, best pairs first
+        pairs = np.flatnonzero(iou >= self.iou_threshold)
+        pairs = pairs[np.argsort(-iou.ravel()[pairs], kind="stable")]
+        for box, face in zip(*np.divmod(pairs, iou.shape[1])):
+            if rows[box] < 0 and not taken[face]:
+                rows[box] = face
+                taken[face] = True
+        return rows
+
+    def _alpha(self, cutoff: np.ndarray, dt: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + 1.0 / (2 * np.pi * cutoff * dt))
+
+    def update(
+        self, boxes: np.ndarray, values: np.ndarray, timestamp: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Add the faces of a frame. Returns the (N,) face ids and the (N, D)
+        smoothed attributes, in the order of the boxes."""
+        boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+        values = np.asarray(values, np.float32).reshape(len(boxes), self.dims)
+
+        alive = timestamp - self._last_seen <= self.max_age
+        if not alive.all():
+            self.face_ids = self.face_ids[alive]
+            self._boxes = self._boxes[alive]
+            self._values = self._values[alive]
+            self._speeds = self._speeds[alive]
+            self._last_seen = self._last_seen[alive]
+
+        rows = self._match(boxes)
+        known = rows >= 0
+        smoothed = values.copy()
+        if known.any():
+            face = rows[known]
+            dt = np.maximum(timestamp - self._last_seen[face], 1e-6)[:, None]
+            previous = self._values[face]
+            speed = (values[known] - previous) / dt
+            a_d = self._alpha(self.d_cutoff, dt)
+            speed = a_d * speed + (1 - a_d) * self._speeds[face]
+            a = self._alpha(self.min_cutoff + self.beta * np.abs(speed), dt)
+            smoothed[known] = a * values[known] + (1 - a) * previous
+            self._values[face] = smoothed[known]
+            self._speeds[face] = speed
+            self._boxes[face] = boxes[known]
+            self._last_seen[face] = timestamp
+
+        new = ~known
+        count = int(new.sum())
+        if count:
+            rows[new] = len(self.face_ids) + np.arange(count)
+            self.face_ids = np.concatenate(
+                [self.face_ids, self._next_id + np.arange(count)]
+            )
+            self._next_id += count
+            self._boxes = np.concatenate([self._boxes, boxes[new]])
+            self._values = np.concatenate([self._values, values[new]])
+            self._speeds = np.concatenate([self._speeds, np.zeros_like(values[new])])
+            self._last_seen = np.concatenate(
+                [self._last_seen, np.full(count, timestamp)]
+            )
+        return self.face_ids[rows], smoothed
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every (N, 4) box in `a` with every (M, 4) box in `b`."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=-1)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=-1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=-1)
+    return intersection / np.maximum(
+        area_a[:, None] + area_b[None] - intersection, 1e-12
+    )
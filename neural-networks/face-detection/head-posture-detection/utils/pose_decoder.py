@@ -0,0 +1,69 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Label of each axis (pitch, yaw, roll) for positive and negative angles
+LABELS = [
+    "",
+    "Look down",
+    "Look up",
+    "Turn left",
+    "Turn right",
+    "Tilt left",
+    "Tilt right",
+]
+
+
+class PoseDecoder:
+    """Decodes head angles into a pose label, with hysteresis per face.
+
+    The label is taken from the angle with the largest magnitude once it reaches
+    `enter_threshold` degrees. A face keeps its label while that angle, with the
+    same sign, stays at `exit_threshold` or more, unless another angle exceeds it
+    by `switch_margin`.
+    """
+
+    def __init__(
+        self,
+        enter_threshold: float = 15,
+        exit_threshold: float = 10,
+        switch_margin: float = 5,
+    ) -> None:
+        if exit_threshold > enter_threshold:
+            raise ValueError("Exit threshold must not exceed the enter threshold.")
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.switch_margin = switch_margin
+        self._labels: Dict[int, int] = {}
+
+    def decode(self, face_ids: Sequence[int], angles: np.ndarray) -> List[str]:
+        """Labels of the faces from their (N, 3) pitch, yaw, roll in degrees."""
+        angles = np.asarray(angles, np.float32).reshape(-1, 3)
+        rows = np.arange(len(angles))
+        magnitudes = np.abs(angles)
+        axis = magnitudes.argmax(axis=1)
+        strongest = magnitudes[rows, axis]
+        labels = np.where(
+            strongest >= self.enter_threshold,
+            1 + 2 * axis + (angles[rows, axis] <= 0),
+            0,
+        )
+
+        previous = np.array([self._labels.get(i, 0) for i in face_ids], dtype=int)
+        previous_axis = np.maximum(previous - 1, 0) // 2
+        held = angles[rows, previous_axis]
+        same_sign = (held > 0) == (previous % 2 == 1)
+        keep = (
+            (previous > 0)
+            & same_sign
+            & (np.abs(held) >= self.exit_threshold)
+            & (strongest < np.abs(held) + self.switch_margin)
+        )
+        labels = np.where(keep, previous, labels)
+
+        self._labels.update(zip(face_ids, labels.tolist()))
+        return [LABELS[label] for label in labels]
+
+    def retain(self, face_ids: Sequence[int]) -> None:
+        """Forget the faces that are not in `face_ids`."""
+        self._labels = {i: self._labels[i] for i in face_ids if i in self._labels}
@@ -134,9 +134,11 @@ with dai.Pipeline(device) as pipeline:
 
     # merge both detections into one message
     merge_detections = pipeline.create(DetectionMerger).build(
-        detection_depth_merger.output, palm_depth_merger.output
+        detection_depth_merger.output,
+        palm_depth_merger.output,
+        label_maps=[0, len(classes)],
+        tolerance=args.sync_tolerance or 0.5 / args.fps_limit,
     )
-    merge_detections.set_detection_2_label_offset(len(classes))
 
     # Filter out everything except for dangerous objects and palm
     merged_labels = classes + ["palm"]
@@ -172,6 +174,7 @@ with dai.Pipeline(device) as pipeline:
     visualizer.addTopic("Detections", annotation_node.out_detections)
     visualizer.addTopic("Distances", visualize_distances.output)
     visualizer.addTopic("Alert", show_alert.output)
+    alert_events = show_alert.out_events.createOutputQueue()
 
     print("Pipeline created.")
 
@@ -179,6 +182,14 @@ with dai.Pipeline(device) as pipeline:
     visualizer.registerPipeline(pipeline)
 
     while pipeline.isRunning():
+        for message in alert_events.tryGetAll():
+            for event in message.events:
+                state = f"started ({event.reason})" if event.active else "ended"
+                print(
+                    f"{event.timestamp:.2f} s: alert {state}, distance "
+                    f"{event.distance:.0f} mm, approaching at "
+                    f"{event.approach_speed:.0f} mm/s"
+                )
         key = visualizer.waitKey(1)
         if key == ord("q"):
             print("Got q key. Exiting...")
@@ -0,0 +1,146 @@
+import argparse
+import math
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils.alert_engine import AlertEngine
+
+parser = argparse.ArgumentParser(
+    description="Replay a synthetic palm to cup distance at several frame rates, and "
+    "compare when the former 5-frame alert and the alert engine turn on and off.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-fps", "--fps", default=[5, 10, 15, 30], type=int, nargs="+")
+parser.add_argument(
+    "-o",
+    "--objects",
+    default=20,
+    type=int,
+    help="Detections in the frames used for timing, all pairs are measured.",
+)
+args = parser.parse_args()
+
+PALM, CUP, BOTTLE, PERSON = 80, 41, 39, 0
+DANGEROUS = [BOTTLE, CUP]
+SECONDS = 22.0
+# (start, distance at start in mm), linear in between
+KEYFRAMES = [
+    (0.0, 1500),
+    (3.0, 1500),
+    (6.0, 500),  # slow approach, then hovering around the threshold
+    (10.0, 500),
+    (11.5, 1400),  # retreat
+    (14.0, 1400),
+    (14.5, 580),  # fast approach, stopping short of the threshold
+    (15.5, 580),
+    (16.5, 1500),
+    (SECONDS, 1500),
+]
+
+
+def palm_distance(t):
+    times, values = zip(*KEYFRAMES)
+    noise = 40 * math.sin(2 * math.pi * 1.7 * t) + 15 * math.sin(2 * math.pi * 4.3 * t)
+    return float(np.interp(t, times, values)) + noise
+
+
+def frame(t):
+    """Labels and distances of the detection pairs of a frame. The bottle next to
+    the cup and the person next to the palm must not raise the alert."""
+    labels1 = np.array([PALM, CUP, PALM, PERSON])
+    labels2 = np.array([CUP, BOTTLE, PERSON, BOTTLE])
+    distances = np.array([palm_distance(t), 50.0, 80.0, 1200.0])
+    # The palm is missed in a few frames
+    if math.sin(2 * math.pi * 0.9 * t) > 0.97:
+        labels1, labels2, distances = labels1[1:], labels2[1:], distances[1:]
+    return labels1, labels2, distances
+
+
+class Former:
+    """The former ShowAlert: 5 frames, alert if more than 0.3 are under 500 mm."""
+
+    def __init__(self):
+        self.active = False
+        self._state_queue = []
+
+    def update(self, timestamp, labels1, labels2, distances):
+        found_close_dets = False
+        for label1, label2, distance in zip(labels1, labels2, distances):
+            if (
+                (label1 == PALM and label2 in DANGEROUS)
+                or (label2 == PALM and label1 in DANGEROUS)
+            ) and distance < 500:
+                found_close_dets = True
+                break
+        self._state_queue.append(found_close_dets)
+        if len(self._state_queue) > 5:
+            self._state_queue.pop(0)
+        active = sum(self._state_queue) / len(self._state_queue) > 0.3
+        changed = active != self.active
+        self.active = active
+        return SimpleNamespace(timestamp=timestamp, active=active) if changed else None
+
+
+def replay(alert, fps):
+    events = []
+    for i in range(int(SECONDS * fps)):
+        t = i / fps
+        event = alert.update(t, *frame(t))
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def describe(events):
+    return " ".join(f"{'+' if e.active else '-'}{e.timestamp:.2f}" for e in events)
+
+
+results = {}
+for fps in args.fps:
+    former = replay(Former(), fps)
+    engine = replay(AlertEngine(PALM, DANGEROUS), fps)
+    results[fps] = engine
+    print(f"{fps} FPS")
+    print(f"  former: {len(former)} changes: {describe(former)}")
+    print(f"  engine: {len(engine)} changes: {describe(engine)}")
+    for event in engine:
+        print(
+            f"    {event.timestamp:.2f} s {'on' if event.active else 'off'} "
+            f"({event.reason}) at {event.distance:.0f} mm, "
+            f"{event.approach_speed:.0f} mm/s"
+        )
+
+# The same alerts at every rate, on and off within one frame of the slowest rate
+period = 1 / min(args.fps)
+reference = results[min(args.fps)]
+assert [e.active for e in reference] == [True, False, True, False], reference
+assert [e.reason for e in reference[::2]] == ["distance", "approach"], reference
+for fps, events in results.items():
+    assert [(e.active, e.reason) for e in events] == [
+        (e.active, e.reason) for e in reference
+    ], fps
+    for event, expected in zip(events, reference):
+        assert abs(event.timestamp - expected.timestamp) <= period + 1e-9, (
+            fps,
+            event,
+            expected,
+        )
+print(f"Alert timing agrees within {period:.2f} s at {args.fps} FPS")
+
+# Cost of one frame with all pairs of many detections, none of them close, so
+# the former loop cannot stop early
+rng = np.random.default_rng(0)
+labels = rng.choice([PALM, CUP, BOTTLE, PERSON], args.objects)
+first, second = np.triu_indices(args.objects, 1)
+pairs = (labels[first], labels[second], rng.uniform(700, 2000, len(first)))
+for name, alert in [("former", Former()), ("engine", AlertEngine(PALM, DANGEROUS))]:
+    times = []
+    for i in range(200):
+        start = time.perf_counter()
+        alert.update(i / 30, *pairs)
+        times.append(time.perf_counter() - start)
+    print(
+        f"{name}: {1e6 * np.median(times):.1f} us per frame with " f"{len(first)} pairs"
+    )
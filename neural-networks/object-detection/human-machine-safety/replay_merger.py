@@ -0,0 +1,139 @@
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from utils.detection_fusion import TimestampAligner, box_iou, fuse_boxes
+
+parser = argparse.ArgumentParser(
+    description="Replay synthetic detection streams of three models with latency, "
+    "timestamp jitter and dropped messages, and compare pairing by arrival order "
+    "with pairing by timestamp, and the duplicate boxes left before and after "
+    "cross-model suppression.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-s", "--seconds", default=120.0, type=float)
+parser.add_argument("-fps", "--fps", default=10, type=int)
+parser.add_argument(
+    "-o", "--objects", default=10, type=int, help="People in the scene."
+)
+parser.add_argument("--jitter", default=0.005, type=float, help="Seconds.")
+parser.add_argument("--iou", default=0.5, type=float)
+parser.add_argument("--method", default="nms", choices=("nms", "wbf"))
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+TOLERANCE = 0.5 / args.fps
+# Per stream: latency in seconds, share of dropped messages, the label of its
+# detections after remapping. The first and the last model both detect people.
+STREAMS = [
+    (0.04, 0.05, 0),
+    (0.07, 0.20, 1),
+    (0.12, 0.35, 0),
+]
+
+rng = np.random.default_rng(args.seed)
+
+
+def scene(t):
+    """Boxes of the people in the scene at time t, moving slowly."""
+    phase = np.arange(args.objects)
+    x = 0.1 + 0.7 * (0.5 + 0.5 * np.sin(0.2 * t + phase))
+    y = 0.1 + 0.6 * (0.5 + 0.5 * np.cos(0.15 * t + 2 * phase))
+    return np.stack([x, y, x + 0.1, y + 0.2], axis=1)
+
+
+def make_messages():
+    """All messages in the order they arrive on the host."""
+    messages = []
+    for frame in range(int(args.seconds * args.fps)):
+        capture = frame / args.fps
+        boxes = scene(capture)
+        for stream, (latency, drop, label) in enumerate(STREAMS):
+            if rng.random() < drop:
+                continue
+            timestamp = capture + rng.normal(0, args.jitter)
+            arrival = capture + latency + abs(rng.normal(0, args.jitter))
+            if label == 1:
+                # Palms, near the people but not the same boxes
+                detected = boxes * 0.3 + 0.35
+            else:
+                detected = boxes + rng.normal(0, 0.005, boxes.shape)
+            detections = (
+                detected,
+                rng.uniform(0.5, 1.0, len(detected)),
+                np.full(len(detected), label),
+            )
+            messages.append((arrival, stream, timestamp, capture, detections))
+    messages.sort(key=lambda message: message[0])
+    return messages
+
+
+def by_arrival(messages):
+    """The former pairing: the next message of each stream, whenever it comes,
+    from input queues of 4 messages that drop the oldest when full."""
+    pending = [deque(maxlen=4) for _ in STREAMS]
+    for _, stream, timestamp, capture, detections in messages:
+        pending[stream].append((timestamp, (capture, detections)))
+        if all(pending):
+            group = [queue.popleft() for queue in pending]
+            yield max(ts for ts, _ in group), [message for _, message in group]
+
+
+def by_timestamp(messages):
+    aligner = TimestampAligner(len(STREAMS), TOLERANCE)
+    for _, stream, timestamp, capture, detections in messages:
+        aligner.add(stream, timestamp, (capture, detections))
+        yield from aligner.groups()
+
+
+def duplicates(boxes, labels, streams):
+    """Pairs of same-label boxes of different streams overlapping above --iou."""
+    overlap = box_iou(boxes) > args.iou
+    overlap &= labels[:, None] == labels[None]
+    overlap &= streams[:, None] != streams[None]
+    return int(np.triu(overlap, 1).sum())
+
+
+def evaluate(name, pairing, messages):
+    spreads = []
+    before = after = 0
+    fuse_time = 0.0
+    for _, group in pairing(messages):
+        captures = [capture for capture, _ in group]
+        spreads.append(max(captures) - min(captures))
+        boxes = np.concatenate([detections[0] for _, detections in group])
+        scores = np.concatenate([detections[1] for _, detections in group])
+        labels = np.concatenate([detections[2] for _, detections in group])
+        streams = np.concatenate(
+            [np.full(len(d[0]), i) for i, (_, d) in enumerate(group)]
+        )
+        before += duplicates(boxes, labels, streams)
+        start = time.perf_counter()
+        kept, fused = fuse_boxes(boxes, scores, labels, streams, args.iou, args.method)
+        fuse_time += time.perf_counter() - start
+        kept_boxes = fused if fused is not None else boxes[kept]
+        after += duplicates(kept_boxes, labels[kept], streams[kept])
+
+    spreads = np.array(spreads)
+    print(
+        f"{name}: {len(spreads)} merged messages, frame spread mean "
+        f"{1000 * spreads.mean():.0f} ms, max {1000 * spreads.max():.0f} ms, "
+        f"{100 * np.mean(spreads > 1e-9):.1f}% mix frames"
+    )
+    print(
+        f"  duplicate boxes {before} -> {after} after {args.method}, "
+        f"{1e6 * fuse_time / len(spreads):.0f} us per message"
+    )
+
+
+messages = make_messages()
+print(
+    f"{len(STREAMS)} streams at {args.fps} FPS for {args.seconds:g} s, dropping "
+    + ", ".join(f"{100 * drop:g}%" for _, drop, _ in STREAMS)
+    + f" of their messages, {1000 * args.jitter:g} ms jitter, "
+    f"{1000 * TOLERANCE:g} ms tolerance"
+)
+evaluate("by arrival (former)", by_arrival, messages)
+evaluate("by timestamp", by_timestamp, messages)
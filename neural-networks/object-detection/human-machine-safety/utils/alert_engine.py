@@ -0,0 +1,133 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AlertEvent:
+    """The alert turned on (`active`) or off at `timestamp` seconds."""
+
+    timestamp: float
+    active: bool
+    # "distance" or "approach" when turning on, "clear" when turning off
+    reason: str
+    # Closest palm to dangerous object distance in mm, and the speed in mm/s at
+    # which it shrinks, inf and 0 without a palm and a dangerous object
+    distance: float
+    approach_speed: float
+
+
+class AlertEngine:
+    """Decides when a palm is dangerously close to a dangerous object.
+
+    A frame is dangerous if the closest palm to dangerous object distance is
+    below `enter_distance` (`exit_distance` while the alert is on), or if it is
+    below `approach_distance` and shrinks faster than `approach_speed` mm/s,
+    measured over the last `speed_window` seconds. Each frame counts for the
+    time since the previous one, and the alert turns on when dangerous frames
+    cover `enter_share` of the last `window` seconds, and off when they cover
+    at most `exit_share` of it, so the timing does not depend on the frame rate.
+    """
+
+    def __init__(
+        self,
+        palm_label: int,
+        dangerous_labels: Sequence[int],
+        enter_distance: float = 500,
+        exit_distance: float = 650,
+        approach_distance: float = 1000,
+        approach_speed: float = 1500,
+        window: float = 0.5,
+        enter_share: float = 0.3,
+        exit_share: float = 0.1,
+        speed_window: float = 0.3,
+    ) -> None:
+        if exit_distance < enter_distance or exit_share > enter_share:
+            raise ValueError("Exit thresholds must not be stricter than enter ones.")
+        self.palm_label = palm_label
+        self.dangerous_labels = list(dangerous_labels)
+        # 1 for the palm, 2 for dangerous objects and 0 for the rest, so that a
+        # pair is a palm and a dangerous object if the product of its kinds is 2
+        self._kinds = np.zeros(max(palm_label, *self.dangerous_labels) + 2, np.uint8)
+        self._kinds[self.dangerous_labels] = 2
+        self._kinds[palm_label] = 1
+        self.enter_distance = enter_distance
+        self.exit_distance = exit_distance
+        self.approach_distance = approach_distance
+        self.approach_speed = approach_speed
+        self.window = window
+        self.enter_share = enter_share
+        self.exit_share = exit_share
+        self.speed_window = speed_window
+
+        self.active = False
+        self._last_timestamp: Optional[float] = None
+        # (start, end, dangerous) of the frames in the window
+        self._frames: Deque[Tuple[float, float, bool]] = deque()
+        self._dangerous_time = 0.0
+        self._distances: Deque[Tuple[float, float]] = deque()  # (timestamp, mm)
+
+    def closest_distance(
+        self, labels1: np.ndarray, labels2: np.ndarray, distances: np.ndarray
+    ) -> float:
+        """Smallest distance between a palm and a dangerous object, or inf."""
+        # Unknown labels are clipped to the last kind, which is 0
+        pairs = (
+            self._kinds.take(labels1, mode="clip")
+            * self._kinds.take(labels2, mode="clip")
+            == 2
+        )
+        return float(distances[pairs].min()) if pairs.any() else math.inf
+
+    def _approach_speed(self, timestamp: float, distance: float) -> float:
+        if not math.isfinite(distance):
+            self._distances.clear()
+            return 0.0
+        self._distances.append((timestamp, distance))
+        while self._distances[0][0] < timestamp - self.speed_window:
+            self._distances.popleft()
+        start, start_distance = self._distances[0]
+        if timestamp - start < self.speed_window / 2:
+            return 0.0
+        return (start_distance - distance) / (timestamp - start)
+
+    def _dangerous_share(self, timestamp: float, dangerous: bool) -> float:
+        start = timestamp if self._last_timestamp is None else self._last_timestamp
+        self._frames.append((start, timestamp, dangerous))
+        self._dangerous_time += (timestamp - start) * dangerous
+        window_start = timestamp - self.window
+        while self._frames[0][1] <= window_start:
+            first_start, first_end, first_dangerous = self._frames.popleft()
+            self._dangerous_time -= (first_end - first_start) * first_dangerous
+        # The oldest frame may reach back before the window
+        first_start, _, first_dangerous = self._frames[0]
+        outside = max(window_start - first_start, 0.0) * first_dangerous
+        return (self._dangerous_time - outside) / self.window
+
+    def update(
+        self,
+        timestamp: float,
+        labels1: np.ndarray,
+        labels2: np.ndarray,
+        distances: np.ndarray,
+    ) -> Optional[AlertEvent]:
+        """Add the distances of a frame, given as the labels and distances of all
+        detection pairs. Returns an event if the alert turned on or off."""
+        distance = self.closest_distance(labels1, labels2, distances)
+        speed = self._approach_speed(timestamp, distance)
+        close = distance < (self.exit_distance if self.active else self.enter_distance)
+        approaching = distance < self.approach_distance and speed >= self.approach_speed
+        share = self._dangerous_share(timestamp, close or approaching)
+        self._last_timestamp = timestamp
+
+        if not self.active and share >= self.enter_share:
+            self.active = True
+            reason = "distance" if close else "approach"
+            return AlertEvent(timestamp, True, reason, distance, speed)
+        if self.active and share <= self.exit_share:
+            self.active = False
+            return AlertEvent(timestamp, False, "clear", distance, speed)
+        return None
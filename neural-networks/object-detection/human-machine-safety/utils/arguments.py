@@ -25,6 +25,16 @@ def initialize_argparser():
         type=int,
     )
 
+    parser.add_argument(
+        "-st",
+        "--sync_tolerance",
+        help="Largest time difference in seconds between the detections of the two "
+        "models that are merged. Defaults to half the frame time.",
+        required=False,
+        default=None,
+        type=float,
+    )
+
     args = parser.parse_args()
 
     return parser, args
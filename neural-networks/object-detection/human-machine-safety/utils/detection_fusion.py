@@ -0,0 +1,137 @@
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+
+import numpy as np
+
+
+class TimestampAligner:
+    """Groups messages of several streams that were taken at the same time.
+
+    A group holds one message per stream, all within `tolerance` seconds of the
+    newest among them, so the groups come at the rate of the slowest stream. Each
+    stream's messages must arrive in timestamp order. Messages that can no longer
+    be part of a group, because a newer message of another stream is too far
+    ahead, are dropped. At most `max_pending` messages are kept per stream.
+    """
+
+    def __init__(self, streams: int, tolerance: float, max_pending: int = 8) -> None:
+        if streams < 1:
+            raise ValueError("At least one stream is needed.")
+        self.tolerance = tolerance
+        self.dropped = 0
+        self._pending: List[Deque[Tuple[float, Any]]] = [
+            deque() for _ in range(streams)
+        ]
+        self._max_pending = max_pending
+
+    def add(self, stream: int, timestamp: float, message: Any) -> None:
+        pending = self._pending[stream]
+        if pending and timestamp < pending[-1][0]:
+            # Out of order, a group containing it could not be formed anymore
+            self.dropped += 1
+            return
+        pending.append((timestamp, message))
+        if len(pending) > self._max_pending:
+            pending.popleft()
+            self.dropped += 1
+
+    def groups(self) -> List[Tuple[float, List[Any]]]:
+        """Take the complete groups, oldest first, as (timestamp, messages).
+
+        The timestamp of a group is the newest timestamp in it.
+        """
+        groups = []
+        while all(self._pending):
+            reference = max(pending[0][0] for pending in self._pending)
+            for pending in self._pending:
+                while pending and pending[0][0] < reference - self.tolerance:
+                    pending.popleft()
+                    self.dropped += 1
+            if not all(self._pending):
+                break
+            if any(
+                pending[0][0] > reference + self.tolerance for pending in self._pending
+            ):
+                # Nothing is left to pair the reference with
+                for pending in self._pending:
+                    if pending[0][0] == reference:
+                        pending.popleft()
+                        self.dropped += 1
+                        break
+                continue
+
+            messages = []
+            for pending in self._pending:
+                # Skip to the candidate closest to the reference
+                best = 0
+                while best + 1 < len(pending) and abs(
+                    pending[best + 1][0] - reference
+                ) < abs(pending[best][0] - reference):
+                    best += 1
+                for _ in range(best):
+                    pending.popleft()
+                    self.dropped += 1
+                messages.append(pending.popleft()[1])
+            groups.append((reference, messages))
+        return groups
+
+
+def box_iou(boxes: np.ndarray) -> np.ndarray:
+    """IoU of every pair of (N, 4) xmin, ymin, xmax, ymax boxes."""
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=-1)
+    area = np.prod(np.clip(boxes[:, 2:] - boxes[:, :2], 0, None), axis=-1)
+    return intersection / np.maximum(area[:, None] + area[None] - intersection, 1e-12)
+
+
+def fuse_boxes(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    labels: np.ndarray,
+    streams: np.ndarray,
+    iou_threshold: float = 0.5,
+    method: str = "nms",
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Suppress duplicates of the same class found by different streams.
+
+    Each model already suppresses its own duplicates, so only boxes of different
+    streams with the same label and an IoU above `iou_threshold` are considered
+    duplicates, of which the most confident one is kept. With `method="wbf"` the
+    kept box is also moved to the confidence weighted mean of its duplicates.
+
+    Returns the indices of the kept boxes, most confident first, and with "wbf"
+    their fused coordinates, else None.
+    """
+    if method not in ("nms", "wbf"):
+        raise ValueError(f"Unknown method {method}.")
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=int), np.zeros((0, 4)) if method == "wbf" else None
+
+    order = np.argsort(-scores, kind="stable")
+    boxes, scores = boxes[order], scores[order]
+    labels, streams = labels[order], streams[order]
+    overlap = box_iou(boxes) > iou_threshold
+    overlap &= labels[:, None] == labels[None]
+    overlap &= streams[:, None] != streams[None]
+
+    # Greedy suppression, each box by the most confident box left that overlaps it
+    keeper = np.arange(len(boxes))
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if suppressed[i]:
+            continue
+        duplicates = overlap[i] & ~suppressed
+        duplicates[: i + 1] = False
+        suppressed |= duplicates
+        keeper[duplicates] = i
+    kept = np.flatnonzero(~suppressed)
+
+    fused = None
+    if method == "wbf":
+        weighted = np.zeros_like(boxes, dtype=float)
+        weights = np.zeros(len(boxes))
+        np.add.at(weighted, keeper, boxes * scores[:, None])
+        np.add.at(weights, keeper, scores)
+        fused = weighted[kept] / np.maximum(weights[kept, None], 1e-12)
+    return order[kept], fused
@@ -1,48 +1,167 @@
+import threading
+from typing import List, Mapping, Optional, Sequence, Union
+
 import depthai as dai
+import numpy as np
 from depthai_nodes import ImgDetectionsExtended
 
+from utils.detection_fusion import TimestampAligner, fuse_boxes
+
+DETECTIONS_TYPES = (dai.ImgDetections, ImgDetectionsExtended, dai.SpatialImgDetections)
+
+# An offset added to the labels of a stream, or a map of its labels to the merged
+# ones, labels not in the map are left out
+LabelMap = Union[int, Mapping[int, int]]
+
+
+class DetectionMerger(dai.node.ThreadedHostNode):
+    """Merges the detections of several models into a single message.
 
-class DetectionMerger(dai.node.HostNode):
-    """Merges multiple detection messages into a single one."""
+    Messages are paired by timestamp, within `tolerance` seconds, so the merged
+    stream runs at the rate of the slowest model. Labels are remapped on copies of
+    the detections, and boxes of the same merged label found by more than one
+    model are suppressed or fused (`method` "nms" or "wbf").
+    """
 
-    def __init__(self):
+    def __init__(self) -> None:
         super().__init__()
-        self._detection_1_label_offset = 0
-        self._detection_2_label_offset = 0
+        self.inputs: List[dai.Node.Input] = []
         self.output = self.createOutput(
             possibleDatatypes=[
                 dai.Node.DatatypeHierarchy(dai.DatatypeEnum.Buffer, True)
             ]
         )
+        self._label_maps: List[LabelMap] = []
+        self._iou_threshold = 0.5
+        self._method = "nms"
+        self._aligner: Optional[TimestampAligner] = None
 
-    def build(self, det_nn_1: dai.Node.Output, det_nn_2: dai.Node.Output):
-        self.link_args(det_nn_1, det_nn_2)
+        # input callbacks wake up the merging thread instead of sleep polling
+        self._new_data = threading.Condition()
+        self._has_new_data = False
+
+    def build(
+        self,
+        *detections: dai.Node.Output,
+        label_maps: Optional[Sequence[LabelMap]] = None,
+        tolerance: float = 0.05,
+        iou_threshold: float = 0.5,
+        method: str = "nms",
+    ) -> "DetectionMerger":
+        if len(detections) < 2:
+            raise ValueError("At least two detection outputs are needed.")
+        if label_maps is None:
+            label_maps = [0] * len(detections)
+        if len(label_maps) != len(detections):
+            raise ValueError("One label map is needed per detection output.")
+        if method not in ("nms", "wbf"):
+            raise ValueError(f"Unknown method {method}.")
+
+        for output in detections:
+            stream_input = self.createInput(queueSize=4, blocking=False)
+            stream_input.addCallback(self._on_new_data)
+            output.link(stream_input)
+            self.inputs.append(stream_input)
+        self._label_maps = list(label_maps)
+        self._iou_threshold = iou_threshold
+        self._method = method
+        self._aligner = TimestampAligner(len(detections), tolerance)
         return self
 
-    def process(self, det_nn_1: dai.Buffer, det_nn_2: dai.Buffer) -> dai.ImgDetections:
-        assert isinstance(
-            det_nn_1,
-            (dai.ImgDetections, ImgDetectionsExtended, dai.SpatialImgDetections),
+    def run(self) -> None:
+        while self.isRunning():
+            with self._new_data:
+                # the timeout only bounds how long a stopped pipeline goes unnoticed
+                self._new_data.wait_for(lambda: self._has_new_data, timeout=0.1)
+                self._has_new_data = False
+            for stream, stream_input in enumerate(self.inputs):
+                for message in stream_input.tryGetAll():
+                    assert isinstance(message, DETECTIONS_TYPES)
+                    self._aligner.add(
+                        stream, message.getTimestamp().total_seconds(), message
+                    )
+            for _, messages in self._aligner.groups():
+                self.output.send(self.merge(messages))
+
+    def _on_new_data(self, *_) -> None:
+        with self._new_data:
+            self._has_new_data = True
+            self._new_data.notify()
+
+    def merge(self, messages: Sequence[dai.Buffer]) -> dai.Buffer:
+        """One detections message from a message of each model, taken together."""
+        assert all(type(message) is type(messages[0]) for message in messages)
+        detections = []
+        streams = []
+        for stream, (message, label_map) in enumerate(zip(messages, self._label_maps)):
+            for detection in message.detections:
+                if isinstance(label_map, int):
+                    label = detection.label + label_map
+                elif detection.label in label_map:
+                    label = label_map[detection.label]
+                else:
+                    continue
+                detections.append(_relabelled(detection, label))
+                streams.append(stream)
+
+        if detections:
+            kept, fused = fuse_boxes(
+                np.array([_box(detection) for detection in detections]),
+                np.array([detection.confidence for detection in detections]),
+                np.array([detection.label for detection in detections]),
+                np.array(streams),
+                self._iou_threshold,
+                self._method,
+            )
+            if fused is not None:
+                for index, box in zip(kept, fused):
+                    _set_box(detections[index], box)
+            detections = [detections[index] for index in kept]
+
+        # The newest message is the one the others were paired with
+        newest = max(messages, key=lambda message: message.getTimestamp())
+        merged = type(messages[0])()
+        merged.detections = detections
+        merged.setSequenceNum(newest.getSequenceNum())
+        merged.setTimestamp(newest.getTimestamp())
+        merged.setTransformation(messages[0].getTransformation())
+        return merged
+
+
+def _relabelled(detection, label: int):
+    """A copy of the detection with another label, the input stays as it is."""
+    if isinstance(detection, dai.SpatialImgDetection):
+        copied = dai.SpatialImgDetection()
+        copied.spatialCoordinates = detection.spatialCoordinates
+    elif isinstance(detection, dai.ImgDetection):
+        copied = dai.ImgDetection()
+    else:
+        copied = detection.copy()
+        copied.label = label
+        return copied
+    copied.label = label
+    copied.confidence = detection.confidence
+    copied.xmin, copied.ymin = detection.xmin, detection.ymin
+    copied.xmax, copied.ymax = detection.xmax, detection.ymax
+    return copied
+
+
+def _box(detection) -> Sequence[float]:
+    if isinstance(detection, dai.ImgDetection):
+        return detection.xmin, detection.ymin, detection.xmax, detection.ymax
+    return detection.rotated_rect.getOuterRect()
+
+
+def _set_box(detection, box: Sequence[float]) -> None:
+    xmin, ymin, xmax, ymax = (float(value) for value in box)
+    if isinstance(detection, dai.ImgDetection):
+        detection.xmin, detection.ymin = xmin, ymin
+        detection.xmax, detection.ymax = xmax, ymax
+    else:
+        detection.rotated_rect = (
+            (xmin + xmax) / 2,
+            (ymin + ymax) / 2,
+            xmax - xmin,
+            ymax - ymin,
+            detection.rotated_rect.angle,
         )
-        assert type(det_nn_1) is type(det_nn_2)
-        new_dets = type(det_nn_1)()
-        new_dets_list = det_nn_1.detections + det_nn_2.detections
-        for ind, d in enumerate(new_dets_list):
-            if ind < len(det_nn_1.detections):
-                d.label += self._detection_1_label_offset
-            else:
-                d.label += self._detection_2_label_offset
-
-        new_dets.detections = det_nn_1.detections + det_nn_2.detections
-        new_dets.setSequenceNum(det_nn_1.getSequenceNum())
-        new_dets.setTimestamp(det_nn_1.getTimestamp())
-        new_dets.setTransformation(det_nn_1.getTransformation())
-        self.output.send(new_dets)
-
-    def set_detection_1_label_offset(self, offset: int):
-        """This number is added to all labels of the first detection message (`det_nn_1` input)."""
-        self._detection_1_label_offset = offset
-
-    def set_detection_2_label_offset(self, offset: int):
-        """This number is added to all labels of the second detection message (`det_nn_2` input)."""
-        self._detection_2_label_offset = offset
@@ -1,12 +1,24 @@
 import depthai as dai
+import numpy as np
+from utils.alert_engine import AlertEngine, AlertEvent
 from utils.measure_object_distance import ObjectDistances
 from datetime import timedelta
 from typing import List
 from depthai_nodes.utils import AnnotationHelper
 
-DISTANCE_THRESHOLD = 500  # mm
-ALERT_THRESHOLD = 0.3
-STATE_QUEUE_LENGTH = 5
+
+class AlertEvents(dai.Buffer):
+    def __init__(self) -> None:
+        super().__init__(0)
+        self._events: List[AlertEvent] = []
+
+    @property
+    def events(self) -> List[AlertEvent]:
+        return self._events
+
+    @events.setter
+    def events(self, value: List[AlertEvent]) -> None:
+        self._events = value
 
 
 class ShowAlert(dai.node.HostNode):
@@ -17,50 +29,47 @@ class ShowAlert(dai.node.HostNode):
                 dai.Node.DatatypeHierarchy(dai.DatatypeEnum.ImgAnnotations, True)
             ]
         )
-
-        self._state_queue = []
+        self.out_events = self.createOutput(
+            possibleDatatypes=[
+                dai.Node.DatatypeHierarchy(dai.DatatypeEnum.Buffer, True)
+            ]
+        )
 
     def build(
         self,
         distances: dai.Node.Output,
         palm_label: int,
         dangerous_objects: List[int],
+        **engine_args,
     ) -> "ShowAlert":
+        """`engine_args` are passed to `AlertEngine`, e.g. `enter_distance`."""
         self.link_args(distances)
-        self.palm_label = palm_label
-        self.dangerous_objects = dangerous_objects
+        self.engine = AlertEngine(palm_label, dangerous_objects, **engine_args)
         return self
 
     def process(self, distances: dai.Buffer):
         assert isinstance(distances, ObjectDistances)
-        found_close_dets = False
-        for distance in distances.distances:
-            if (
-                (
-                    distance.detection1.label == self.palm_label
-                    and distance.detection2.label in self.dangerous_objects
-                )
-                or (
-                    distance.detection2.label == self.palm_label
-                    and distance.detection1.label in self.dangerous_objects
-                )
-            ) and distance.distance < DISTANCE_THRESHOLD:
-                found_close_dets = True
-                break
-        self._state_queue.append(found_close_dets)
+        count = len(distances.distances)
+        labels1 = np.fromiter(
+            (d.detection1.label for d in distances.distances), int, count
+        )
+        labels2 = np.fromiter(
+            (d.detection2.label for d in distances.distances), int, count
+        )
+        values = np.fromiter((d.distance for d in distances.distances), float, count)
+        timestamp = distances.getTimestamp()
+        event = self.engine.update(timestamp.total_seconds(), labels1, labels2, values)
 
-        if len(self._state_queue) > STATE_QUEUE_LENGTH:
-            self._state_queue.pop(0)
-        if self._should_alert:
-            img_annotations = self._draw_alert(
-                distances.getTimestamp(), distances.getSequenceNum()
-            )
+        if event is not None:
+            events = AlertEvents()
+            events.events = [event]
+            events.setTimestamp(timestamp)
+            events.setSequenceNum(distances.getSequenceNum())
+            self.out_events.send(events)
+        if self.engine.active:
+            img_annotations = self._draw_alert(timestamp, distances.getSequenceNum())
             self.output.send(img_annotations)
 
-    @property
-    def _should_alert(self) -> bool:
-        return sum(self._state_queue) / len(self._state_queue) > ALERT_THRESHOLD
-
     def _draw_alert(
         self, timestamp: timedelta, sequence_num: int
     ) -> dai.ImgAnnotations:
@@ -0,0 +1,126 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.frame_converter import FrameConverter
+
+parser = argparse.ArgumentParser(
+    description="Check the frame converter on synthetic buffers of every supported "
+    "type and compare its host time with the former round trip through an "
+    "interleaved BGR frame.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--frames", default=500, type=int)
+parser.add_argument(
+    "-s",
+    "--size",
+    default=[256, 192],
+    nargs=2,
+    type=int,
+    help="Frame width and height, the thermal camera gives 256x192.",
+)
+parser.add_argument(
+    "-p", "--padding", default=0, type=int, help="Bytes of padding after each row."
+)
+args = parser.parse_args()
+
+WIDTH, HEIGHT = args.size
+TEMPERATURE_RANGE = (20.0, 40.0)
+rng = np.random.default_rng(0)
+
+
+def padded(image, bytes_per_pixel):
+    """The raw bytes of the image with padded rows, and the stride."""
+    rows = image.reshape(image.shape[0], -1).view(np.uint8)
+    stride = WIDTH * bytes_per_pixel + args.padding
+    data = np.zeros((rows.shape[0], stride), np.uint8)
+    data[:, : rows.shape[1]] = rows
+    return data.ravel(), stride
+
+
+def expected_gray(image):
+    """The 8-bit image each type is expected to give, for gray and temperature types."""
+    if image.dtype == np.uint8:
+        return image
+    low, high = TEMPERATURE_RANGE
+    scaled = (image.astype(np.float32) - low) * (255 / (high - low))
+    return np.clip(np.round(scaled), 0, 255).astype(np.uint8)
+
+
+# Per type: the image, its bytes per pixel and the interleaved BGR it should give
+temperatures = rng.uniform(10, 50, (HEIGHT, WIDTH)).astype(np.float16)
+counts = rng.integers(0, 1 << 16, (HEIGHT, WIDTH), dtype=np.uint16)
+yuyv = rng.integers(0, 256, (HEIGHT, WIDTH, 2), np.uint8)
+nv12 = rng.integers(0, 256, (HEIGHT * 3 // 2, WIDTH), np.uint8)
+gray = rng.integers(0, 256, (HEIGHT, WIDTH), np.uint8)
+CASES = {
+    "YUV422i": (yuyv, 2, cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV)),
+    "NV12": (nv12, 1, cv2.cvtColor(nv12, cv2.COLOR_YUV2BGR_NV12)),
+    "GRAY8": (gray, 1, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)),
+    "GRAYF16": (
+        temperatures,
+        2,
+        cv2.cvtColor(expected_gray(temperatures), cv2.COLOR_GRAY2BGR),
+    ),
+    # RAW16 counts in centi-Kelvin
+    "RAW16": (
+        counts,
+        2,
+        cv2.cvtColor(
+            expected_gray(counts.astype(np.float32) / 100 - 273.15),
+            cv2.COLOR_GRAY2BGR,
+        ),
+    ),
+}
+
+
+def make_converters(planar):
+    return FrameConverter(
+        planar=planar,
+        temperature_range=TEMPERATURE_RANGE,
+        raw_scale=0.01,
+        raw_offset=-273.15,
+    )
+
+
+for planar in (True, False):
+    converter = make_converters(planar)
+    for frame_type, (image, bytes_per_pixel, bgr) in CASES.items():
+        data, stride = padded(image, bytes_per_pixel)
+        out = converter.convert(data, frame_type, WIDTH, HEIGHT, stride)
+        expected = bgr.transpose(2, 0, 1) if planar else bgr
+        assert np.array_equal(out, expected), f"{frame_type}, planar={planar}"
+print(f"All {len(CASES)} frame types convert correctly to planar and interleaved BGR")
+
+
+def former(image):
+    """getCvFrame, a BGR image in a new array, then setCvFrame to planar BGR."""
+    bgr = cv2.cvtColor(image, cv2.COLOR_YUV2BGR_YUYV)
+    return np.ascontiguousarray(bgr.transpose(2, 0, 1)).ravel()
+
+
+def timed(function, *inputs):
+    """Median time of one call in microseconds."""
+    function(*inputs)
+    times = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        function(*inputs)
+        times.append(time.perf_counter() - start)
+    return 1e6 * float(np.median(times))
+
+
+converter = make_converters(planar=True)
+data, stride = padded(yuyv, 2)
+former_us = timed(former, yuyv)
+adapter_us = timed(converter.convert, data, "YUV422i", WIDTH, HEIGHT, stride)
+print(
+    f"YUV422i {WIDTH}x{HEIGHT} to BGR888p: former {former_us:.0f} us, "
+    f"converter {adapter_us:.0f} us ({former_us / adapter_us:.1f}x)"
+)
+for frame_type in ("GRAYF16", "RAW16"):
+    data, stride = padded(CASES[frame_type][0], 2)
+    us = timed(converter.convert, data, frame_type, WIDTH, HEIGHT, stride)
+    print(f"{frame_type} {WIDTH}x{HEIGHT} to BGR888p with a fixed range: {us:.0f} us")
@@ -4,7 +4,7 @@ import depthai as dai
 from depthai_nodes.node import ParsingNeuralNetwork
 
 from utils.arguments import initialize_argparser
-from utils.yuv2bgr import YUV2BGR
+from utils.frame_adapter import FrameAdapter
 
 _, args = initialize_argparser()
 
@@ -50,9 +50,13 @@ with dai.Pipeline(device) as pipeline:
 
     else:
         cam = pipeline.create(dai.node.Thermal).build()
-        yuv2bgr = pipeline.create(YUV2BGR)  # Thermal output is YUV, model needs BGR
-        cam.color.link(yuv2bgr.input)
-        input_node = yuv2bgr.out
+        # Thermal output is YUV (or temperatures), model needs BGR
+        adapter = pipeline.create(FrameAdapter).build(
+            cam.temperature if args.temperature_range else cam.color,
+            frame_type=frame_type,
+            temperature_range=args.temperature_range,
+        )
+        input_node = adapter.out
 
     nn_with_parser = pipeline.create(ParsingNeuralNetwork).build(
         input_node, det_model_nn_archive, fps=args.fps_limit
@@ -42,6 +42,19 @@ def initialize_argparser():
         type=str,
     )
 
+    parser.add_argument(
+        "-tr",
+        "--temperature_range",
+        help="Run the model on the temperature output of the thermal camera instead "
+        "of its color output, with the given minimum and maximum temperature in "
+        "degrees Celsius mapped to black and white.",
+        required=False,
+        default=None,
+        nargs=2,
+        type=float,
+        metavar=("MIN", "MAX"),
+    )
+
     args = parser.parse_args()
 
     return parser, args
@@ -0,0 +1,57 @@
+from typing import Optional, Tuple
+
+import depthai as dai
+
+from utils.frame_converter import FrameConverter
+
+
+class FrameAdapter(dai.node.ThreadedHostNode):
+    """Converts frames to the BGR layout a network needs, keeping their metadata.
+
+    Timestamps, sequence number and transformation of each input frame are
+    copied to its converted frame. See `FrameConverter` for the supported input
+    types and the normalization of temperature frames.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.input = self.createInput()
+        self.out = self.createOutput()
+        self._frame_type = dai.ImgFrame.Type.BGR888p
+        self._converter = FrameConverter()
+
+    def build(
+        self,
+        frames: dai.Node.Output,
+        frame_type: dai.ImgFrame.Type = dai.ImgFrame.Type.BGR888p,
+        temperature_range: Optional[Tuple[float, float]] = None,
+    ) -> "FrameAdapter":
+        if frame_type not in (dai.ImgFrame.Type.BGR888p, dai.ImgFrame.Type.BGR888i):
+            raise ValueError("Frame type must be BGR888p or BGR888i.")
+        frames.link(self.input)
+        self._frame_type = frame_type
+        self._converter = FrameConverter(
+            planar=frame_type == dai.ImgFrame.Type.BGR888p,
+            temperature_range=temperature_range,
+        )
+        return self
+
+    def run(self) -> None:
+        while self.isRunning():
+            frame: dai.ImgFrame = self.input.get()
+            width, height = frame.getWidth(), frame.getHeight()
+            bgr = self._converter.convert(
+                frame.getData(), frame.getType().name, width, height, frame.getStride()
+            )
+
+            converted = dai.ImgFrame()
+            converted.setData(bgr)
+            converted.setWidth(width)
+            converted.setHeight(height)
+            converted.setStride(width if self._converter.planar else 3 * width)
+            converted.setType(self._frame_type)
+            converted.setTimestamp(frame.getTimestamp())
+            converted.setTimestampDevice(frame.getTimestampDevice())
+            converted.setSequenceNum(frame.getSequenceNum())
+            converted.setTransformation(frame.getTransformation())
+            self.out.send(converted)
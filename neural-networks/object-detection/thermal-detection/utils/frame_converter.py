@@ -0,0 +1,125 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# ImgFrame types the converter reads, by the name of the type
+COLOR_TYPES = ("YUV422i", "NV12")
+GRAY_TYPES = ("GRAY8", "RAW8")
+TEMPERATURE_TYPES = ("GRAYF16", "RAW16")
+
+
+class FrameConverter:
+    """Converts raw frame buffers to the planar or interleaved BGR a network needs.
+
+    YUV422i and NV12 frames are converted with a single color conversion, gray
+    frames are only copied to the three channels. 16-bit radiometric frames
+    (GRAYF16 in degrees Celsius, or RAW16 counts converted with
+    `celsius = raw * raw_scale + raw_offset`) are mapped to 8 bits through a
+    lookup table over all 65536 codes, with `temperature_range` (min, max) in
+    degrees Celsius spread over 0..255, so that a temperature looks the same in
+    every frame. Without a range each frame is stretched to its own minimum and
+    maximum. All buffers are kept between calls.
+    """
+
+    def __init__(
+        self,
+        planar: bool = True,
+        temperature_range: Optional[Tuple[float, float]] = None,
+        raw_scale: float = 1.0,
+        raw_offset: float = 0.0,
+    ) -> None:
+        if temperature_range is not None and not (
+            temperature_range[0] < temperature_range[1]
+        ):
+            raise ValueError("Temperature range must be (min, max) with min < max.")
+        self.planar = planar
+        self.temperature_range = temperature_range
+        codes = np.arange(1 << 16, dtype=np.uint16)
+        self._celsius = {
+            "GRAYF16": codes.view(np.float16).astype(np.float32),
+            "RAW16": codes * np.float32(raw_scale) + np.float32(raw_offset),
+        }
+        self._luts = {}
+        if temperature_range is not None:
+            low, high = temperature_range
+            for frame_type, celsius in self._celsius.items():
+                # Infinite and NaN codes of float16 become 255 and 0
+                with np.errstate(invalid="ignore"):
+                    scaled = (celsius - low) * (255 / (high - low))
+                self._luts[frame_type] = np.nan_to_num(
+                    np.clip(np.round(scaled), 0, 255), nan=0
+                ).astype(np.uint8)
+        self._shape: Optional[Tuple[int, int]] = None
+
+    def _allocate(self, width: int, height: int) -> None:
+        if self._shape == (height, width):
+            return
+        self._shape = (height, width)
+        self._gray = np.empty((height, width), np.uint8)
+        self._temperature = np.empty((height, width), np.float32)
+        self._bgr = np.empty((height, width, 3), np.uint8)
+        self._planar = np.empty((3, height, width), np.uint8)
+
+    def convert(
+        self,
+        data: np.ndarray,
+        frame_type: str,
+        width: int,
+        height: int,
+        stride: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return the frame as BGR, (3, H, W) if planar else (H, W, 3).
+
+        `data` are the raw bytes of the frame and `stride` the bytes per row, by
+        default the width times the bytes per pixel. The returned array is
+        reused by the next call.
+        """
+        self._allocate(width, height)
+        data = np.asarray(data, dtype=np.uint8).ravel()
+
+        if frame_type in COLOR_TYPES:
+            if frame_type == "YUV422i":
+                yuyv = _rows(data, height, stride or 2 * width, 2 * width)
+                cv2.cvtColor(
+                    yuyv.reshape(height, width, 2), cv2.COLOR_YUV2BGR_YUYV, self._bgr
+                )
+            else:
+                nv12 = _rows(data, height * 3 // 2, stride or width, width)
+                cv2.cvtColor(nv12, cv2.COLOR_YUV2BGR_NV12, self._bgr)
+            if not self.planar:
+                return self._bgr
+            cv2.split(self._bgr, list(self._planar))
+            return self._planar
+
+        if frame_type in GRAY_TYPES:
+            gray = _rows(data, height, stride or width, width)
+        elif frame_type in TEMPERATURE_TYPES:
+            codes = _rows(data, height, stride or 2 * width, 2 * width)
+            codes = np.ascontiguousarray(codes).view(np.uint16)
+            gray = self._gray
+            if self.temperature_range is not None:
+                np.take(self._luts[frame_type], codes, out=gray)
+            else:
+                np.take(self._celsius[frame_type], codes, out=self._temperature)
+                cv2.normalize(
+                    self._temperature,
+                    gray,
+                    0,
+                    255,
+                    cv2.NORM_MINMAX,
+                    cv2.CV_8U,
+                )
+        else:
+            raise ValueError(f"Unsupported frame type {frame_type}.")
+
+        if not self.planar:
+            return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, self._bgr)
+        for channel in range(3):
+            np.copyto(self._planar[channel], gray)
+        return self._planar
+
+
+def _rows(data: np.ndarray, rows: int, stride: int, row_bytes: int) -> np.ndarray:
+    """The rows of an image in a buffer, without the padding at their ends."""
+    return data[: rows * stride].reshape(rows, stride)[:, :row_bytes]
@@ -0,0 +1,145 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.overlay_renderer import OverlayRenderer
+
+parser = argparse.ArgumentParser(
+    description="Host time of the road and lane overlay on synthetic masks, the "
+    "former colormap path against the lookup table renderer, at the model "
+    "resolution and when drawn over larger frames.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--frames", default=50, type=int)
+parser.add_argument(
+    "-m",
+    "--mask_size",
+    default=[320, 320],
+    nargs=2,
+    type=int,
+    help="Resolution of the segmentation masks.",
+)
+args = parser.parse_args()
+
+# As in the annotation node
+RAINBOW = cv2.applyColorMap(np.arange(256, dtype=np.uint8), cv2.COLORMAP_RAINBOW)
+ROAD_COLOR = tuple(int(c) for c in RAINBOW[0, 127])
+LANE_COLOR = tuple(int(c) for c in RAINBOW[0, 255])
+ALPHAS = (0.5, 0.6)
+SIZES = {
+    "mask": tuple(args.mask_size),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def make_masks(with_lanes=True):
+    """Road (1) in a trapezoid in the lower half, lane lines (1) across it."""
+    w, h = args.mask_size
+    road = np.zeros((h, w), np.int16)
+    trapezoid = np.array(
+        [(0.1 * w, h), (0.9 * w, h), (0.6 * w, 0.5 * h), (0.4 * w, 0.5 * h)],
+        np.int32,
+    )
+    cv2.fillPoly(road, [trapezoid], 1)
+    road[: h // 4] = -1
+    lane = np.zeros((h, w), np.int16)
+    if with_lanes:
+        for x in (0.3, 0.5, 0.7):
+            top = (int((0.45 + 0.1 * x) * w), h // 2)
+            cv2.line(lane, (int(x * w), h - 1), top, 1, 3)
+    return road, lane
+
+
+def legacy(frame, road, lane):
+    """The former path: rescales the present classes to a rainbow colormap."""
+    mask = road.copy()
+    mask[lane > 0] = 2
+    unique_values = np.unique(mask[mask >= 0])
+    scaled_mask = np.zeros_like(mask, dtype=np.uint8)
+    if unique_values.size != 0:
+        min_val, max_val = unique_values.min(), unique_values.max()
+        if min_val == max_val:
+            scaled_mask = np.ones_like(mask, dtype=np.uint8) * 255
+        else:
+            scaled_mask = ((mask - min_val) / (max_val - min_val) * 255).astype(
+                np.uint8
+            )
+        scaled_mask[mask == -1] = 0
+    colored_mask = cv2.applyColorMap(scaled_mask, cv2.COLORMAP_RAINBOW)
+    colored_mask[mask == 0] = [0, 0, 0]
+    colored_mask[mask == -1] = [0, 0, 0]
+    frame_height, frame_width, _ = frame.shape
+    colored_mask = cv2.resize(
+        colored_mask, (frame_width, frame_height), interpolation=cv2.INTER_AREA
+    )
+    return cv2.addWeighted(frame, 0.8, colored_mask, 0.5, 0)
+
+
+def reference(frame, road, lane):
+    """The renderer's blend in floating point, with nearest neighbour masks."""
+    h, w = frame.shape[:2]
+    out = frame.astype(np.float32)
+    for mask, color, alpha in (
+        (road, ROAD_COLOR, ALPHAS[0]),
+        (lane, LANE_COLOR, ALPHAS[1]),
+    ):
+        selected = cv2.resize(
+            (mask == 1).astype(np.uint8), (w, h), interpolation=cv2.INTER_NEAREST
+        ).astype(bool)
+        out[selected] = out[selected] * (1 - alpha) + np.array(color) * alpha
+    return out
+
+
+def timed(function, *inputs):
+    """Median time of one call in milliseconds."""
+    function(*inputs)
+    times = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        function(*inputs)
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times))
+
+
+renderer = OverlayRenderer([{1: (ROAD_COLOR, ALPHAS[0])}, {1: (LANE_COLOR, ALPHAS[1])}])
+road, lane = make_masks()
+print(f"Masks {args.mask_size[0]}x{args.mask_size[1]}, {args.frames} frames each")
+for name, (width, height) in SIZES.items():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (height, width, 3), np.uint8)
+    legacy_ms = timed(legacy, frame, road, lane)
+    renderer_ms = timed(lambda: renderer.render(frame, (road, lane)))
+
+    # Away from the class edges, where resizing blends neighbouring classes
+    edges = cv2.resize(
+        cv2.morphologyEx(
+            (road + 2 * lane).astype(np.uint8),
+            cv2.MORPH_GRADIENT,
+            np.ones((3, 3), np.uint8),
+        ),
+        (width, height),
+        interpolation=cv2.INTER_NEAREST,
+    )
+    error = np.abs(
+        renderer.render(frame, (road, lane)).astype(np.float32)
+        - reference(frame, road, lane)
+    )[edges == 0]
+    print(
+        f"{name:>5}: former {legacy_ms:6.2f} ms, renderer {renderer_ms:5.2f} ms "
+        f"({legacy_ms / renderer_ms:4.1f}x), largest error off edges {error.max():.0f}"
+    )
+
+# The former colormap was scaled to the classes present in each frame
+black = np.zeros(tuple(args.mask_size[::-1]) + (3,), np.uint8)
+for with_lanes in (True, False):
+    road, lane = make_masks(with_lanes)
+    y, x = np.argwhere(road == 1)[-1]
+    former = legacy(black, road, lane)[y, x].tolist()
+    fixed = renderer.render(black, (road, lane))[y, x].tolist()
+    print(
+        f"road color {'with' if with_lanes else 'without':>7} lanes: "
+        f"former {tuple(former)}, renderer {tuple(fixed)}"
+    )
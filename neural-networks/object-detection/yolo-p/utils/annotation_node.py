@@ -4,6 +4,13 @@ from depthai_nodes import ImgDetectionsExtended, SegmentationMask
 import cv2
 import numpy as np
 
+from utils.overlay_renderer import OverlayRenderer
+
+# Colors the road and the lanes had when both were in view, now fixed per class
+RAINBOW = cv2.applyColorMap(np.arange(256, dtype=np.uint8), cv2.COLORMAP_RAINBOW)
+ROAD_COLOR = tuple(int(c) for c in RAINBOW[0, 127])
+LANE_COLOR = tuple(int(c) for c in RAINBOW[0, 255])
+
 
 class AnnotationNode(dai.node.HostNode):
     def __init__(
@@ -12,6 +19,9 @@ class AnnotationNode(dai.node.HostNode):
         super().__init__()
         self.out_segmentations = self.createOutput()
         self.out_detections = self.createOutput()
+        self._renderer = OverlayRenderer(
+            [{1: (ROAD_COLOR, 0.5)}, {1: (LANE_COLOR, 0.6)}]
+        )
 
     def build(
         self,
@@ -40,35 +50,11 @@ class AnnotationNode(dai.node.HostNode):
         frame = frame.getCvFrame()
         output_frame = dai.ImgFrame()
 
-        mask = road_segmentations_message.mask
-
-        lane_segmentation_mask = lane_segmentations_message.mask > 0
-        mask[lane_segmentation_mask] = 2
-
-        unique_values = np.unique(mask[mask >= 0])
-        scaled_mask = np.zeros_like(mask, dtype=np.uint8)
-
-        if unique_values.size != 0:
-            min_val, max_val = unique_values.min(), unique_values.max()
-
-            if min_val == max_val:
-                scaled_mask = np.ones_like(mask, dtype=np.uint8) * 255
-            else:
-                scaled_mask = ((mask - min_val) / (max_val - min_val) * 255).astype(
-                    np.uint8
-                )
-            scaled_mask[mask == -1] = 0
-        colored_mask = cv2.applyColorMap(scaled_mask, cv2.COLORMAP_RAINBOW)
-        colored_mask[mask == 0] = [0, 0, 0]
-        colored_mask[mask == -1] = [0, 0, 0]
-
-        frame_height, frame_width, _ = frame.shape
-        colored_mask = cv2.resize(
-            colored_mask, (frame_width, frame_height), interpolation=cv2.INTER_AREA
+        colored_frame = self._renderer.render(
+            frame,
+            (road_segmentations_message.mask, lane_segmentations_message.mask),
         )
 
-        colored_frame = cv2.addWeighted(frame, 0.8, colored_mask, 0.5, 0)
-
         output_frame.setTimestamp(detections_message.getTimestamp())
         output_frame.setSequenceNum(detections_message.getSequenceNum())
 
@@ -0,0 +1,126 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Color = Tuple[int, int, int]
+Layer = Dict[int, Tuple[Color, float]]
+
+
+class OverlayRenderer:
+    """Draws class masks over frames with a fixed color and opacity per class.
+
+    Each layer maps class ids of one mask to a BGR color and an alpha. Classes not
+    in a layer, and the -1 of pixels without a class, are transparent. The layers
+    are turned into two lookup tables each, the color premultiplied by alpha and
+    the inverse alpha, and applied at the mask resolution, later layers drawn over
+    earlier ones. Only the bounding box of the drawn classes is then resized to the
+    frame, the inverse alpha as a single channel, and blended as
+    `frame * (1 - alpha) + color * alpha` into a reused output buffer. The rest of
+    the frame is copied as is.
+    """
+
+    def __init__(self, layers: Sequence[Layer]) -> None:
+        if not layers:
+            raise ValueError("At least one layer is needed.")
+        self._color_luts = []
+        self._inverse_luts = []
+        for layer in layers:
+            color_lut = np.zeros((1, 256, 3), np.uint8)
+            inverse_lut = np.full((1, 256), 255, np.uint8)
+            for class_id, (color, alpha) in layer.items():
+                # -1 wraps around to 255 when the mask is cast to uint8
+                if not 0 <= class_id < 255:
+                    raise ValueError(f"Class id {class_id} is not in [0, 254].")
+                if not 0 <= alpha <= 1:
+                    raise ValueError(f"Alpha {alpha} is not in [0, 1].")
+                color_lut[0, class_id] = np.round(np.array(color) * alpha)
+                inverse_lut[0, class_id] = round(255 * (1 - alpha))
+            self._color_luts.append(color_lut)
+            self._inverse_luts.append(inverse_lut)
+
+        self._mask_shape: Optional[Tuple[int, ...]] = None
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+
+    def _allocate(self, mask_shape: Tuple[int, ...], frame_shape: Tuple[int, ...]):
+        if mask_shape != self._mask_shape:
+            self._mask_shape = mask_shape
+            h, w = mask_shape
+            self._ids = np.empty((h, w, 3), np.uint8)
+            self._color = np.empty((h, w, 3), np.uint8)
+            self._inverse = np.empty((h, w), np.uint8)
+            self._layer_color = np.empty((h, w, 3), np.uint8)
+            self._layer_inverse = np.empty((h, w), np.uint8)
+            self._layer_inverse_bgr = np.empty((h, w, 3), np.uint8)
+            self._frame_shape = None
+        if frame_shape != self._frame_shape:
+            self._frame_shape = frame_shape
+            self._out = np.empty(frame_shape, np.uint8)
+            self._frame_color = np.empty(frame_shape, np.uint8)
+            self._frame_inverse = np.empty(frame_shape[:2], np.uint8)
+            self._frame_inverse_bgr = np.empty(frame_shape, np.uint8)
+
+    def _lookup(self, mask: np.ndarray, layer: int, color, inverse) -> None:
+        ids = mask if mask.dtype == np.uint8 else mask.astype(np.uint8)
+        cv2.merge((ids, ids, ids), dst=self._ids)
+        cv2.LUT(self._ids, self._color_luts[layer], dst=color)
+        cv2.LUT(ids, self._inverse_luts[layer], dst=inverse)
+
+    def render(self, frame: np.ndarray, masks: Sequence[np.ndarray]) -> np.ndarray:
+        """Return the BGR frame with one mask per layer drawn over it.
+
+        All masks must have the same size. The returned array is reused by the
+        next call.
+        """
+        if len(masks) != len(self._color_luts):
+            raise ValueError(
+                f"Expected {len(self._color_luts)} masks, got {len(masks)}."
+            )
+        self._allocate(masks[0].shape[:2], frame.shape)
+
+        self._lookup(masks[0], 0, self._color, self._inverse)
+        for layer, mask in enumerate(masks[1:], start=1):
+            self._lookup(mask, layer, self._layer_color, self._layer_inverse)
+            # Over operator on premultiplied colors, still at the mask resolution
+            cv2.cvtColor(
+                self._layer_inverse, cv2.COLOR_GRAY2BGR, self._layer_inverse_bgr
+            )
+            cv2.multiply(self._color, self._layer_inverse_bgr, self._color, 1 / 255)
+            cv2.add(self._color, self._layer_color, self._color)
+            cv2.multiply(self._inverse, self._layer_inverse, self._inverse, 1 / 255)
+
+        np.copyto(self._out, frame)
+        x, y, box_w, box_h = cv2.boundingRect(cv2.bitwise_not(self._inverse))
+        if box_w == 0 or box_h == 0:
+            return self._out
+
+        # One mask pixel of margin, so that edges fade out as in a full resize
+        mask_h, mask_w = self._mask_shape
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        x1, y1 = min(x + box_w + 1, mask_w), min(y + box_h + 1, mask_h)
+        h, w = frame.shape[:2]
+        rows = slice(round(y0 * h / mask_h), round(y1 * h / mask_h))
+        cols = slice(round(x0 * w / mask_w), round(x1 * w / mask_w))
+        roi_h, roi_w = rows.stop - rows.start, cols.stop - cols.start
+        color = self._color[y0:y1, x0:x1]
+        inverse = self._inverse[y0:y1, x0:x1]
+        if (roi_h, roi_w) != (y1 - y0, x1 - x0):
+            color = cv2.resize(
+                color,
+                (roi_w, roi_h),
+                self._frame_color[:roi_h, :roi_w],
+                interpolation=cv2.INTER_LINEAR,
+            )
+            inverse = cv2.resize(
+                inverse,
+                (roi_w, roi_h),
+                self._frame_inverse[:roi_h, :roi_w],
+                interpolation=cv2.INTER_LINEAR,
+            )
+        inverse_bgr = self._frame_inverse_bgr[:roi_h, :roi_w]
+
+        roi = self._out[rows, cols]
+        cv2.cvtColor(inverse, cv2.COLOR_GRAY2BGR, inverse_bgr)
+        cv2.multiply(frame[rows, cols], inverse_bgr, roi, 1 / 255)
+        cv2.add(roi, color, roi)
+        return self._out
@@ -0,0 +1,162 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import onnx
+import onnxruntime
+from onnx import TensorProto, helper
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+from utils.text_embeddings import QUANT_VALUES, TextEmbedder
+
+parser = argparse.ArgumentParser(
+    description="Offline check and timing of the cached text embeddings with a dummy "
+    "tokenizer and text model, against the former path that loads the tokenizer "
+    "and the model for every vocabulary.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "--vocab_size",
+    default=49408,
+    type=int,
+    help="Tokens of the dummy model, as many as CLIP has by default.",
+)
+parser.add_argument("--dim", default=512, type=int)
+parser.add_argument("-r", "--repeats", default=5, type=int)
+args = parser.parse_args()
+
+QUANT = QUANT_VALUES["yolo-world-l"]
+WORDS = ["person", "chair", "TV", "car", "dog", "cat", "bottle", "cup", "barrel"]
+
+
+def make_tokenizer(path):
+    vocab = {"<|endoftext|>": 0, "[UNK]": 1}
+    vocab.update({word: i + 2 for i, word in enumerate(WORDS + ["red", "big"])})
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(path))
+
+
+def make_model(path):
+    """Mean of the token embeddings under the attention mask."""
+    rng = np.random.default_rng(0)
+    table = rng.normal(0, 0.05, (args.vocab_size, args.dim)).astype(np.float32)
+    nodes = [
+        helper.make_node("Gather", ["table", "input_ids"], ["tokens"]),
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["mask", "last"], ["mask3"]),
+        helper.make_node("Mul", ["tokens", "mask3"], ["masked"]),
+        helper.make_node("ReduceSum", ["masked", "one"], ["summed"], keepdims=0),
+        helper.make_node("ReduceSum", ["mask3", "one"], ["count"], keepdims=0),
+        helper.make_node("Div", ["summed", "count"], ["text_embeds"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "dummy_text_model",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, [None, None]),
+            helper.make_tensor_value_info(
+                "attention_mask", TensorProto.INT64, [None, None]
+            ),
+        ],
+        [helper.make_tensor_value_info("text_embeds", TensorProto.FLOAT, None)],
+        [
+            helper.make_tensor("table", TensorProto.FLOAT, table.shape, table.ravel()),
+            helper.make_tensor("last", TensorProto.INT64, [1], [-1]),
+            helper.make_tensor("one", TensorProto.INT64, [1], [1]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def former(model_path, tokenizer_path, class_names, max_num_classes=80):
+    """The former extract_text_embeddings, without the downloads."""
+    tokenizer = Tokenizer.from_file(str(tokenizer_path))
+    tokenizer.enable_padding(
+        pad_id=tokenizer.token_to_id("<|endoftext|>"), pad_token="<|endoftext|>"
+    )
+    encodings = tokenizer.encode_batch(class_names)
+    text_onnx = np.array([e.ids for e in encodings], dtype=np.int64)
+    attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+    session_textual = onnxruntime.InferenceSession(
+        str(model_path), providers=["CPUExecutionProvider"]
+    )
+    textual_output = session_textual.run(
+        None,
+        {
+            session_textual.get_inputs()[0].name: text_onnx,
+            "attention_mask": attention_mask,
+        },
+    )[0]
+    num_padding = max_num_classes - len(class_names)
+    text_features = np.pad(
+        textual_output, ((0, num_padding), (0, 0)), mode="constant"
+    ).T.reshape(1, args.dim, max_num_classes)
+    text_features = (text_features / QUANT["quant_scale"]) + QUANT["quant_zero_point"]
+    text_features = text_features.astype("uint8")
+    del session_textual
+    return text_features
+
+
+def timed(function, *inputs):
+    """Median time of one call in milliseconds."""
+    times = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        result = function(*inputs)
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times)), result
+
+
+with tempfile.TemporaryDirectory() as directory:
+    directory = Path(directory)
+    model_path = directory / "clip_textual_hf.onnx"
+    tokenizer_path = directory / "tokenizer.json"
+    make_model(model_path)
+    make_tokenizer(tokenizer_path)
+    print(
+        f"Dummy text model with {args.vocab_size} tokens of {args.dim} values, "
+        f"{model_path.stat().st_size / 1e6:.0f} MB"
+    )
+
+    try:
+        TextEmbedder(directory / "empty", offline=True)
+        raise AssertionError("Offline mode must fail on missing files")
+    except FileNotFoundError as error:
+        print(f"Offline with missing files: {type(error).__name__}")
+
+    start = time.perf_counter()
+    embedder = TextEmbedder(directory, offline=True, providers=["CPUExecutionProvider"])
+    start_ms = 1000 * (time.perf_counter() - start)
+    print(f"Start up, hashing the model once: {start_ms:.0f} ms")
+
+    vocabularies = [WORDS[:3], WORDS[2:6], ["red car", "big dog", "cup"], WORDS]
+    for class_names in vocabularies:
+        former_ms, expected = timed(former, model_path, tokenizer_path, class_names)
+        start = time.perf_counter()
+        embedder.text_features(class_names, **QUANT)
+        first_ms = 1000 * (time.perf_counter() - start)
+        cached_ms, features = timed(
+            lambda names: embedder.text_features(names, **QUANT), class_names
+        )
+        # The former path truncated, the new one rounds
+        difference = np.abs(features.astype(int) - expected.astype(int)).max()
+        assert difference <= 1, difference
+        print(
+            f"{', '.join(class_names)}: former {former_ms:.1f} ms, first "
+            f"{first_ms:.1f} ms, cached {cached_ms:.2f} ms, largest difference "
+            f"{difference}"
+        )
+
+    start = time.perf_counter()
+    restarted = TextEmbedder(directory, offline=True)
+    restarted.text_features(WORDS, **QUANT)
+    print(
+        f"New embedder, as after a restart, all cached: start up and features "
+        f"{1000 * (time.perf_counter() - start):.2f} ms, text model loaded: "
+        f"{restarted._session is not None}"
+    )
@@ -6,7 +6,7 @@ from depthai_nodes.node import (
     ImgDetectionsFilter,
 )
 
-from utils.helper_functions import extract_text_embeddings
+from utils.text_embeddings import QUANT_VALUES, TextEmbedder
 from utils.arguments import initialize_argparser
 from utils.annotation_node import AnnotationNode
 
@@ -23,15 +23,10 @@ frame_type = (
     dai.ImgFrame.Type.BGR888i if platform == "RVC4" else dai.ImgFrame.Type.BGR888p
 )
 
-text_features = extract_text_embeddings(
-    class_names=args.class_names, max_num_classes=MAX_NUM_CLASSES
+embedder = TextEmbedder(
+    cache_dir=Path(__file__).parent / args.cache_dir, offline=args.offline
 )
 
-if len(args.class_names) > MAX_NUM_CLASSES:
-    raise ValueError(
-        f"Number of classes exceeds the maximum number of classes: {MAX_NUM_CLASSES}"
-    )
-
 if args.fps_limit is None:
     args.fps_limit = 30
     print(
@@ -48,6 +43,16 @@ with dai.Pipeline(device) as pipeline:
     model_nn_archive = dai.NNArchive(dai.getModelFromZoo(model_description))
     model_w, model_h = model_nn_archive.getInputSize()
 
+    # INT8 archives take quantized text features, others float16
+    model_name = model_description.model.split("/")[-1].split(":")[0]
+    quant_values = QUANT_VALUES.get(model_name, {})
+    text_features = embedder.text_features(
+        args.class_names, max_num_classes=MAX_NUM_CLASSES, **quant_values
+    )
+    text_data_type = (
+        dai.TensorInfo.DataType.U8F if quant_values else dai.TensorInfo.DataType.FP16
+    )
+
     # media/camera input
     if args.media_path:
         replay = pipeline.create(dai.node.ReplayVideo)
@@ -100,7 +105,7 @@ with dai.Pipeline(device) as pipeline:
     visualizer.registerPipeline(pipeline)
 
     inputNNData = dai.NNData()
-    inputNNData.addTensor("texts", text_features, dataType=dai.TensorInfo.DataType.U8F)
+    inputNNData.addTensor("texts", text_features, dataType=text_data_type)
     textInputQueue.send(inputNNData)
 
     print("Press 'q' to stop")
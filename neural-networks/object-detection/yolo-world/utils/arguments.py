@@ -51,6 +51,21 @@ def initialize_argparser():
         type=float,
     )
 
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory of the text model, the tokenizer and the cached class name "
+        "embeddings, relative to this example.",
+        default="cache",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--offline",
+        help="Do not download the text model and the tokenizer, fail if they are "
+        "not in the cache directory.",
+        action="store_true",
+    )
+
     args = parser.parse_args()
 
     return parser, args
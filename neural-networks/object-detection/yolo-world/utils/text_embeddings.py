@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import onnxruntime
+import requests
+from tokenizers import Tokenizer
+
+TOKENIZER_URL = (
+    "https://huggingface.co/openai/clip-vit-base-patch32/resolve/main/tokenizer.json"
+)
+TEXT_MODEL_URL = "https://huggingface.co/jmzzomg/clip-vit-base-patch32-text-onnx/resolve/main/model.onnx"
+
+# Quantization of the text input of the INT8 archives, by model name
+QUANT_VALUES = {
+    "yolo-world-l": {"quant_scale": 0.003925696481, "quant_zero_point": 90.0},
+}
+
+PathLike = Union[str, os.PathLike]
+
+
+class TextEmbedder:
+    """CLIP text embeddings of class prompts, as the YOLO-World text input.
+
+    The embedding of each prompt is cached on disk, in a file named by the hash
+    of the prompt, the text model and the tokenizer, so a vocabulary seen once
+    is embedded again without running the text model. The tokenizer and the
+    ONNX Runtime session are created once, the session only on the first prompt
+    that is not cached.
+
+    Missing model files are downloaded to their paths, unless `offline` is set,
+    in which case a missing file raises `FileNotFoundError` right away.
+    """
+
+    def __init__(
+        self,
+        cache_dir: PathLike,
+        model_path: Optional[PathLike] = None,
+        tokenizer_path: Optional[PathLike] = None,
+        model_url: str = TEXT_MODEL_URL,
+        tokenizer_url: str = TOKENIZER_URL,
+        offline: bool = False,
+        providers: Sequence[str] = (
+            "TensorrtExecutionProvider",
+            "CUDAExecutionProvider",
+            "CPUExecutionProvider",
+        ),
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.model_path = fetch(
+            model_url, model_path or self.cache_dir / "clip_textual_hf.onnx", offline
+        )
+        tokenizer_path = fetch(
+            tokenizer_url, tokenizer_path or self.cache_dir / "tokenizer.json", offline
+        )
+        self._providers = [
+            provider
+            for provider in providers
+            if provider in onnxruntime.get_available_providers()
+        ]
+        self._session: Optional[onnxruntime.InferenceSession] = None
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id("<|endoftext|>"),
+            pad_token="<|endoftext|>",
+        )
+        self._key = file_hash(self.model_path, self.cache_dir) + file_hash(
+            tokenizer_path, self.cache_dir
+        )
+
+    def _cache_path(self, prompt: str) -> Path:
+        digest = hashlib.sha256((self._key + prompt).encode("utf-8")).hexdigest()
+        return self.cache_dir / "embeddings" / f"{digest}.npy"
+
+    def embed(self, prompts: Sequence[str]) -> np.ndarray:
+        """Float32 (N, D) embeddings of the prompts."""
+        embeddings: Dict[str, np.ndarray] = {}
+        missing = []
+        for prompt in dict.fromkeys(prompts):
+            path = self._cache_path(prompt)
+            if path.exists():
+                embeddings[prompt] = np.load(path)
+            else:
+                missing.append(prompt)
+
+        if missing:
+            for prompt, embedding in zip(missing, self._run(missing)):
+                embeddings[prompt] = embedding
+                _save_atomic(self._cache_path(prompt), embedding)
+        return np.stack([embeddings[prompt] for prompt in prompts])
+
+    def _run(self, prompts: List[str]) -> np.ndarray:
+        if self._session is None:
+            self._session = onnxruntime.InferenceSession(
+                str(self.model_path), providers=self._providers
+            )
+        encodings = self.tokenizer.encode_batch(prompts)
+        inputs = {
+            self._session.get_inputs()[0].name: np.array(
+                [e.ids for e in encodings], dtype=np.int64
+            )
+        }
+        if "attention_mask" in (i.name for i in self._session.get_inputs()):
+            inputs["attention_mask"] = np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            )
+        return self._session.run(None, inputs)[0].astype(np.float32)
+
+    def text_features(
+        self,
+        prompts: Sequence[str],
+        max_num_classes: int = 80,
+        quant_scale: Optional[float] = None,
+        quant_zero_point: Optional[float] = None,
+    ) -> np.ndarray:
+        """The (1, D, max_num_classes) text input of the model.
+
+        Quantized to uint8 if `quant_scale` and `quant_zero_point` are given,
+        else float16.
+        """
+        if len(prompts) > max_num_classes:
+            raise ValueError(
+                f"Number of classes exceeds the maximum number of classes: {max_num_classes}"
+            )
+        embeddings = self.embed(prompts)
+        features = np.zeros((1, embeddings.shape[1], max_num_classes), np.float32)
+        features[0, :, : len(prompts)] = embeddings.T
+        if quant_scale is None or quant_zero_point is None:
+            return features.astype(np.float16)
+        quantized = np.round(features / quant_scale + quant_zero_point)
+        return np.clip(quantized, 0, 255).astype(np.uint8)
+
+
+def fetch(url: str, path: PathLike, offline: bool = False) -> Path:
+    """Download the file to the path unless it is there already."""
+    path = Path(path)
+    if path.exists():
+        return path
+    if offline:
+        raise FileNotFoundError(
+            f"{path} is missing and downloads are disabled. Run once online or "
+            f"download {url} to that path."
+        )
+    print(f"Downloading {url}...")
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_bytes(response.content)
+    os.replace(temporary, path)
+    return path
+
+
+def file_hash(path: PathLike, cache_dir: PathLike) -> str:
+    """SHA-256 of the file, remembered in the cache directory by size and mtime."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    index_path = Path(cache_dir) / "hashes.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+    key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    if key not in index:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        index[key] = digest.hexdigest()
+        temporary = index_path.with_name(index_path.name + ".tmp")
+        temporary.write_text(json.dumps(index, indent=2))
+        os.replace(temporary, index_path)
+    return index[key]
+
+
+def _save_atomic(path: Path, array: np.ndarray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.stem + ".tmp.npy")
+    np.save(temporary, array)
+    os.replace(temporary, path)
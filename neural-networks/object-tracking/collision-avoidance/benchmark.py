@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import numpy as np
+from utils.trajectory_engine import TrajectoryEngine
+
+parser = argparse.ArgumentParser(
+    description="Measure per-frame cost of the trajectory engine on synthetic tracks.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "-t",
+    "--tracks",
+    default=[1, 8, 32, 64, 128],
+    nargs="+",
+    type=int,
+    help="Numbers of simultaneous tracks to benchmark.",
+)
+parser.add_argument(
+    "-f", "--frames", default=3000, type=int, help="Number of frames per run."
+)
+parser.add_argument(
+    "-l",
+    "--lifetime",
+    default=60,
+    type=int,
+    help="Average number of frames before a track disappears and a new ID appears.",
+)
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+FPS = 30
+
+for num_tracks in args.tracks:
+    engine = TrajectoryEngine(max_tracks=max(64, num_tracks))
+    ids = np.arange(num_tracks)
+    next_id = num_tracks
+    positions = np.column_stack(
+        [rng.uniform(-3000, 3000, num_tracks), rng.uniform(2000, 15000, num_tracks)]
+    )
+    velocities = rng.normal(0, 50, (num_tracks, 2))
+
+    durations = np.empty(args.frames)
+    for frame in range(args.frames):
+        positions += velocities + rng.normal(0, 10, positions.shape)
+        # Churn: tracks disappear and get replaced by new IDs
+        removed = rng.random(num_tracks) < 1 / args.lifetime
+
+        start = time.perf_counter()
+        slots = engine.update(
+            ids, positions[:, 0], positions[:, 1], frame / FPS, removed
+        )
+        engine.fit(slots)
+        durations[frame] = time.perf_counter() - start
+
+        new = np.flatnonzero(removed)
+        ids[new] = np.arange(next_id, next_id + len(new))
+        next_id += len(new)
+
+    print(
+        f"{num_tracks:4d} tracks: mean {durations.mean() * 1e3:.3f} ms, "
+        f"p99 {np.percentile(durations, 99) * 1e3:.3f} ms per frame, "
+        f"{next_id} IDs seen, {len(engine)} tracks buffered"
+    )
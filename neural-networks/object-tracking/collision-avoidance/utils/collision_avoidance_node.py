@@ -4,9 +4,10 @@ import depthai as dai
 from depthai_nodes.utils import AnnotationHelper
 from depthai_nodes import SECONDARY_COLOR
 
-import math
 import cv2
 
+from utils.trajectory_engine import TrajectoryEngine
+
 MAX_X = 5000  # mm
 MAX_Z = 15000
 
@@ -14,7 +15,7 @@ MAX_Z = 15000
 class CollisionAvoidanceNode(dai.node.HostNode):
     def __init__(self):
         super().__init__()
-        self.object_coordinates = {}
+        self.trajectories = TrajectoryEngine(max_tracks=64, window=10, max_age=2.0)
         self.out_direction = self.createOutput()
 
     def build(
@@ -25,30 +26,6 @@ class CollisionAvoidanceNode(dai.node.HostNode):
         self.link_args(rgb, tracker_out)
         return self
 
-    def moving_forward(self, tracklet_id, moving_threshold=100):
-        z_values = self.object_coordinates[tracklet_id]["z"]
-        if len(z_values) < 2:
-            return False
-        if z_values[-1] < z_values[0] - moving_threshold:
-            return True
-        return False
-
-    def calculate_metrics(self, tracklet_id):
-        x1 = self.object_coordinates[tracklet_id]["x"][0]
-        z1 = self.object_coordinates[tracklet_id]["z"][0]
-        x2 = self.object_coordinates[tracklet_id]["x"][-1]
-        z2 = self.object_coordinates[tracklet_id]["z"][-1]
-        timestamp1 = self.object_coordinates[tracklet_id]["timestamp"][0]
-        timestamp2 = self.object_coordinates[tracklet_id]["timestamp"][-1]
-        lf_distance = math.sqrt(math.pow(x1 - x2, 2) + math.pow(z1 - z2, 2))
-        if lf_distance == 0:
-            return 0, 0, 0
-        timed = timestamp2 - timestamp1
-        speed = lf_distance / timed  # m/s
-        target_distance = math.sqrt(math.pow(x2, 2) + math.pow(z2, 2))
-        tti = target_distance / speed
-        return speed, target_distance, tti
-
     def draw_line_cv2(
         self, mbs, width=400, height=400, line_color=(0, 255, 0), thickness=2
     ):
@@ -87,60 +64,48 @@ class CollisionAvoidanceNode(dai.node.HostNode):
 
         mbs = []
 
-        for tracklet in tracklets.tracklets:
+        timestamp = tracklets.getTimestamp().total_seconds()
+        tracklet_list = tracklets.tracklets
+        slots = self.trajectories.update(
+            ids=np.array([t.id for t in tracklet_list], dtype=np.int64),
+            xs=np.array([t.spatialCoordinates.x for t in tracklet_list]),
+            zs=np.array([t.spatialCoordinates.z for t in tracklet_list]),
+            timestamp=timestamp,
+            removed=np.array(
+                [
+                    t.status == dai.Tracklet.TrackingStatus.REMOVED
+                    for t in tracklet_list
+                ],
+                dtype=bool,
+            ),
+        )
+        metrics = self.trajectories.fit(slots)
+
+        for i, tracklet in enumerate(tracklet_list):
             xmin = tracklet.roi.topLeft().x
             ymin = tracklet.roi.topLeft().y
             xmax = tracklet.roi.bottomRight().x
             ymax = tracklet.roi.bottomRight().y
 
-            if tracklet.id not in self.object_coordinates:
-                self.object_coordinates[tracklet.id] = {
-                    "x": [tracklet.spatialCoordinates.x],
-                    "z": [tracklet.spatialCoordinates.z],
-                    "timestamp": [tracklets.getTimestamp().total_seconds()],
-                }
-            else:
-                self.object_coordinates[tracklet.id]["x"].append(
-                    tracklet.spatialCoordinates.x
-                )
-                self.object_coordinates[tracklet.id]["z"].append(
-                    tracklet.spatialCoordinates.z
-                )
-                self.object_coordinates[tracklet.id]["timestamp"].append(
-                    tracklets.getTimestamp().total_seconds()
-                )
-
-            if len(self.object_coordinates[tracklet.id]["x"]) > 10:
+            if metrics["valid"][i]:
                 # we have enough data to fit a line
-                self.object_coordinates[tracklet.id]["x"].pop(0)
-                self.object_coordinates[tracklet.id]["z"].pop(0)
-                try:
-                    m, b = np.polyfit(
-                        self.object_coordinates[tracklet.id]["x"],
-                        self.object_coordinates[tracklet.id]["z"],
-                        1,
-                    )
-                    distance = abs(b) / math.sqrt(math.pow(m, 2) + 1)
-                    mbs.append((m, b))
+                mbs.append((metrics["m"][i], metrics["b"][i]))
 
-                    speed, target_distance, tti = self.calculate_metrics(tracklet.id)
+                annotation_helper.draw_text(
+                    text=f"Speed: {metrics['speed'][i]}\nTarget Distance: {metrics['target_distance'][i]}\nTTI: {metrics['tti'][i]}",
+                    position=(xmin + 0.01, ymin + 0.12),
+                    color=SECONDARY_COLOR,
+                    size=8,
+                )
+
+                if metrics["distance"][i] < 200 and metrics["moving_forward"][i]:
                     annotation_helper.draw_text(
-                        text=f"Speed: {speed}\nTarget Distance: {target_distance}\nTTI: {tti}",
-                        position=(xmin + 0.01, ymin + 0.12),
-                        color=SECONDARY_COLOR,
-                        size=8,
+                        text="DANGER",
+                        position=(0.3, 0.6),
+                        color=(1, 0, 0, 1),
+                        size=64,
                     )
 
-                    if distance < 200 and self.moving_forward(tracklet.id):
-                        annotation_helper.draw_text(
-                            text="DANGER",
-                            position=(0.3, 0.6),
-                            color=(1, 0, 0, 1),
-                            size=64,
-                        )
-                except np.linalg.LinAlgError:
-                    pass
-
             annotation_helper.draw_rectangle(
                 top_left=(xmin, ymin),
                 bottom_right=(xmax, ymax),
@@ -0,0 +1,146 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class TrajectoryEngine:
+    """Fixed-size ring buffers of (x, z, timestamp) samples for a bounded set of tracks.
+
+    All live tracks are stored in preallocated (max_tracks, window) arrays, so memory
+    does not depend on how many track IDs were seen over time. Tracks are evicted when
+    the tracker reports them as removed, when they were not updated for `max_age`
+    seconds or, if the buffer is full, the least recently updated track makes room for
+    a new one. Trajectory lines of all tracks are fitted in a single vectorized pass.
+    """
+
+    def __init__(
+        self, max_tracks: int = 64, window: int = 10, max_age: float = 2.0
+    ) -> None:
+        self.max_tracks = max_tracks
+        self.window = window
+        self.max_age = max_age
+
+        self._x = np.zeros((max_tracks, window), dtype=np.float64)
+        self._z = np.zeros((max_tracks, window), dtype=np.float64)
+        self._t = np.zeros((max_tracks, window), dtype=np.float64)
+        self._count = np.zeros(max_tracks, dtype=np.int64)
+        self._head = np.zeros(max_tracks, dtype=np.int64)
+        self._last_seen = np.full(max_tracks, -np.inf)
+        self._slot_ids = np.full(max_tracks, -1, dtype=np.int64)
+        self._slots: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def update(
+        self,
+        ids: np.ndarray,
+        xs: np.ndarray,
+        zs: np.ndarray,
+        timestamp: float,
+        removed: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Append one sample per track and return the buffer slot of every track.
+
+        @param ids: Track IDs of shape (N,).
+        @param xs: X coordinates of shape (N,).
+        @param zs: Z coordinates of shape (N,).
+        @param timestamp: Timestamp of the samples in seconds.
+        @param removed: Optional boolean mask of tracks that the tracker removed, their
+            slots are released after this update.
+        """
+        self._evict_stale(timestamp)
+
+        slots = np.array([self._slot_for(int(i), timestamp) for i in ids], np.int64)
+        if len(slots):
+            head = self._head[slots]
+            self._x[slots, head] = xs
+            self._z[slots, head] = zs
+            self._t[slots, head] = timestamp
+            self._head[slots] = (head + 1) % self.window
+            self._count[slots] = np.minimum(self._count[slots] + 1, self.window)
+            self._last_seen[slots] = timestamp
+
+        if removed is not None and removed.any():
+            for slot in slots[removed]:
+                self._release(int(slot))
+        return slots
+
+    def fit(
+        self, slots: np.ndarray, moving_threshold: float = 100
+    ) -> Dict[str, np.ndarray]:
+        """Fit z = m * x + b through the full windows of the given slots at once.
+
+        Returns a dict of arrays of the same length as `slots`: `valid` (window is full
+        and the fit is well defined), `m`, `b`, `distance` (closest distance of the
+        line to the camera), `speed`, `target_distance`, `tti` (time to impact) and
+        `moving_forward`.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        x, z, t = self._x[slots], self._z[slots], self._t[slots]
+        n = len(slots)
+        rows = np.arange(n)
+        oldest = np.where(self._count[slots] == self.window, self._head[slots], 0)
+        newest = (self._head[slots] - 1) % self.window
+
+        x_centered = x - x.mean(axis=1, keepdims=True)
+        z_mean = z.mean(axis=1)
+        sxx = np.sum(x_centered**2, axis=1)
+        valid = (self._count[slots] == self.window) & (sxx > 1e-9)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            m = np.where(
+                valid, np.sum(x_centered * (z - z_mean[:, None]), axis=1) / sxx, 0.0
+            )
+        b = z_mean - m * x.mean(axis=1)
+        distance = np.abs(b) / np.sqrt(m**2 + 1)
+
+        x1, z1, t1 = x[rows, oldest], z[rows, oldest], t[rows, oldest]
+        x2, z2, t2 = x[rows, newest], z[rows, newest], t[rows, newest]
+        travelled = np.hypot(x2 - x1, z2 - z1)
+        target_distance = np.hypot(x2, z2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = np.where((travelled > 0) & (t2 > t1), travelled / (t2 - t1), 0.0)
+            tti = np.where(speed > 0, target_distance / speed, 0.0)
+        target_distance = np.where(travelled > 0, target_distance, 0.0)
+
+        return {
+            "valid": valid,
+            "m": m,
+            "b": b,
+            "distance": distance,
+            "speed": speed,
+            "target_distance": target_distance,
+            "tti": tti,
+            "moving_forward": (self._count[slots] >= 2) & (z2 < z1 - moving_threshold),
+        }
+
+    def _slot_for(self, track_id: int, timestamp: float) -> int:
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            return slot
+        free = np.flatnonzero(self._slot_ids == -1)
+        if len(free):
+            slot = int(free[0])
+        else:
+            # Buffer is full, reuse the least recently updated track
+            slot = int(np.argmin(self._last_seen))
+            self._release(slot)
+        self._slots[track_id] = slot
+        self._slot_ids[slot] = track_id
+        self._count[slot] = 0
+        self._head[slot] = 0
+        self._last_seen[slot] = timestamp
+        return slot
+
+    def _release(self, slot: int) -> None:
+        track_id = int(self._slot_ids[slot])
+        if track_id != -1:
+            del self._slots[track_id]
+        self._slot_ids[slot] = -1
+        self._count[slot] = 0
+        self._last_seen[slot] = -np.inf
+
+    def _evict_stale(self, timestamp: float) -> None:
+        stale = (self._slot_ids != -1) & (timestamp - self._last_seen > self.max_age)
+        for slot in np.flatnonzero(stale):
+            self._release(int(slot))
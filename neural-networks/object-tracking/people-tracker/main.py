@@ -69,7 +69,11 @@ with dai.Pipeline(device) as pipeline:
     )
 
     people_counter = pipeline.create(PeopleCounter).build(
-        tracklets=tracker.out, threshold=args.threshold
+        tracklets=tracker.out,
+        threshold=args.threshold,
+        zones_path=args.zones,
+        lost_timeout=args.lost_timeout,
+        counts_path=args.counts_path,
     )
 
     # visualization
@@ -87,3 +91,5 @@ with dai.Pipeline(device) as pipeline:
         if key == ord("q"):
             print("Got q key. Exiting...")
             break
+
+    people_counter.save_counts()
@@ -42,6 +42,33 @@ def initialize_argparser():
         help="Minimum distance the person has to move (across the x/y axis) to be considered a real movement.",
     )
 
+    parser.add_argument(
+        "-z",
+        "--zones",
+        help="Path to a JSON file with additional line and polygon zones to count people in.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
+    parser.add_argument(
+        "-lt",
+        "--lost_timeout",
+        help="Number of frames a lost person is kept before their movement is counted and they are forgotten.",
+        required=False,
+        default=10,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-c",
+        "--counts_path",
+        help="Path to a JSON file the counts are saved to and restored from on start. If not set, counts are not persisted.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
     args = parser.parse_args()
 
     return parser, args
@@ -0,0 +1,440 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+logger = logging.getLogger(__name__)
+
+
+class TrackStatus(Enum):
+    NEW = 0
+    TRACKED = 1
+    LOST = 2
+    REMOVED = 3
+
+
+class Track:
+    """Constant size state of one tracklet.
+
+    Instead of the whole centroid history only the first, last, mean and
+    exponentially smoothed positions are kept, all updated in O(1).
+    """
+
+    __slots__ = (
+        "start",
+        "last",
+        "mean",
+        "smoothed",
+        "updates",
+        "lost_frames",
+        "last_frame",
+        "zone_states",
+    )
+
+    def __init__(self, point: Point, frame: int) -> None:
+        self.start = point
+        self.last = point
+        self.mean = point
+        self.smoothed = point
+        self.updates = 1
+        self.lost_frames = 0
+        self.last_frame = frame
+        self.zone_states: List = []
+
+    def add(self, point: Point, smoothing: float) -> None:
+        self.updates += 1
+        x, y = point
+        mean_x, mean_y = self.mean
+        self.mean = (
+            mean_x + (x - mean_x) / self.updates,
+            mean_y + (y - mean_y) / self.updates,
+        )
+        smooth_x, smooth_y = self.smoothed
+        self.smoothed = (
+            smooth_x + smoothing * (x - smooth_x),
+            smooth_y + smoothing * (y - smooth_y),
+        )
+        self.last = point
+
+
+class LineZone:
+    """Counts tracks crossing the segment from `start` to `end`.
+
+    A track crosses when its mean position and its new position lie on opposite
+    sides of the line and the new position is within the extent of the segment.
+    Each track is counted at most once. The first label counts crossings to the
+    right-hand side of the line looking from `start` to `end` (in image
+    coordinates), the second one crossings to its left-hand side.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        start: Point,
+        end: Point,
+        labels: Sequence[str] = ("forward", "backward"),
+    ) -> None:
+        if start == end:
+            raise ValueError(f"Line zone '{name}' needs two different points.")
+        if len(labels) != 2:
+            raise ValueError(f"Line zone '{name}' needs two labels.")
+        self.name = name
+        self.points = [tuple(start), tuple(end)]
+        self.closed = False
+        self.labels = tuple(labels)
+        self._start = tuple(start)
+        self._direction = (end[0] - start[0], end[1] - start[1])
+        self._length2 = self._direction[0] ** 2 + self._direction[1] ** 2
+
+    def _side(self, point: Point) -> float:
+        dx, dy = self._direction
+        return dx * (point[1] - self._start[1]) - dy * (point[0] - self._start[0])
+
+    def initial_state(self, track: Track) -> bool:
+        return False
+
+    def update(self, track: Track, counted: bool, point: Point):
+        if counted:
+            return counted, None
+        before = self._side(track.mean)
+        after = self._side(point)
+        if not (before < 0 < after or after < 0 < before):
+            return counted, None
+        dx, dy = self._direction
+        t = dx * (point[0] - self._start[0]) + dy * (point[1] - self._start[1])
+        if not 0 <= t <= self._length2:
+            return counted, None
+        return True, self.labels[0] if after > 0 else self.labels[1]
+
+    def finish(self, track: Track, counted: bool) -> Optional[str]:
+        return None
+
+
+class PolygonZone:
+    """Counts tracks entering and leaving a polygon.
+
+    Membership is tested on the exponentially smoothed track position and a
+    change has to hold for `confirm_frames` updates, so a track jittering on the
+    border is not counted repeatedly. A track that appears inside the polygon is
+    not counted as entering it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        points: Sequence[Point],
+        labels: Sequence[str] = ("in", "out"),
+        confirm_frames: int = 3,
+    ) -> None:
+        if len(points) < 3:
+            raise ValueError(f"Polygon zone '{name}' needs at least 3 points.")
+        if len(labels) != 2:
+            raise ValueError(f"Polygon zone '{name}' needs two labels.")
+        self.name = name
+        self.points = [tuple(p) for p in points]
+        self.closed = True
+        self.labels = tuple(labels)
+        self.confirm_frames = confirm_frames
+        self._edges = list(zip(self.points, self.points[1:] + self.points[:1]))
+
+    def contains(self, point: Point) -> bool:
+        x, y = point
+        inside = False
+        for (x1, y1), (x2, y2) in self._edges:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+    def initial_state(self, track: Track) -> Tuple[bool, int]:
+        # Whether the track is inside and for how many updates it seems otherwise
+        return self.contains(track.smoothed), 0
+
+    def update(self, track: Track, state: Tuple[bool, int], point: Point):
+        inside, pending = state
+        # Zones see the track before the new point is added, one frame behind
+        if self.contains(track.smoothed) == inside:
+            return (inside, 0) if pending else state, None
+        if pending + 1 < self.confirm_frames:
+            return (inside, pending + 1), None
+        return (not inside, 0), self.labels[1] if inside else self.labels[0]
+
+    def finish(self, track: Track, state: Tuple[bool, int]) -> Optional[str]:
+        return None
+
+
+class DirectionZone:
+    """Counts the main direction of the whole movement of a track when it ends.
+
+    The movement from the first to the last position must be longer than
+    `threshold` along its dominant axis.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: float,
+        labels: Sequence[str] = ("up", "down", "left", "right"),
+    ) -> None:
+        if len(labels) != 4:
+            raise ValueError(f"Direction zone '{name}' needs four labels.")
+        self.name = name
+        self.points = []
+        self.closed = False
+        self.threshold = threshold
+        self.labels = tuple(labels)
+
+    def initial_state(self, track: Track) -> None:
+        return None
+
+    def update(self, track: Track, state: None, point: Point):
+        return state, None
+
+    def finish(self, track: Track, state: None) -> Optional[str]:
+        up, down, left, right = self.labels
+        dx = track.last[0] - track.start[0]
+        dy = track.last[1] - track.start[1]
+        if abs(dx) > abs(dy) and abs(dx) > self.threshold:
+            return left if dx < 0 else right
+        if abs(dy) > abs(dx) and abs(dy) > self.threshold:
+            return up if dy < 0 else down
+        return None
+
+
+class CountingEngine:
+    """Counts tracklets passing through a set of zones.
+
+    Memory and per-frame cost depend only on the number of live tracks. A track is
+    finished and forgotten when it is removed by the tracker, when it stays lost
+    for more than `lost_timeout` frames or when it is not reported for
+    `stale_frames` frames. At most `max_tracks` tracks are kept, the least
+    recently updated ones are finished first.
+
+    If `counts_path` is set, counts are loaded from it on start and written to it
+    atomically at most every `save_interval` seconds when they change. These
+    periodic writes run on a background thread, so a slow disk never stalls
+    `update()`.
+    """
+
+    def __init__(
+        self,
+        zones: Sequence,
+        lost_timeout: int = 10,
+        stale_frames: int = 300,
+        max_tracks: int = 512,
+        smoothing: float = 0.5,
+        counts_path: Optional[str] = None,
+        save_interval: float = 5.0,
+    ) -> None:
+        names = [zone.name for zone in zones]
+        if len(set(names)) != len(names):
+            raise ValueError("Zone names must be unique.")
+        if not 0 < smoothing <= 1:
+            raise ValueError("Smoothing must be in (0, 1].")
+        self.zones = list(zones)
+        self.lost_timeout = lost_timeout
+        self.stale_frames = stale_frames
+        self.max_tracks = max_tracks
+        self.smoothing = smoothing
+        self.counts_path = Path(counts_path) if counts_path else None
+        self.save_interval = save_interval
+
+        self.counts: Dict[str, Dict[str, int]] = {
+            zone.name: dict.fromkeys(zone.labels, 0) for zone in self.zones
+        }
+        self._tracks: "OrderedDict[int, Track]" = OrderedDict()
+        self._frame = 0
+        self._dirty = False
+        self._last_save = time.monotonic()
+        # Snapshots are numbered so an older one never overwrites a newer one
+        self._snapshot_version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        self._writer_cond = threading.Condition()
+        self._pending_snapshot: Optional[Tuple[int, Dict[str, Dict[str, int]]]] = None
+        self._writer: Optional[threading.Thread] = None
+        if self.counts_path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def update(
+        self, observations: Iterable[Tuple[int, TrackStatus, Point]]
+    ) -> List[Tuple[int, str, str]]:
+        """Process the (track id, status, centroid) observations of one frame.
+
+        Returns the (track id, zone name, label) of every count made.
+        """
+        self._frame += 1
+        events = []
+        for track_id, status, point in observations:
+            track = self._tracks.get(track_id)
+            if status is TrackStatus.NEW and track is not None:
+                # The tracker reused the id, the previous track has ended
+                self._finish(track_id, events)
+                track = None
+            if track is None:
+                # Lost and removed tracks are not restarted after eviction
+                if status is TrackStatus.LOST or status is TrackStatus.REMOVED:
+                    continue
+                self._start(track_id, point)
+                continue
+
+            for i, zone in enumerate(self.zones):
+                state, label = zone.update(track, track.zone_states[i], point)
+                track.zone_states[i] = state
+                if label is not None:
+                    self._count(track_id, zone, label, events)
+            track.add(point, self.smoothing)
+            track.last_frame = self._frame
+            self._tracks.move_to_end(track_id)
+
+            if status is TrackStatus.LOST:
+                track.lost_frames += 1
+                if track.lost_frames > self.lost_timeout:
+                    self._finish(track_id, events)
+            elif status is TrackStatus.REMOVED:
+                self._finish(track_id, events)
+            else:
+                track.lost_frames = 0
+
+        self._evict(events)
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self._save_in_background()
+        return events
+
+    def _start(self, track_id: int, point: Point) -> None:
+        track = Track(point, self._frame)
+        track.zone_states = [zone.initial_state(track) for zone in self.zones]
+        self._tracks[track_id] = track
+
+    def _evict(self, events: list) -> None:
+        # Tracks are ordered by their last update, the stale ones are at the front
+        oldest = self._frame - self.stale_frames
+        while self._tracks:
+            track_id, track = next(iter(self._tracks.items()))
+            if track.last_frame > oldest and len(self._tracks) <= self.max_tracks:
+                break
+            self._finish(track_id, events)
+
+    def _finish(self, track_id: int, events: list) -> None:
+        track = self._tracks.pop(track_id)
+        for zone, state in zip(self.zones, track.zone_states):
+            label = zone.finish(track, state)
+            if label is not None:
+                self._count(track_id, zone, label, events)
+
+    def _count(self, track_id: int, zone, label: str, events: list) -> None:
+        self.counts[zone.name][label] += 1
+        self._dirty = True
+        events.append((track_id, zone.name, label))
+
+    def load(self) -> None:
+        """Restore the counts of the configured zones from `counts_path`."""
+        if self.counts_path is None or not self.counts_path.exists():
+            return
+        try:
+            with open(self.counts_path) as f:
+                saved = json.load(f)["counts"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Starting from zero would overwrite the saved counts on the next save
+            raise ValueError(
+                f"Could not load counts from {self.counts_path}: {e}. "
+                "Fix or remove the file to start counting from zero."
+            ) from e
+        for name, counts in saved.items():
+            for label, count in counts.items():
+                if label in self.counts.get(name, {}):
+                    self.counts[name][label] = int(count)
+
+    def save(self) -> None:
+        """Write the counts to `counts_path` now, e.g. when the app stops.
+
+        The file is written next to the target and renamed over it, so a crash
+        leaves either the previous or the new counts, never a partial file.
+        """
+        if self.counts_path is None:
+            return
+        with self._writer_cond:
+            snapshot = self._snapshot()
+        self._write(snapshot)
+
+    def _snapshot(self) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        self._snapshot_version += 1
+        self._dirty = False
+        self._last_save = time.monotonic()
+        counts = {name: dict(labels) for name, labels in self.counts.items()}
+        return self._snapshot_version, counts
+
+    def _save_in_background(self) -> None:
+        if self.counts_path is None:
+            return
+        with self._writer_cond:
+            # Only the latest snapshot is worth writing
+            self._pending_snapshot = self._snapshot()
+            self._writer_cond.notify()
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="counts-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._writer_cond:
+                while self._pending_snapshot is None:
+                    self._writer_cond.wait()
+                snapshot, self._pending_snapshot = self._pending_snapshot, None
+            try:
+                self._write(snapshot)
+            except OSError as e:
+                logger.error(f"Could not save counts to {self.counts_path}: {e}")
+
+    def _write(self, snapshot: Tuple[int, Dict[str, Dict[str, int]]]) -> None:
+        version, counts = snapshot
+        with self._write_lock:
+            if version <= self._written_version:
+                return
+            tmp_path = self.counts_path.with_name(self.counts_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"counts": counts, "saved_at": time.time()}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.counts_path)
+            self._written_version = version
+
+
+def load_zones(path: str, reserved_names: Sequence[str] = ()) -> list:
+    """Load line and polygon zones from a JSON file.
+
+    The file holds a list of zones with normalized coordinates, e.g.
+    `[{"name": "door", "type": "line", "points": [[0.5, 0], [0.5, 1]],
+    "labels": ["left", "right"]}, {"name": "shelf", "type": "polygon",
+    "points": [[0.1, 0.1], [0.4, 0.1], [0.4, 0.4]]}]`. Zones may not use any of
+    `reserved_names`, which belong to zones the app adds itself.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    zones = []
+    for i, zone in enumerate(config):
+        name = zone.get("name", f"zone {i + 1}")
+        if name in reserved_names:
+            raise ValueError(f"Zone name '{name}' in {path} is reserved.")
+        points = [tuple(p) for p in zone["points"]]
+        kwargs = {"labels": zone["labels"]} if "labels" in zone else {}
+        if zone["type"] == "line":
+            if len(points) != 2:
+                raise ValueError(f"Line zone '{name}' needs exactly 2 points.")
+            zones.append(LineZone(name, points[0], points[1], **kwargs))
+        elif zone["type"] == "polygon":
+            zones.append(PolygonZone(name, points, **kwargs))
+        else:
+            raise ValueError(f"Unknown zone type '{zone['type']}' of zone '{name}'.")
+    return zones
@@ -1,28 +1,58 @@
 from datetime import timedelta
+from typing import Optional
 
 import depthai as dai
 
 from depthai_nodes.utils import AnnotationHelper
 
+from .counting_engine import CountingEngine, DirectionZone, TrackStatus, load_zones
+
+TRACK_STATUS = {
+    dai.Tracklet.TrackingStatus.NEW: TrackStatus.NEW,
+    dai.Tracklet.TrackingStatus.TRACKED: TrackStatus.TRACKED,
+    dai.Tracklet.TrackingStatus.LOST: TrackStatus.LOST,
+    dai.Tracklet.TrackingStatus.REMOVED: TrackStatus.REMOVED,
+}
+# Name of the built-in direction counter, not available to zones from --zones
+DIRECTION_ZONE = "people"
+
 
 class PeopleCounter(dai.node.HostNode):
     def __init__(self) -> None:
         super().__init__()
-        self.tracking_data = {}
-        # Y axis (up/down), X axis (left/right)
-        self.counter = {"up": 0, "down": 0, "left": 0, "right": 0}
+        self._engine: Optional[CountingEngine] = None
         self.output = self.createOutput(
             possibleDatatypes=[
                 dai.Node.DatatypeHierarchy(dai.DatatypeEnum.ImgFrame, True)
             ]
         )
 
-    def build(self, tracklets: dai.Node.Output, threshold: float) -> "PeopleCounter":
+    def build(
+        self,
+        tracklets: dai.Node.Output,
+        threshold: float,
+        zones_path: str = None,
+        lost_timeout: int = 10,
+        counts_path: str = None,
+    ) -> "PeopleCounter":
         self.link_args(tracklets)
 
-        self._threshold = threshold
+        # Y axis (up/down), X axis (left/right) of the whole movement of a person
+        zones = [DirectionZone(DIRECTION_ZONE, threshold)]
+        if zones_path is not None:
+            zones += load_zones(zones_path, reserved_names=[DIRECTION_ZONE])
+        self._engine = CountingEngine(
+            zones, lost_timeout=lost_timeout, counts_path=counts_path
+        )
         return self
 
+    @property
+    def counter(self):
+        return self._engine.counts[DIRECTION_ZONE]
+
+    def save_counts(self) -> None:
+        self._engine.save()
+
     def process(self, tracklets: dai.Tracklets) -> None:
         self.update(tracklets)
         annots = self.get_img_annotations(
@@ -31,33 +61,15 @@ class PeopleCounter(dai.node.HostNode):
         self.out.send(annots)
 
     def update(self, tracklets: dai.Tracklets) -> None:
-        for t in tracklets.tracklets:
-            id = str(t.id)
-            centroid = get_centroid(t.roi)
-
-            # New tracklet, save its centroid
-            if t.status == dai.Tracklet.TrackingStatus.NEW:
-                self.tracking_data[id] = {}  # Reset
-                self.tracking_data[id]["coords"] = centroid
-
-            elif t.status == dai.Tracklet.TrackingStatus.TRACKED:
-                self.tracking_data[id]["lost_count"] = 0
-
-            elif t.status == dai.Tracklet.TrackingStatus.LOST:
-                self.tracking_data[id]["lost_count"] += 1
-
-                # Removes tracklet that has been lost for more than 10 frames
-                if (
-                    self.tracking_data[id]["lost_count"] > 10
-                    and "lost" not in self.tracking_data[id]
-                ):
-                    self.terminate_tracklet(id, centroid)
-                    self.tracking_data[id]["lost"] = True
-
-            elif (
-                t.status == dai.Tracklet.TrackingStatus.REMOVED
-            ) and "lost" not in self.tracking_data[id]:
-                self.terminate_tracklet(id, centroid)
+        events = self._engine.update(
+            (t.id, TRACK_STATUS[t.status], get_centroid(t.roi))
+            for t in tracklets.tracklets
+        )
+        for _, zone, label in events:
+            if zone == DIRECTION_ZONE:
+                print(f"Person moved {label}")
+            else:
+                print(f"Person counted {label} in {zone}")
 
     def get_img_annotations(self, timestamp: timedelta, sequence_num: int):
         annotation_helper = AnnotationHelper()
@@ -68,28 +80,27 @@ class PeopleCounter(dai.node.HostNode):
             size=25,
         )
 
+        for i, zone in enumerate(self._engine.zones[1:]):
+            if zone.closed:
+                annotation_helper.draw_polyline(zone.points, closed=True)
+            else:
+                annotation_helper.draw_line(*zone.points)
+            counts = ", ".join(
+                f"{label.capitalize()}: {count}"
+                for label, count in self._engine.counts[zone.name].items()
+            )
+            annotation_helper.draw_text(
+                text=f"{zone.name}: {counts}",
+                position=(0.05, 0.12 + 0.06 * i),
+                size=20,
+            )
+
         annotations = annotation_helper.build(
             timestamp=timestamp,
             sequence_num=sequence_num,
         )
         return annotations
 
-    def terminate_tracklet(self, id, coords_end):
-        coords_start = self.tracking_data[id]["coords"]
-
-        dx = coords_end[0] - coords_start[0]
-        dy = coords_end[1] - coords_start[1]
-
-        if abs(dx) > abs(dy) and abs(dx) > self._threshold:
-            direction = "left" if dx < 0 else "right"
-            self.counter[direction] += 1
-            print(f"Person moved {direction}")
-
-        elif abs(dy) > abs(dx) and abs(dy) > self._threshold:
-            direction = "up" if dy < 0 else "down"
-            self.counter[direction] += 1
-            print(f"Person moved {direction}")
-
 
 def get_centroid(roi):
     x1 = roi.topLeft().x
@@ -8,8 +8,9 @@ from depthai_nodes import (
     SECONDARY_COLOR,
 )
 from depthai_nodes.utils import AnnotationHelper
+import numpy as np
 from typing import List
-from utils.gesture_recognition import recognize_gesture
+from utils.gesture_recognition import GestureSmoother
 
 
 class AnnotationNode(dai.node.HostNode):
@@ -25,6 +26,7 @@ class AnnotationNode(dai.node.HostNode):
         self.confidence_threshold = 0.5
         self.padding_factor = 0.1
         self.connection_pairs = [[]]
+        self.gesture_smoother = GestureSmoother()
 
     def build(
         self,
@@ -51,6 +53,8 @@ class AnnotationNode(dai.node.HostNode):
 
         annotation_helper = AnnotationHelper()
 
+        hands_keypoints = []
+        hands_labels = []
         for ix, detection in enumerate(detections_list):
             keypoints_msg: Keypoints = gathered_data.gathered[ix]["0"]
             confidence_msg: Predictions = gathered_data.gathered[ix]["1"]
@@ -106,25 +110,27 @@ class AnnotationNode(dai.node.HostNode):
 
             keypoints = [[kpt[0], kpt[1]] for kpt in zip(xs, ys)]
 
-            gesture = recognize_gesture(keypoints)
-
-            text = "Left" if handness < 0.5 else "Right"
-            text += f" {gesture}"
+            annotation_helper.draw_points(
+                points=keypoints, color=SECONDARY_COLOR, thickness=2
+            )
 
             text_x = detection.rotated_rect.center.x - 0.05
             text_y = detection.rotated_rect.center.y - height / 2 - 0.10
+            hands_keypoints.append(keypoints)
+            hands_labels.append(("Left" if handness < 0.5 else "Right", text_x, text_y))
 
+        # All hands are classified in one pass, then smoothed per hand over time
+        gestures = self.gesture_smoother.update(
+            np.array(hands_keypoints, dtype=np.float32).reshape(-1, 21, 2)
+        )
+        for (text, text_x, text_y), gesture in zip(hands_labels, gestures):
             annotation_helper.draw_text(
-                text=text,
+                text=f"{text} {gesture}",
                 position=(text_x, text_y),
                 color=SECONDARY_COLOR,
                 size=32,
             )
 
-            annotation_helper.draw_points(
-                points=keypoints, color=SECONDARY_COLOR, thickness=2
-            )
-
         new_dets.setTimestamp(detections_message.getTimestamp())
         new_dets.setSequenceNum(detections_message.getSequenceNum())
         self.out_detections.send(new_dets)
@@ -1,132 +1,140 @@
 import numpy as np
-from typing import List, Tuple
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
 
+# Finger states are 1 (extended), 0 (folded) or -1 (undetermined), ordered as
+# (thumb, index, middle, ring, little). Add entries here to support custom gestures.
+GESTURES: Dict[Tuple[int, int, int, int, int], str] = {
+    (1, 1, 1, 1, 1): "FIVE",
+    (0, 0, 0, 0, 0): "FIST",
+    (1, 0, 0, 0, 0): "OK",
+    (0, 1, 1, 0, 0): "PEACE",
+    (0, 1, 0, 0, 0): "ONE",
+    (1, 1, 0, 0, 0): "TWO",
+    (1, 1, 1, 0, 0): "THREE",
+    (0, 1, 1, 1, 1): "FOUR",
+}
 
-def distance(a, b):
-    return np.linalg.norm(a - b)
+# Keypoint indices of the (pip, dip, tip) joints of the index, middle, ring and little finger
+FINGER_PIPS = [6, 10, 14, 18]
+FINGER_DIPS = [7, 11, 15, 19]
+FINGER_TIPS = [8, 12, 16, 20]
 
 
-def angle(a, b, c):
+def angles(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Angles at b in degrees for (N, 2) arrays of points."""
     ba = a - b
     bc = c - b
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-    angle = np.arccos(cosine_angle)
-
-    return np.degrees(angle)
-
-
-def recognize_gesture(kpts: List[Tuple[float, float]]) -> str:
-    kpts = np.array(kpts)
-    d_3_5 = distance(kpts[3], kpts[5])
-    d_2_3 = distance(kpts[2], kpts[3])
-    angle0 = angle(kpts[0], kpts[1], kpts[2])
-    angle1 = angle(kpts[1], kpts[2], kpts[3])
-    angle2 = angle(kpts[2], kpts[3], kpts[4])
-    thumb_state = 0
-    index_state = 0
-    middle_state = 0
-    ring_state = 0
-    little_state = 0
-    gesture = None
-    if angle0 + angle1 + angle2 > 460 and d_3_5 / d_2_3 > 1.2:
-        thumb_state = 1
-    else:
-        thumb_state = 0
-
-    if kpts[8][1] < kpts[7][1] < kpts[6][1]:
-        index_state = 1
-    elif kpts[6][1] < kpts[8][1]:
-        index_state = 0
-    else:
-        index_state = -1
-
-    if kpts[12][1] < kpts[11][1] < kpts[10][1]:
-        middle_state = 1
-    elif kpts[10][1] < kpts[12][1]:
-        middle_state = 0
-    else:
-        middle_state = -1
-
-    if kpts[16][1] < kpts[15][1] < kpts[14][1]:
-        ring_state = 1
-    elif kpts[14][1] < kpts[16][1]:
-        ring_state = 0
-    else:
-        ring_state = -1
-
-    if kpts[20][1] < kpts[19][1] < kpts[18][1]:
-        little_state = 1
-    elif kpts[18][1] < kpts[20][1]:
-        little_state = 0
-    else:
-        little_state = -1
-
-    # Gesture
-    if (
-        thumb_state == 1
-        and index_state == 1
-        and middle_state == 1
-        and ring_state == 1
-        and little_state == 1
-    ):
-        gesture = "FIVE"
-    elif (
-        thumb_state == 0
-        and index_state == 0
-        and middle_state == 0
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "FIST"
-    elif (
-        thumb_state == 1
-        and index_state == 0
-        and middle_state == 0
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "OK"
-    elif (
-        thumb_state == 0
-        and index_state == 1
-        and middle_state == 1
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "PEACE"
-    elif (
-        thumb_state == 0
-        and index_state == 1
-        and middle_state == 0
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "ONE"
-    elif (
-        thumb_state == 1
-        and index_state == 1
-        and middle_state == 0
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "TWO"
-    elif (
-        thumb_state == 1
-        and index_state == 1
-        and middle_state == 1
-        and ring_state == 0
-        and little_state == 0
-    ):
-        gesture = "THREE"
-    elif (
-        thumb_state == 0
-        and index_state == 1
-        and middle_state == 1
-        and ring_state == 1
-        and little_state == 1
-    ):
-        gesture = "FOUR"
-    else:
-        gesture = None
-
-    return gesture
+    cosine_angle = np.sum(ba * bc, axis=-1) / (
+        np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    )
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def finger_states(kpts: np.ndarray) -> np.ndarray:
+    """Finger states of all hands at once.
+
+    @param kpts: Keypoints of shape (N_hands, 21, 2).
+    @return: Array of shape (N_hands, 5) with states of (thumb, index, middle, ring, little).
+    """
+    kpts = np.asarray(kpts, dtype=np.float32).reshape(-1, 21, 2)
+    states = np.empty((len(kpts), 5), dtype=np.int8)
+
+    thumb_angle = (
+        angles(kpts[:, 0], kpts[:, 1], kpts[:, 2])
+        + angles(kpts[:, 1], kpts[:, 2], kpts[:, 3])
+        + angles(kpts[:, 2], kpts[:, 3], kpts[:, 4])
+    )
+    d_3_5 = np.linalg.norm(kpts[:, 3] - kpts[:, 5], axis=-1)
+    d_2_3 = np.linalg.norm(kpts[:, 2] - kpts[:, 3], axis=-1)
+    states[:, 0] = (thumb_angle > 460) & (d_3_5 / d_2_3 > 1.2)
+
+    pip_y = kpts[:, FINGER_PIPS, 1]
+    dip_y = kpts[:, FINGER_DIPS, 1]
+    tip_y = kpts[:, FINGER_TIPS, 1]
+    states[:, 1:] = np.where(
+        (tip_y < dip_y) & (dip_y < pip_y), 1, np.where(pip_y < tip_y, 0, -1)
+    )
+    return states
+
+
+def recognize_gestures(kpts: np.ndarray) -> List[Optional[str]]:
+    """Classify gestures of all hands in an (N_hands, 21, 2) keypoint array."""
+    return [GESTURES.get(tuple(state)) for state in finger_states(kpts).tolist()]
+
+
+def recognize_gesture(kpts: List[Tuple[float, float]]) -> Optional[str]:
+    return recognize_gestures(np.array(kpts)[None])[0]
+
+
+class GestureSmoother:
+    """Suppresses gesture flicker by majority voting over the last frames of each hand.
+
+    Hands are associated across frames by the distance of their wrist keypoints, which
+    is enough for the handful of hands that can be in view at once.
+    """
+
+    def __init__(
+        self, window: int = 7, max_distance: float = 0.1, max_age: int = 10
+    ) -> None:
+        self.window = window
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self._next_id = 0
+        self._wrists = np.empty((0, 2), dtype=np.float32)
+        self._ids: List[int] = []
+        self._ages: List[int] = []
+        self._votes: Dict[int, Deque[Optional[str]]] = {}
+
+    def update(self, kpts: np.ndarray) -> List[Optional[str]]:
+        """Classify an (N_hands, 21, 2) keypoint array and return smoothed gestures."""
+        kpts = np.asarray(kpts, dtype=np.float32).reshape(-1, 21, 2)
+        gestures = recognize_gestures(kpts)
+        track_ids = self._associate(kpts[:, 0])
+
+        smoothed = []
+        for track_id, gesture in zip(track_ids, gestures):
+            votes = self._votes.setdefault(track_id, deque(maxlen=self.window))
+            votes.append(gesture)
+            smoothed.append(Counter(votes).most_common(1)[0][0])
+        return smoothed
+
+    def _associate(self, wrists: np.ndarray) -> List[int]:
+        assigned = [-1] * len(wrists)
+        matched_tracks = set()
+        if len(self._ids) and len(wrists):
+            dists = np.linalg.norm(wrists[:, None] - self._wrists[None], axis=-1)
+            # Greedy matching from the closest pair
+            for flat_idx in np.argsort(dists, axis=None):
+                hand, track = np.unravel_index(flat_idx, dists.shape)
+                if dists[hand, track] > self.max_distance:
+                    break
+                if assigned[hand] != -1 or track in matched_tracks:
+                    continue
+                assigned[hand] = self._ids[track]
+                matched_tracks.add(track)
+
+        ids, ages, positions = [], [], []
+        for track, track_id in enumerate(self._ids):
+            if track in matched_tracks:
+                continue
+            if self._ages[track] + 1 > self.max_age:
+                del self._votes[track_id]
+                continue
+            ids.append(track_id)
+            ages.append(self._ages[track] + 1)
+            positions.append(self._wrists[track])
+
+        for hand, track_id in enumerate(assigned):
+            if track_id == -1:
+                track_id = self._next_id
+                self._next_id += 1
+                assigned[hand] = track_id
+            ids.append(track_id)
+            ages.append(0)
+            positions.append(wrists[hand])
+
+        self._ids = ids
+        self._ages = ages
+        self._wrists = np.array(positions, dtype=np.float32).reshape(-1, 2)
+        return assigned
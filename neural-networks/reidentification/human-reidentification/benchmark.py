@@ -0,0 +1,133 @@
+import argparse
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from utils.embedding_gallery import EmbeddingGallery
+
+parser = argparse.ArgumentParser(
+    description="Simulate crowd traffic with synthetic embeddings and compare the "
+    "per-frame matching latency and identity purity of the bounded gallery with "
+    "the former unbounded per-embedding matching.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("--hours", default=1.0, type=float, help="Simulated duration.")
+parser.add_argument("--fps", default=10, type=int)
+parser.add_argument("--dim", default=512, type=int, help="Embedding size.")
+parser.add_argument(
+    "--arrivals", default=0.5, type=float, help="New people per second."
+)
+parser.add_argument(
+    "--dwell", default=[10, 60], nargs=2, type=float, help="Seconds in view."
+)
+parser.add_argument(
+    "--returning", default=0.2, type=float, help="Share of arrivals seen before."
+)
+parser.add_argument(
+    "--noise", default=0.9, type=float, help="Per-sample noise relative to identity."
+)
+parser.add_argument("--threshold", default=0.5, type=float)
+parser.add_argument("--gallery_size", default=256, type=int)
+parser.add_argument("--ttl", default=0.0, type=float)
+parser.add_argument(
+    "--legacy_frames",
+    default=3000,
+    type=int,
+    help="Frames to run the unbounded matching for, it slows down as it grows.",
+)
+parser.add_argument("--seed", default=0, type=int)
+args = parser.parse_args()
+
+
+class LegacyMatcher:
+    """The former matching: one cosine similarity per stored identity in Python,
+    the latest embedding replaces the stored one and nothing is ever removed."""
+
+    def __init__(self):
+        self._embeddings_dict = {}
+
+    def match(self, embeddings, threshold, now=None):
+        return [self._get_label(embedding, threshold) for embedding in embeddings]
+
+    def _get_label(self, embedding, threshold):
+        sim = [
+            self._cos_sim(embedding, self._embeddings_dict[key])
+            for key in self._embeddings_dict
+        ]
+        if sim and max(sim) >= threshold:
+            label = list(self._embeddings_dict.keys())[sim.index(max(sim))]
+        else:
+            label = len(self._embeddings_dict)
+        self._embeddings_dict[label] = embedding
+        return label
+
+    @staticmethod
+    def _cos_sim(x, y):
+        return float(np.dot(x, y) / (np.linalg.norm(x) * np.linalg.norm(y)))
+
+
+def simulate(n_frames):
+    """Yield (time, person ids, embeddings) for every frame."""
+    rng = np.random.default_rng(args.seed)
+    identities = []
+    in_view = {}  # person -> frame it leaves
+    for frame in range(n_frames):
+        for _ in range(rng.poisson(args.arrivals / args.fps)):
+            if identities and rng.random() < args.returning:
+                person = int(rng.integers(len(identities)))
+            else:
+                person = len(identities)
+                identity = rng.standard_normal(args.dim).astype(np.float32)
+                identities.append(identity / np.linalg.norm(identity))
+            in_view[person] = frame + int(rng.uniform(*args.dwell) * args.fps)
+        in_view = {p: leave for p, leave in in_view.items() if leave > frame}
+
+        people = list(in_view)
+        base = np.array([identities[p] for p in people]).reshape(-1, args.dim)
+        noise = rng.standard_normal(base.shape).astype(np.float32)
+        noise *= args.noise / np.sqrt(args.dim)
+        yield frame / args.fps, people, base + noise
+
+
+def run(name, matcher, n_frames, windows=6):
+    latencies = np.zeros(n_frames)
+    assigned = defaultdict(Counter)  # assigned identity -> true people
+    for frame, (now, people, embeddings) in enumerate(simulate(n_frames)):
+        start = time.perf_counter()
+        identities = matcher.match(embeddings, args.threshold, now=now)
+        latencies[frame] = time.perf_counter() - start
+        for identity, person in zip(identities, people):
+            assigned[identity][person] += 1
+
+    total = sum(sum(c.values()) for c in assigned.values())
+    purity = sum(max(c.values()) for c in assigned.values()) / max(total, 1)
+    people = {p for c in assigned.values() for p in c}
+    print(
+        f"{name}: {len(assigned)} identities for {len(people)} people, "
+        f"purity {100 * purity:.1f}%"
+    )
+    for window in np.array_split(np.arange(n_frames), windows):
+        minutes = window[-1] / args.fps / 60
+        chunk = 1000 * latencies[window]
+        print(
+            f"  up to {minutes:6.1f} min: mean {chunk.mean():7.3f} ms, "
+            f"p99 {np.percentile(chunk, 99):7.3f} ms per frame"
+        )
+
+
+n_frames = int(args.hours * 3600 * args.fps)
+print(
+    f"{args.arrivals} arrivals/s, {args.dwell[0]:g}-{args.dwell[1]:g} s in view, "
+    f"{args.fps} FPS, {args.dim}-d embeddings"
+)
+gallery = EmbeddingGallery(capacity=args.gallery_size, ttl=args.ttl)
+run(f"gallery ({args.gallery_size} slots)", gallery, n_frames)
+legacy_frames = min(args.legacy_frames, n_frames)
+run("unbounded per-embedding", LegacyMatcher(), legacy_frames)
+print(f"Same traffic, gallery over the first {legacy_frames} frames:")
+run(
+    f"gallery ({args.gallery_size} slots)",
+    EmbeddingGallery(capacity=args.gallery_size, ttl=args.ttl),
+    legacy_frames,
+)
@@ -123,7 +123,12 @@ with dai.Pipeline(device) as pipeline:
     det_nn.out.link(gather_data_node.input_reference)
 
     # idenfication
-    id_node = pipeline.create(IdentificationNode).build(gather_data_node.out, csim=CSIM)
+    id_node = pipeline.create(IdentificationNode).build(
+        gather_data_node.out,
+        csim=CSIM,
+        gallery_size=args.gallery_size,
+        ttl=args.ttl,
+    )
 
     # Visualizer
     visualizer.addTopic("Video", det_nn.passthrough, "images")
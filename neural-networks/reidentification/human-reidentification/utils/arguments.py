@@ -53,6 +53,24 @@ def initialize_argparser():
         type=float,
     )
 
+    parser.add_argument(
+        "-gs",
+        "--gallery_size",
+        help="Maximum number of remembered identities. When exceeded, the least recently seen identity is forgotten.",
+        required=False,
+        default=256,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-ttl",
+        "--ttl",
+        help="Seconds after which an identity that was not seen is forgotten. 0 keeps identities until they are evicted.",
+        required=False,
+        default=0.0,
+        type=float,
+    )
+
     args = parser.parse_args()
 
     return parser, args
@@ -0,0 +1,122 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmbeddingGallery:
+    """A bounded gallery of identities, each represented by an embedding prototype.
+
+    Prototypes are stored L2-normalized in a preallocated matrix, so all embeddings
+    of a frame are compared with all identities in one matrix product. A matched
+    identity's prototype is updated with a momentum average of its embeddings.
+    When the gallery is full, the least recently seen identity is evicted.
+    Identities not seen for `ttl` seconds are forgotten (0 keeps them).
+
+    Attributes
+    ----------
+    capacity : int
+        The maximum number of identities kept.
+    momentum : float
+        The weight of the prototype when averaging in a new embedding.
+    ttl : float
+        Seconds after which an unseen identity is forgotten.
+    """
+
+    def __init__(
+        self, capacity: int = 256, momentum: float = 0.9, ttl: float = 0.0
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("Gallery capacity must be at least 1.")
+        if not 0 <= momentum < 1:
+            raise ValueError("Momentum must be in [0, 1).")
+        self.capacity = capacity
+        self.momentum = momentum
+        self.ttl = ttl
+
+        self._prototypes: Optional[np.ndarray] = None  # Allocated on first use
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return int(self._active.sum())
+
+    def match(
+        self,
+        embeddings: np.ndarray,
+        threshold: float,
+        now: Optional[float] = None,
+    ) -> List[int]:
+        """Assign an identity to each of the (N, D) embeddings of one frame.
+
+        Embeddings are matched greedily by similarity, each identity at most once
+        per frame, as one object cannot appear twice in a frame. Embeddings without
+        a match above `threshold` get a new identity.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[None]
+        if len(embeddings) == 0:
+            return []
+        if now is None:
+            now = time.monotonic()
+        if self._prototypes is None:
+            self._prototypes = np.zeros(
+                (self.capacity, embeddings.shape[1]), dtype=np.float32
+            )
+
+        if self.ttl:
+            self._active &= now - self._last_seen <= self.ttl
+
+        embeddings = _normalize(embeddings)
+        similarity = embeddings @ self._prototypes.T
+        similarity[:, ~self._active] = -np.inf
+
+        identities = np.full(len(embeddings), -1, dtype=np.int64)
+        rows = np.arange(len(embeddings))
+        best = similarity.argmax(axis=1)
+        matched = similarity[rows, best] >= threshold
+        if len(np.unique(best[matched])) == matched.sum():
+            # Usual case, every embedding has a different best identity
+            rows, slots = rows[matched], best[matched]
+            identities[rows] = self._ids[slots]
+            self._update(slots, embeddings[rows], now)
+        else:
+            for _ in range(min(len(embeddings), len(self))):
+                row, slot = np.unravel_index(np.argmax(similarity), similarity.shape)
+                if similarity[row, slot] < threshold:
+                    break
+                identities[row] = self._ids[slot]
+                self._update(slot, embeddings[row], now)
+                similarity[row, :] = -np.inf
+                similarity[:, slot] = -np.inf
+
+        for row in np.flatnonzero(identities == -1):
+            identities[row] = self._add(embeddings[row], now)
+        return identities.tolist()
+
+    def _update(self, slots, embeddings: np.ndarray, now: float) -> None:
+        prototypes = (
+            self.momentum * self._prototypes[slots] + (1 - self.momentum) * embeddings
+        )
+        self._prototypes[slots] = _normalize(prototypes)
+        self._last_seen[slots] = now
+
+    def _add(self, embedding: np.ndarray, now: float) -> int:
+        free = np.flatnonzero(~self._active)
+        # Evict the least recently seen identity if there is no free slot
+        slot = free[0] if len(free) else int(np.argmin(self._last_seen))
+        identity = self._next_id
+        self._next_id += 1
+        self._prototypes[slot] = embedding
+        self._ids[slot] = identity
+        self._last_seen[slot] = now
+        self._active[slot] = True
+        return identity
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norm, 1e-12)
@@ -3,6 +3,8 @@ import depthai as dai
 
 from depthai_nodes import ImgDetectionsExtended
 
+from .embedding_gallery import EmbeddingGallery
+
 
 class IdentificationNode(dai.node.HostNode):
     """A host node that re-identifies objects based on their embeddings similarity to a database of embeddings.
@@ -13,13 +15,17 @@ class IdentificationNode(dai.node.HostNode):
         The cosine similarity threshold used for merging.
     label_basename : str
         The basename of the labels (e.g., "person"). The labels will be in the format "basename_0", "basename_1", etc.
+    gallery_size : int
+        The maximum number of remembered identities. The least recently seen one is forgotten first.
+    ttl : float
+        Seconds after which an identity that was not seen is forgotten. 0 keeps identities until they are evicted.
     """
 
     def __init__(self) -> None:
         super().__init__()
         self._cos_sim_threshold = None
         self._label_basename = None
-        self._embeddings_dict = {}
+        self._gallery = EmbeddingGallery()
 
     def setCosSimThreshold(self, csim: float) -> None:
         """Sets the cosine similarity threshold.
@@ -43,12 +49,32 @@ class IdentificationNode(dai.node.HostNode):
             raise TypeError("Label basename must be a string.")
         self._label_basename = label_basename
 
+    def setGallery(self, gallery_size: int, ttl: float = 0.0) -> None:
+        """Sets the capacity and time-to-live of the identity gallery. Clears the gallery.
+
+        @param gallery_size: The maximum number of remembered identities.
+        @type gallery_size: int
+        @param ttl: Seconds after which an unseen identity is forgotten, 0 to disable.
+        @type ttl: float
+        """
+        if not isinstance(gallery_size, int) or gallery_size < 1:
+            raise ValueError("Gallery size must be a positive integer.")
+        if ttl < 0:
+            raise ValueError("TTL must not be negative.")
+        self._gallery = EmbeddingGallery(capacity=gallery_size, ttl=ttl)
+
     def build(
-        self, gather_data_msg, csim: float = 0.5, label_basename: str = "person"
+        self,
+        gather_data_msg,
+        csim: float = 0.5,
+        label_basename: str = "person",
+        gallery_size: int = 256,
+        ttl: float = 0.0,
     ) -> "IdentificationNode":
         self.link_args(gather_data_msg)
         self.setCosSimThreshold(csim)
         self.setLabelBasename(label_basename)
+        self.setGallery(gallery_size, ttl)
         return self
 
     def process(self, gather_data_msg) -> None:
@@ -59,31 +85,16 @@ class IdentificationNode(dai.node.HostNode):
         assert isinstance(rec_msg_list, list)
         assert all(isinstance(msg, dai.NNData) for msg in rec_msg_list)
 
-        for detection, rec in zip(dets_msg.detections, rec_msg_list):
-            detection.label_name = self._get_label_name(rec, self._label_basename)
+        detections = dets_msg.detections[: len(rec_msg_list)]
+        if detections:
+            embeddings = np.stack(
+                [
+                    rec.getTensor("output", dequantize=True).ravel()
+                    for rec in rec_msg_list[: len(detections)]
+                ]
+            )
+            identities = self._gallery.match(embeddings, self._cos_sim_threshold)
+            for detection, identity in zip(detections, identities):
+                detection.label_name = f"{self._label_basename}_{identity}"
 
         self.out.send(dets_msg)
-
-    def _get_label_name(self, rec, basename) -> str:
-        embedding = rec.getTensor("output", dequantize=True)
-        sim = [
-            self._cos_sim(embedding, self._embeddings_dict[key])
-            for key in self._embeddings_dict
-        ]
-
-        if sim:
-            if max(sim) >= self._cos_sim_threshold:
-                idx = sim.index(max(sim))
-                label = list(self._embeddings_dict.keys())[idx]
-            else:
-                label = f"{basename}_{len(self._embeddings_dict)}"
-        else:
-            label = f"{basename}_0"
-
-        self._embeddings_dict[label] = embedding
-        return label
-
-    def _cos_sim(self, X: np.ndarray, Y: np.ndarray) -> float:
-        Y = Y.T
-        result = np.dot(X, Y) / (np.linalg.norm(X) * np.linalg.norm(Y, axis=0))
-        return result.item()
@@ -0,0 +1,121 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.background_compositor import BackgroundCompositor
+
+parser = argparse.ArgumentParser(
+    description="Host time of the background blur at 720p, 1080p and 4K, the former "
+    "full resolution path against the low resolution compositor, and how their "
+    "person edges compare with the true silhouette.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-f", "--frames", default=30, type=int)
+parser.add_argument(
+    "-m",
+    "--mask_size",
+    default=[512, 288],
+    nargs=2,
+    type=int,
+    help="Resolution of the segmentation mask.",
+)
+args = parser.parse_args()
+
+PERSON = 15
+SIZES = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def make_scene(width, height):
+    """A textured frame and the anti-aliased silhouette of a person in it."""
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    frame = np.dstack(
+        [
+            127 + 100 * np.sin(xx / 23) * np.cos(yy / 17),
+            127 + 100 * np.sin((xx + yy) / 41),
+            (xx / width * 255),
+        ]
+    ).astype(np.uint8)
+    silhouette = np.zeros((height, width), np.uint8)
+    center = (int(0.45 * width), int(0.55 * height))
+    axes = (int(0.12 * width), int(0.35 * height))
+    cv2.ellipse(silhouette, center, axes, 0, 0, 360, 255, -1, cv2.LINE_AA)
+    head = (int(0.45 * width), int(0.17 * height))
+    cv2.circle(silhouette, head, int(0.09 * height), 255, -1, cv2.LINE_AA)
+    return frame, silhouette.astype(np.float32) / 255
+
+
+def segment(silhouette):
+    """Class mask at the model resolution, as the model would return it."""
+    mask_w, mask_h = args.mask_size
+    small = cv2.resize(silhouette, (mask_w, mask_h), interpolation=cv2.INTER_AREA)
+    return np.where(small > 0.5, PERSON, 0).astype(np.int16)
+
+
+def legacy(frame, mask):
+    """The former path. It needs the mask at the frame resolution."""
+    person_mask = mask == PERSON
+    bg = frame.copy()
+    blurred_bg = cv2.blur(bg, (10, 10))
+    blurred_bg[person_mask] = frame[person_mask]
+    return blurred_bg
+
+
+def timed(function, *inputs):
+    function(*inputs)
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        function(*inputs)
+    return 1000 * (time.perf_counter() - start) / args.frames
+
+
+def edge_band(silhouette):
+    edge = (silhouette > 0.5).astype(np.uint8)
+    width = max(3, 2 * round(silhouette.shape[1] / args.mask_size[0]) + 1)
+    kernel = np.ones((width, width), np.uint8)
+    return cv2.dilate(edge, kernel) != cv2.erode(edge, kernel)
+
+
+def edge_error(alpha, silhouette):
+    """Mean absolute alpha error in a band around the true edge."""
+    return float(np.abs(alpha - silhouette)[edge_band(silhouette)].mean())
+
+
+def edge_step(alpha, silhouette):
+    """Largest alpha change between neighbouring pixels at the edge (99th
+    percentile). A step of 1 is a hard seam between sharp and blurred pixels."""
+    band = edge_band(silhouette)
+    steps = np.maximum(
+        np.abs(np.diff(alpha, axis=0, append=alpha[-1:])),
+        np.abs(np.diff(alpha, axis=1, append=alpha[:, -1:])),
+    )
+    return float(np.percentile(steps[band], 99))
+
+
+compositor = BackgroundCompositor(class_id=PERSON)
+print(f"Mask {args.mask_size[0]}x{args.mask_size[1]}, {args.frames} frames each")
+# The example blurs the model passthrough, which has the size of the mask
+SIZES = {"mask": tuple(args.mask_size), **SIZES}
+for name, (width, height) in SIZES.items():
+    frame, silhouette = make_scene(width, height)
+    mask = segment(silhouette)
+    full_mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+    legacy_ms = timed(legacy, frame, full_mask)
+    compositor_ms = timed(compositor.compose, frame, mask)
+
+    legacy_alpha = (full_mask == PERSON).astype(np.float32)
+    rows, cols, roi_alpha = compositor.alpha(mask, (width, height))
+    alpha = np.zeros((height, width), np.float32)
+    alpha[rows, cols] = roi_alpha
+    print(
+        f"{name:>5}: former {legacy_ms:7.2f} ms, compositor {compositor_ms:6.2f} ms "
+        f"({legacy_ms / compositor_ms:4.1f}x)"
+    )
+    print(
+        f"       edge alpha error {edge_error(legacy_alpha, silhouette):.3f} -> "
+        f"{edge_error(alpha, silhouette):.3f}, largest step "
+        f"{edge_step(legacy_alpha, silhouette):.2f} -> "
+        f"{edge_step(alpha, silhouette):.2f}"
+    )
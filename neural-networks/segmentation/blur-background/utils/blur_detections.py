@@ -1,11 +1,14 @@
-import cv2
 import depthai as dai
 from depthai_nodes.message import SegmentationMask
 
+from .background_compositor import BackgroundCompositor
+
 
 class BlurBackground(dai.node.HostNode):
     def __init__(self) -> None:
         super().__init__()
+        # person is class 15 in the output of the model
+        self._compositor = BackgroundCompositor(class_id=15)
 
     def build(
         self,
@@ -37,21 +40,14 @@ class BlurBackground(dai.node.HostNode):
         assert isinstance(mask_msg, SegmentationMask)
 
         frame = frame_msg.getCvFrame()
-        person_mask = (
-            mask_msg.mask == 15
-        )  # person is class 15 in the output of the model
-
-        bg = frame.copy()
-        blurred_bg = cv2.blur(bg, (10, 10))
-
-        blurred_bg[person_mask] = frame[person_mask]
+        blurred_bg = self._compositor.compose(frame, mask_msg.mask)
 
         ts = frame_msg.getTimestamp()
         seq_num = frame_msg.getSequenceNum()
 
-        frame_type = frame_msg.getType()
+        # Interleaved output is sent as is, planar would need another conversion
         img = dai.ImgFrame()
-        img.setCvFrame(blurred_bg, frame_type)
+        img.setCvFrame(blurred_bg, dai.ImgFrame.Type.BGR888i)
         img.setTimestamp(ts)
         img.setSequenceNum(seq_num)
 
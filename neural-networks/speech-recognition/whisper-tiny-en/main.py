@@ -5,7 +5,10 @@ from pathlib import Path
 
 from utils.constants import Config
 from utils.arguments import initialize_argparser
-from utils import AudioEncoder, AnnotationNode, WhisperEncoder, WhisperDecoder
+from utils.annotation_node import AnnotationNode
+from utils.audio_encoder import AudioEncoder
+from utils.whisper_decoder import WhisperDecoder
+from utils.whisper_encoder import WhisperEncoder
 
 
 # Setup logging
@@ -45,7 +48,7 @@ with dai.Pipeline(device) as pipeline:
     camera = pipeline.create(dai.node.Camera).build()
     camera_out = camera.requestOutput((1080, 720), dai.ImgFrame.Type.NV12, fps=30)
 
-    audio_encoder = pipeline.create(AudioEncoder, args.audio_file)
+    audio_encoder = pipeline.create(AudioEncoder, args.audio_file, args.stream)
 
     encoder_nn = pipeline.create(dai.node.NeuralNetwork)
     encoder_nn.setNNArchive(dai.NNArchive(archivePath=encoder_archive_path))
@@ -0,0 +1,126 @@
+import argparse
+import time
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from utils.constants import Config
+from utils.token_decoder import TokenDecoder, decode
+from utils.vad import VADSegmenter
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = SAMPLE_RATE // 10
+VOCAB_SIZE = 51864
+
+# Generated fixture: (start, end) in seconds of tone bursts in low noise. The
+# 0.1 s click is too short to be speech and the last burst is longer than the
+# longest segment, so it is split into overlapping chunks.
+FIXTURE_BURSTS = [(1.0, 2.5), (4.0, 4.6), (7.0, 7.1), (10.0, 23.0)]
+FIXTURE_LENGTH_S = 26.0
+# Segments expected with the default VADSegmenter settings: each one starts with
+# the 300 ms pre-roll, 150 ms before the speech is confirmed, ends after the
+# 480 ms hangover and segments longer than 10 s are split with a 1 s overlap
+FIXTURE_SEGMENTS = [(0.85, 2.98), (3.85, 5.08), (9.85, 19.85), (18.85, 23.48)]
+# Segment boundaries may be off by this much from the expected ones
+TOLERANCE_S = 0.06
+
+parser = argparse.ArgumentParser(
+    description="Run the streaming segmenter and the greedy decoder loop without a "
+    "device. The decoder model is replaced by a stub that emits a number of tokens "
+    "proportional to the segment length. Without a WAV file, a generated fixture is "
+    "used and the segment boundaries and decoder calls are checked.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("wav", nargs="?", help="Optional path to a WAV file.")
+parser.add_argument(
+    "-tps",
+    "--tokens_per_second",
+    default=3.0,
+    type=float,
+    help="Tokens the stub decoder produces per second of speech.",
+)
+parser.add_argument(
+    "--save_fixture",
+    help="Optional path where the generated fixture is written as a WAV file.",
+)
+args = parser.parse_args()
+
+
+class StubDecoderModel:
+    """Emits a timestamp, `n_text` text tokens and the end of text token."""
+
+    def __init__(self, n_text: int) -> None:
+        self.script = (
+            [Config.TOKENS.TOKEN_TIMESTAMP_BEGIN]
+            + [1000 + i for i in range(n_text)]
+            + [Config.TOKENS.TOKEN_EOT]
+        )
+        self.calls = 0
+
+    def __call__(self, token: int, index: int) -> np.ndarray:
+        self.calls += 1
+        logits = np.zeros((1, 1, VOCAB_SIZE), dtype=np.float32)
+        logits[0, 0, self.script[min(index, len(self.script) - 1)]] = 20.0
+        return logits
+
+
+def make_fixture() -> np.ndarray:
+    """Tone bursts at `FIXTURE_BURSTS` in noise 40 dB below them."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(FIXTURE_LENGTH_S * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = rng.normal(0, 0.001, t.size)
+    for start, end in FIXTURE_BURSTS:
+        burst = (t >= start) & (t < end)
+        audio[burst] += 0.2 * np.sin(2 * np.pi * 220 * t[burst])
+    return audio.astype(np.float32)
+
+
+if args.wav:
+    audio, sample_rate = sf.read(args.wav, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        audio = resample_poly(audio, SAMPLE_RATE, sample_rate).astype(np.float32)
+    print(f"Loaded {len(audio) / SAMPLE_RATE:.1f}s of audio from {args.wav}")
+else:
+    audio = make_fixture()
+    print(f"Generated {len(audio) / SAMPLE_RATE:.1f}s of audio")
+    if args.save_fixture:
+        sf.write(args.save_fixture, audio, SAMPLE_RATE)
+
+segmenter = VADSegmenter(sample_rate=SAMPLE_RATE)
+decoder = TokenDecoder(Config.MEAN_DECODE_LEN)
+audio_bytes = audio.tobytes()
+found = []
+
+for start in range(0, len(audio) + BLOCK_SIZE, BLOCK_SIZE):
+    block = audio[start : start + BLOCK_SIZE]
+    segments = segmenter.push(block) if len(block) else segmenter.flush()
+    for segment in segments:
+        # Segments are copies of the input, the noise makes their position unique
+        offset = audio_bytes.find(segment[: segmenter.frame_len].tobytes())
+        assert offset >= 0 and offset % audio.itemsize == 0, "Segment not in input"
+        segment_start = offset // audio.itemsize / SAMPLE_RATE
+        duration = len(segment) / SAMPLE_RATE
+
+        n_text = int(duration * args.tokens_per_second)
+        model = StubDecoderModel(n_text)
+        t0 = time.perf_counter()
+        tokens = decode(decoder, model)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        print(
+            f"[{(start + len(block)) / SAMPLE_RATE:6.2f}s] segment "
+            f"{segment_start:5.2f}-{segment_start + duration:5.2f}s -> "
+            f"{len(tokens)} tokens, {model.calls} decoder steps, {elapsed_ms:.1f} ms"
+        )
+        # The timestamp and the text tokens, then one step for the end of text
+        assert len(tokens) == n_text + 1, (len(tokens), n_text)
+        assert model.calls == n_text + 2, (model.calls, n_text)
+        found.append((segment_start, segment_start + duration))
+
+if not args.wav:
+    assert len(found) == len(FIXTURE_SEGMENTS), (found, FIXTURE_SEGMENTS)
+    for (start, end), (expected_start, expected_end) in zip(found, FIXTURE_SEGMENTS):
+        assert abs(start - expected_start) <= TOLERANCE_S, (start, expected_start)
+        assert abs(end - expected_end) <= TOLERANCE_S, (end, expected_end)
+    print(f"All {len(found)} segments match the fixture")
@@ -1,11 +0,0 @@
-from .audio_encoder import AudioEncoder
-from .whisper_decoder import WhisperDecoder
-from .whisper_encoder import WhisperEncoder
-from .annotation_node import AnnotationNode
-
-__all__ = [
-    "AudioEncoder",
-    "WhisperDecoder",
-    "WhisperEncoder",
-    "AnnotationNode",
-]
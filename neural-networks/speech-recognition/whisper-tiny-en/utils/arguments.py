@@ -25,6 +25,13 @@ def initialize_argparser():
         help="The path to the audio file to process",
     )
 
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Listen continuously and transcribe speech segments found by voice activity detection instead of recording 5 second clips.",
+    )
+
     args = parser.parse_args()
 
     return parser, args
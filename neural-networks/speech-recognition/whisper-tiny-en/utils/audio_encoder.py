@@ -1,31 +1,102 @@
+import queue
+
 import depthai as dai
 import sounddevice as sd
 import numpy as np
-from whisper.audio import load_audio, log_mel_spectrogram, pad_or_trim
+from whisper.audio import (
+    N_FFT,
+    N_FRAMES,
+    N_SAMPLES,
+    SAMPLE_RATE,
+    load_audio,
+    log_mel_spectrogram,
+)
+
+from utils.vad import VADSegmenter
+
+# Samples read from the microphone (or file) per block in streaming mode
+BLOCK_SIZE = SAMPLE_RATE // 10
+
+
+def speech_mel_spectrogram(audio: np.ndarray) -> np.ndarray:
+    """Log-mel spectrogram of `audio` padded to the 30 s window of the encoder.
+
+    Only the frames covering the audio are computed. The padding frames are filled
+    with the value Whisper assigns to digital silence, so the result matches padding
+    the audio itself while the cost scales with the length of the speech.
+    """
+    audio = audio[:N_SAMPLES]
+    mel = log_mel_spectrogram(audio, padding=N_FFT).numpy()[:, :N_FRAMES]
+    # Whisper clamps the log spectrum to 8 (2 after scaling) below its maximum and
+    # zeros to 1e-10, i.e. (-10 + 4) / 4 after scaling
+    silence = max(-1.5, float(mel.max()) - 2.0)
+    padded = np.full((1, mel.shape[0], N_FRAMES), silence, dtype=np.float16)
+    padded[0, :, : mel.shape[1]] = mel
+    return padded
 
 
 class AudioEncoder(dai.node.ThreadedHostNode):
-    def __init__(self, audio_file: str = None) -> None:
+    def __init__(self, audio_file: str = None, stream: bool = False) -> None:
         super().__init__()
         self.output = self.createOutput()
         self.audio_file = audio_file
+        self.stream = stream
+        self.segmenter = VADSegmenter(sample_rate=SAMPLE_RATE)
+        self._blocks: "queue.Queue[np.ndarray]" = queue.Queue()
 
     def run(self) -> None:
         if self.audio_file:
             print(f"Processing audio file: {self.audio_file}")
             audio = load_audio(self.audio_file)
-            mel_spectrogram = self._process_audio_array(audio)
+            if not self.stream:
+                self._send(audio)
+                return
+            # Feed the file through the segmenter as if it was recorded live
+            for start in range(0, len(audio), BLOCK_SIZE):
+                self._blocks.put(audio[start : start + BLOCK_SIZE])
+            self._blocks.put(None)
+            self._run_stream()
+        elif self.stream:
+            with sd.InputStream(
+                samplerate=SAMPLE_RATE,
+                channels=1,
+                dtype="float32",
+                blocksize=BLOCK_SIZE,
+                callback=self._on_audio_block,
+            ):
+                print("Listening...")
+                self._run_stream()
 
-            nn_data = dai.NNData()
-            nn_data.addTensor(
-                "audio", mel_spectrogram, dataType=dai.TensorInfo.DataType.FP16
-            )
-            self.output.send(nn_data)
+    def _on_audio_block(self, indata, frames, time, status) -> None:
+        self._blocks.put(indata[:, 0].copy())
+
+    def _run_stream(self) -> None:
+        while self.isRunning():
+            try:
+                block = self._blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if block is None:
+                segments = self.segmenter.flush()
+            else:
+                segments = self.segmenter.push(block)
+            for segment in segments:
+                print(f"Speech segment of {len(segment) / SAMPLE_RATE:.1f}s")
+                self._send(segment)
+            if block is None:
+                return
+
+    def _send(self, audio: np.ndarray) -> None:
+        nn_data = dai.NNData()
+        nn_data.addTensor(
+            "audio",
+            self._process_audio_array(audio),
+            dataType=dai.TensorInfo.DataType.FP16,
+        )
+        self.output.send(nn_data)
 
     def _process_audio_array(self, audio_array: np.ndarray) -> np.ndarray:
-        audio_array = pad_or_trim(audio_array)
-        mel_spectrogram = log_mel_spectrogram(audio_array)
-        mel_spectrogram = mel_spectrogram.unsqueeze(0).numpy().astype(np.float16)
+        mel_spectrogram = speech_mel_spectrogram(audio_array)
         assert mel_spectrogram.shape == (
             1,
             80,
@@ -46,7 +117,7 @@ class AudioEncoder(dai.node.ThreadedHostNode):
         return np.squeeze(audio)
 
     def handle_key_press(self, key: str) -> None:
-        if key == -1:
+        if key == -1 or self.stream:
             return
 
         key = chr(key)
@@ -54,11 +125,4 @@ class AudioEncoder(dai.node.ThreadedHostNode):
         if key == "r":
             print("Recording audio...")
             audio = self._record_audio_array()
-
-            mel_spectrogram = self._process_audio_array(audio)
-
-            nn_data = dai.NNData()
-            nn_data.addTensor(
-                "audio", mel_spectrogram, dataType=dai.TensorInfo.DataType.FP16
-            )
-            self.output.send(nn_data)
+            self._send(audio)
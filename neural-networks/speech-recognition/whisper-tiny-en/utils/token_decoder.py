@@ -0,0 +1,136 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+from scipy import special as scipy_special
+
+from utils.constants import Config
+
+TOKENS = Config.TOKENS
+
+
+class TokenDecoder:
+    """Greedy Whisper token selection with a preallocated token buffer.
+
+    Holds the tokens of one utterance in a fixed-size array, so no per-token
+    allocations are made. The decoder model itself is not part of this class,
+    which keeps it usable on the host with a stub model (see `decode`).
+    """
+
+    def __init__(self, sample_len: int) -> None:
+        self.sample_len = sample_len
+        self._buffer = np.empty(sample_len + 1, dtype=np.int32)
+        self._length = 0
+        self._last_timestamp = -1
+        self.reset()
+
+    def reset(self) -> None:
+        self._buffer[0] = TOKENS.TOKEN_SOT
+        self._length = 1
+        self._last_timestamp = -1
+
+    @property
+    def tokens(self) -> np.ndarray:
+        """Decoded tokens without the start of transcript token."""
+        return self._buffer[Config.SAMPLE_BEGIN : self._length].copy()
+
+    def apply_timestamp_rules(self, logits: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Apply timestamp-related post-processing rules to logits."""
+
+        # Require producing timestamp
+        logits[TOKENS.TOKEN_NO_TIMESTAMP] = -np.inf
+
+        # timestamps have to appear in pairs, except directly before EOT
+        n = self._length - Config.SAMPLE_BEGIN
+        last_was_timestamp = (
+            n >= 1 and self._buffer[self._length - 1] >= TOKENS.TOKEN_TIMESTAMP_BEGIN
+        )
+        penultimate_was_timestamp = (
+            n < 2 or self._buffer[self._length - 2] >= TOKENS.TOKEN_TIMESTAMP_BEGIN
+        )
+        if last_was_timestamp:
+            if penultimate_was_timestamp:  # has to be non-timestamp
+                logits[TOKENS.TOKEN_TIMESTAMP_BEGIN :] = -np.inf
+            else:  # cannot be normal text tokens
+                logits[: TOKENS.TOKEN_EOT] = -np.inf
+
+        if self._last_timestamp >= 0:
+            # timestamps shouldn't decrease; forbid timestamp tokens smaller than the last
+            # also force each segment to have a nonzero length, to prevent infinite looping
+            if last_was_timestamp and not penultimate_was_timestamp:
+                timestamp_last = self._last_timestamp
+            else:
+                timestamp_last = self._last_timestamp + 1
+            logits[TOKENS.TOKEN_TIMESTAMP_BEGIN : timestamp_last] = -np.inf
+
+        if self._length == Config.SAMPLE_BEGIN:
+            # suppress generating non-timestamp tokens at the beginning
+            logits[: TOKENS.TOKEN_TIMESTAMP_BEGIN] = -np.inf
+
+            # apply the `max_initial_timestamp` option
+            last_allowed = (
+                TOKENS.TOKEN_TIMESTAMP_BEGIN + Config.MAX_INITIAL_TIMESTAMP_INDEX
+            )
+            logits[(last_allowed + 1) :] = -np.inf
+
+        # if sum of probability over timestamps is above any other token, sample timestamp
+        logprobs = scipy_special.log_softmax(logits)
+        timestamp_logprob = scipy_special.logsumexp(
+            logprobs[TOKENS.TOKEN_TIMESTAMP_BEGIN :]
+        )
+        max_text_token_logprob = logprobs[: TOKENS.TOKEN_TIMESTAMP_BEGIN].max()
+        if timestamp_logprob > max_text_token_logprob:
+            # Mask out all but timestamp tokens
+            logits[: TOKENS.TOKEN_TIMESTAMP_BEGIN] = -np.inf
+
+        return logits, logprobs
+
+    def step(self, index: int, logits: np.ndarray) -> Optional[int]:
+        """Pick the next token from decoder logits of shape (1, n, vocab).
+
+        Returns None when decoding should stop: end of text, no speech detected
+        or the token buffer is full.
+        """
+        logits = logits[0, -1]  # Process the last token's logits
+
+        # Filters
+        # SuppressBlank
+        if index == 1:
+            logits[[TOKENS.TOKEN_EOT, TOKENS.TOKEN_BLANK]] = -np.inf
+        # SuppressTokens
+        logits[Config.NON_SPEECH_TOKENS] = -np.inf
+
+        logits, logprobs = self.apply_timestamp_rules(logits)
+
+        if index == 1:
+            # detect no_speech
+            no_speech_prob = np.exp(logprobs[TOKENS.TOKEN_NO_SPEECH])
+            if no_speech_prob > Config.NO_SPEECH_THR:
+                return None
+
+        # temperature = 0
+        next_token = int(np.argmax(logits))
+        if next_token == TOKENS.TOKEN_EOT or self._length > self.sample_len:
+            return None
+
+        self._buffer[self._length] = next_token
+        self._length += 1
+        if next_token >= TOKENS.TOKEN_TIMESTAMP_BEGIN:
+            self._last_timestamp = next_token
+        return next_token
+
+
+def decode(
+    decoder: TokenDecoder, model_step: Callable[[int, int], np.ndarray]
+) -> np.ndarray:
+    """Run the greedy loop on the host.
+
+    `model_step(token, index)` returns the logits of the decoder model for the given
+    input token, e.g. a stub that replays logits from a fixture.
+    """
+    decoder.reset()
+    token = int(TOKENS.TOKEN_SOT)
+    for index in range(1, decoder.sample_len):
+        token = decoder.step(index, model_step(token, index - 1))
+        if token is None:
+            break
+    return decoder.tokens
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Deque, List, Optional
+
+import numpy as np
+
+
+class VADSegmenter:
+    """Energy based voice activity segmenter for a stream of audio samples.
+
+    Audio is analysed in short frames. A frame is speech when its RMS level is
+    `margin_db` above the tracked noise floor (and above `min_level_db`). A segment
+    starts after `min_speech_ms` of speech, includes `pre_roll_ms` of audio before
+    it and ends after `hangover_ms` of silence. Segments longer than
+    `max_segment_s` are split into chunks that overlap by `overlap_s`, so long
+    speech is transcribed while it is still going on.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        margin_db: float = 12.0,
+        min_level_db: float = -50.0,
+        min_speech_ms: int = 150,
+        hangover_ms: int = 500,
+        pre_roll_ms: int = 300,
+        max_segment_s: float = 10.0,
+        overlap_s: float = 1.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_segment_len = int(max_segment_s * sample_rate)
+        self.overlap_len = int(overlap_s * sample_rate)
+
+        self.noise_floor_db: Optional[float] = None
+        self._pending = np.empty(0, dtype=np.float32)
+        self._pre_roll: Deque[np.ndarray] = deque(
+            maxlen=max(1, pre_roll_ms // frame_ms)
+        )
+        self._segment: List[np.ndarray] = []
+        self._segment_len = 0
+        self._in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def push(self, samples: np.ndarray) -> List[np.ndarray]:
+        """Feed mono float32 samples, return the segments completed by them."""
+        samples = np.concatenate([self._pending, np.asarray(samples, np.float32)])
+        n_frames = len(samples) // self.frame_len
+        self._pending = samples[n_frames * self.frame_len :]
+        if n_frames == 0:
+            return []
+
+        frames = samples[: n_frames * self.frame_len].reshape(n_frames, -1)
+        # RMS level of all frames of the block at once
+        levels = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-12)
+
+        segments = []
+        for frame, level in zip(frames, levels):
+            segment = self._step(frame, float(level))
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> List[np.ndarray]:
+        """End of stream, return the segment in progress if there is one."""
+        segments = []
+        if self._in_speech and self._segment_len:
+            segments.append(self._take_segment(keep_overlap=False))
+        self._in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._pre_roll.clear()
+        self._pending = np.empty(0, dtype=np.float32)
+        return segments
+
+    def _is_speech(self, level: float) -> bool:
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level
+        speech = (
+            level > self.noise_floor_db + self.margin_db and level > self.min_level_db
+        )
+        if not speech:
+            # Noise floor follows quiet frames quickly and loud ones slowly
+            rate = 0.05 if level < self.noise_floor_db else 0.01
+            self.noise_floor_db += rate * (level - self.noise_floor_db)
+        return speech
+
+    def _step(self, frame: np.ndarray, level: float) -> Optional[np.ndarray]:
+        speech = self._is_speech(level)
+
+        if not self._in_speech:
+            self._pre_roll.append(frame)
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.min_speech_frames:
+                self._in_speech = True
+                self._silence_run = 0
+                self._segment = list(self._pre_roll)
+                self._segment_len = sum(len(f) for f in self._segment)
+                self._pre_roll.clear()
+            return None
+
+        self._segment.append(frame)
+        self._segment_len += len(frame)
+        self._silence_run = 0 if speech else self._silence_run + 1
+
+        if self._silence_run >= self.hangover_frames:
+            self._in_speech = False
+            self._speech_run = 0
+            return self._take_segment(keep_overlap=False)
+        if self._segment_len >= self.max_segment_len:
+            return self._take_segment(keep_overlap=True)
+        return None
+
+    def _take_segment(self, keep_overlap: bool) -> np.ndarray:
+        segment = np.concatenate(self._segment)
+        if keep_overlap and self.overlap_len:
+            tail = segment[-self.overlap_len :]
+            self._segment = [tail]
+            self._segment_len = len(tail)
+        else:
+            self._segment = []
+            self._segment_len = 0
+        return segment
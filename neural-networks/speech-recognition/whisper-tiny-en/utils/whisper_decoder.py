@@ -1,10 +1,12 @@
+import logging
+import time
+
 import depthai as dai
 import numpy as np
-from typing import Tuple
-from scipy import special as scipy_special
-from tqdm import tqdm
 from whisper.decoding import get_tokenizer
-from utils.constants import Config
+from utils.token_decoder import TokenDecoder
+
+logger = logging.getLogger()
 
 
 class WhisperDecoder(dai.node.ThreadedHostNode):
@@ -22,61 +24,10 @@ class WhisperDecoder(dai.node.ThreadedHostNode):
         self.token_sequence = self.createOutput()
 
         self.sample_len = sample_len
-        self.decoded_tokens = [Config.TOKENS["TOKEN_SOT"]]
-
-    def apply_timestamp_rules(self, logits: np.ndarray) -> Tuple[np.ndarray, float]:
-        """Apply timestamp-related post-processing rules to logits."""
-
-        # Require producing timestamp
-        logits[Config.TOKENS.TOKEN_NO_TIMESTAMP] = -np.inf
-
-        # timestamps have to appear in pairs, except directly before EOT
-        seq = self.decoded_tokens[Config.SAMPLE_BEGIN :]
-        last_was_timestamp = (
-            len(seq) >= 1 and seq[-1] >= Config.TOKENS.TOKEN_TIMESTAMP_BEGIN
-        )
-        penultimate_was_timestamp = (
-            len(seq) < 2 or seq[-2] >= Config.TOKENS.TOKEN_TIMESTAMP_BEGIN
-        )
-        if last_was_timestamp:
-            if penultimate_was_timestamp:  # has to be non-timestamp
-                logits[Config.TOKENS.TOKEN_TIMESTAMP_BEGIN :] = -np.inf
-            else:  # cannot be normal text tokens
-                logits[: Config.TOKENS.TOKEN_EOT] = -np.inf
-
-        timestamps = [
-            t for t in self.decoded_tokens if t >= Config.TOKENS.TOKEN_TIMESTAMP_BEGIN
-        ]
-        if len(timestamps) > 0:
-            # timestamps shouldn't decrease; forbid timestamp tokens smaller than the last
-            # also force each segment to have a nonzero length, to   prevent infinite looping
-            if last_was_timestamp and not penultimate_was_timestamp:
-                timestamp_last = timestamps[-1]
-            else:
-                timestamp_last = timestamps[-1] + 1
-            logits[Config.TOKENS.TOKEN_TIMESTAMP_BEGIN : timestamp_last] = -np.inf
-
-        if len(self.decoded_tokens) == Config.SAMPLE_BEGIN:
-            # suppress generating non-timestamp tokens at the beginning
-            logits[: Config.TOKENS.TOKEN_TIMESTAMP_BEGIN] = -np.inf
-
-            # apply the `max_initial_timestamp` option
-            last_allowed = (
-                Config.TOKENS.TOKEN_TIMESTAMP_BEGIN + Config.MAX_INITIAL_TIMESTAMP_INDEX
-            )
-            logits[(last_allowed + 1) :] = -np.inf
-
-        # if sum of probability over timestamps is above any other token, sample timestamp
-        logprobs = scipy_special.log_softmax(logits)
-        timestamp_logprob = scipy_special.logsumexp(
-            logprobs[Config.TOKENS.TOKEN_TIMESTAMP_BEGIN :]
-        )
-        max_text_token_logprob = logprobs[: Config.TOKENS.TOKEN_TIMESTAMP_BEGIN].max()
-        if timestamp_logprob > max_text_token_logprob:
-            # Mask out all but timestamp tokens
-            logits[: Config.TOKENS.TOKEN_TIMESTAMP_BEGIN] = -np.inf
-
-        return logits, logprobs
+        self.decoder = TokenDecoder(sample_len)
+        # Tensors that change every step are reused, addTensor copies them
+        self._x = np.zeros((1, 1), dtype=np.int32)
+        self._index = np.zeros((1, 1), dtype=np.int32)
 
     def onStart(self):
         token_message = dai.NNData()
@@ -87,34 +38,6 @@ class WhisperDecoder(dai.node.ThreadedHostNode):
         )
         self.token_sequence.send(token_message)
 
-    def get_tokens(self, index, logits=None):
-        """Get the next tokens based on current logits."""
-        logits = logits[0, -1]  # Process the last token's logits
-
-        # Filters
-        # SuppressBlank
-        if index == 1:
-            logits[[Config.TOKENS.TOKEN_EOT, Config.TOKENS.TOKEN_BLANK]] = -np.inf
-        # SuppressTokens
-        logits[Config.NON_SPEECH_TOKENS] = -np.inf
-
-        logits, logprobs = self.apply_timestamp_rules(logits)
-
-        if index == 1:
-            # detect no_speech
-            no_speech_prob = np.exp(logprobs[Config.TOKENS.TOKEN_NO_SPEECH])
-            if no_speech_prob > Config.NO_SPEECH_THR:
-                return None
-
-        # temperature = 0
-        next_token = np.argmax(logits)
-        if next_token == Config.TOKENS.TOKEN_EOT:
-            return None
-
-        x = np.array([[next_token]], dtype=np.int32)
-        self.decoded_tokens.append(int(next_token))
-        return x
-
     def run(self) -> None:
         """Run the decoder and process encoder outputs."""
 
@@ -125,23 +48,14 @@ class WhisperDecoder(dai.node.ThreadedHostNode):
             ts = raw_encoder_outputs.getTimestamp()
             seq_num = raw_encoder_outputs.getSequenceNum()
 
-            for i in tqdm(range(1, self.sample_len), total=self.sample_len):
+            self.decoder.reset()
+            start = time.perf_counter()
+            for i in range(1, self.sample_len):
                 decoder_out: dai.NNData = self.decoder_input.get()
 
-                logits = decoder_out.getTensor("logits")
-                tokens = self.get_tokens(i, logits)
-
-                if tokens is None:
-                    token_message = dai.NNData()
-                    token_message.setSequenceNum(seq_num)
-                    token_message.setTimestamp(ts)
-                    token_message.addTensor(
-                        "tokens",
-                        np.array(self.decoded_tokens[1:], dtype=np.int32),
-                        dataType=dai.TensorInfo.DataType.INT,
-                    )
-                    self.token_sequence.send(token_message)
-                    self.decoded_tokens = [Config.TOKENS["TOKEN_SOT"]]
+                token = self.decoder.step(i, decoder_out.getTensor("logits"))
+                if token is None or i == self.sample_len - 1:
+                    # End of text, stop early instead of running to sample_len
                     break
 
                 decoder_recursive_input = dai.NNData()
@@ -168,11 +82,25 @@ class WhisperDecoder(dai.node.ThreadedHostNode):
                     decoder_out.getTensor("v_cache"),
                     dataType=dai.TensorInfo.DataType.FP16,
                 )
+                self._x[0, 0] = token
+                self._index[0, 0] = i
                 decoder_recursive_input.addTensor(
-                    "x", tokens, dataType=dai.TensorInfo.DataType.INT
+                    "x", self._x, dataType=dai.TensorInfo.DataType.INT
                 )
                 decoder_recursive_input.addTensor(
-                    "index", np.array([[i]]), dataType=dai.TensorInfo.DataType.INT
+                    "index", self._index, dataType=dai.TensorInfo.DataType.INT
                 )
 
                 self.out.send(decoder_recursive_input)
+
+            tokens = self.decoder.tokens
+            logger.debug(
+                f"Decoded {len(tokens)} tokens in {time.perf_counter() - start:.2f}s"
+            )
+            token_message = dai.NNData()
+            token_message.setSequenceNum(seq_num)
+            token_message.setTimestamp(ts)
+            token_message.addTensor(
+                "tokens", tokens, dataType=dai.TensorInfo.DataType.INT
+            )
+            self.token_sequence.send(token_message)
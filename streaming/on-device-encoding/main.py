@@ -1,6 +1,7 @@
 import depthai as dai
 from utils.arguments import initialize_argparser
-from utils.video_saver import VideoSaver
+from utils.segmented_recorder import SegmentedRecorder
+from utils.video_saver import SegmentedVideoSaver, VideoSaver
 
 _, args = initialize_argparser()
 
@@ -27,13 +28,27 @@ with dai.Pipeline(device) as pipeline:
     )
     cam_out.link(video_enc.input)
 
-    video_saver = pipeline.create(VideoSaver).build(
-        encoded_stream=video_enc.out,
-        codec=args.codec,
-        output_shape=(640, 480),
-        fps=args.fps_limit,
-        output_path=args.output,
-    )
+    if args.segment_duration or args.segment_size:
+        recorder = SegmentedRecorder(
+            directory=args.output_dir,
+            codec=args.codec,
+            output_shape=(640, 480),
+            fps=args.fps_limit,
+            segment_seconds=args.segment_duration,
+            segment_bytes=int(args.segment_size * 1e6),
+            retention_bytes=int(args.retention * 1e9),
+        )
+        video_saver = pipeline.create(SegmentedVideoSaver).build(
+            encoded_stream=video_enc.out, recorder=recorder
+        )
+    else:
+        video_saver = pipeline.create(VideoSaver).build(
+            encoded_stream=video_enc.out,
+            codec=args.codec,
+            output_shape=(640, 480),
+            fps=args.fps_limit,
+            output_path=args.output,
+        )
 
     # Visualizer currently doesn't support H265 or any encoded videos in RVC4 standalone mode - use non-encoded streams instead
     if args.codec == "h265" or device.getPlatform() == dai.Platform.RVC4:
@@ -51,3 +66,6 @@ with dai.Pipeline(device) as pipeline:
         if key == ord("q"):
             print("Got q key from the remote connection!")
             break
+
+if isinstance(video_saver, SegmentedVideoSaver):
+    video_saver.close()
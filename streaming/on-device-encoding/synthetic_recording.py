@@ -0,0 +1,101 @@
+import argparse
+import io
+import tempfile
+import time
+
+import av
+import numpy as np
+
+from utils.segmented_recorder import (
+    SegmentedRecorder,
+    find_keyframe,
+    is_keyframe,
+    load_index,
+)
+
+parser = argparse.ArgumentParser(
+    description="Record software-encoded synthetic packets into segments and check "
+    "that every segment starts on a keyframe and that the index finds it.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("-c", "--codec", choices=["h264", "h265"], default="h264")
+parser.add_argument("-fps", "--fps", default=30, type=int)
+parser.add_argument("-s", "--seconds", default=20, type=float, help="Stream length.")
+parser.add_argument("-g", "--gop", default=45, type=int, help="Keyframe interval.")
+parser.add_argument("-sd", "--segment_duration", default=4.0, type=float)
+parser.add_argument(
+    "-rt", "--retention", default=0.0, type=float, help="Disk budget in MB."
+)
+args = parser.parse_args()
+
+WIDTH, HEIGHT = 320, 240
+
+encoder = av.CodecContext.create("libx264" if args.codec == "h264" else "libx265", "w")
+encoder.width, encoder.height = WIDTH, HEIGHT
+encoder.pix_fmt = "yuv420p"
+encoder.framerate = args.fps
+encoder.gop_size = args.gop
+# No B-frames, so decode order equals presentation order as with the device encoder
+encoder.options = (
+    {"tune": "zerolatency"}
+    if args.codec == "h264"
+    else {"x265-params": f"bframes=0:keyint={args.gop}:log-level=error"}
+)
+
+directory = tempfile.mkdtemp(prefix="segments_")
+recorder = SegmentedRecorder(
+    directory,
+    args.codec,
+    (WIDTH, HEIGHT),
+    args.fps,
+    segment_seconds=args.segment_duration,
+    retention_bytes=int(args.retention * 1e6),
+)
+
+start_wall = time.time()
+n_frames = int(args.seconds * args.fps)
+keyframe_times = []
+x = np.linspace(0, 4 * np.pi, WIDTH)
+for i in range(n_frames):
+    # Moving gradient, so P-frames are not empty
+    image = (127 + 120 * np.sin(x[None, :] + i / 5) * np.ones((HEIGHT, 1))).astype(
+        np.uint8
+    )
+    frame = av.VideoFrame.from_ndarray(np.dstack([image] * 3), format="bgr24").reformat(
+        format="yuv420p"
+    )
+    for packet in encoder.encode(frame):
+        data = bytes(packet)
+        keyframe = is_keyframe(data, args.codec)
+        assert keyframe == packet.is_keyframe, "NAL based keyframe detection differs"
+        timestamp = i / args.fps
+        if keyframe:
+            keyframe_times.append(start_wall + timestamp)
+        recorder.write(data, timestamp, keyframe, wall_time=start_wall + timestamp)
+recorder.close()
+
+segments = recorder.segments()
+print(f"{len(segments)} segments in {directory}")
+for path in segments:
+    with av.open(str(path)) as container:
+        first = next(p for p in container.demux(video=0) if p.size)
+        print(
+            f"  {path.name}: {path.stat().st_size} B, starts on keyframe: "
+            f"{first.is_keyframe}"
+        )
+        assert first.is_keyframe
+
+entries = load_index(directory)
+print(f"{len(entries)} indexed keyframes, {len(keyframe_times)} encoded")
+event = start_wall + args.seconds * 0.8
+entry = find_keyframe(entries, event)
+print(
+    f"Event at +{event - start_wall:.2f}s -> {entry.segment.name} keyframe at "
+    f"+{entry.wall_time - start_wall:.2f}s, byte offset {entry.offset}"
+)
+# Decoding can start right at the indexed offset, without scanning the file
+with open(entry.segment, "rb") as f:
+    f.seek(entry.offset)
+    with av.open(io.BytesIO(f.read()), format=recorder.format) as container:
+        first = next(container.decode(video=0))
+print(f"First frame decoded from the offset is a keyframe: {first.key_frame}")
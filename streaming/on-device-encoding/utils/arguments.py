@@ -43,6 +43,42 @@ def initialize_argparser():
         type=str,
     )
 
+    parser.add_argument(
+        "-sd",
+        "--segment_duration",
+        help="Record into segments of this many seconds (rotated on a keyframe) instead of a single file. 0 disables time based rotation.",
+        required=False,
+        default=0,
+        type=float,
+    )
+
+    parser.add_argument(
+        "-ss",
+        "--segment_size",
+        help="Rotate segments after this many MB. 0 disables size based rotation.",
+        required=False,
+        default=0,
+        type=float,
+    )
+
+    parser.add_argument(
+        "-rt",
+        "--retention",
+        help="Disk budget of all segments in GB, the oldest segments are deleted when it is exceeded. 0 keeps everything.",
+        required=False,
+        default=0,
+        type=float,
+    )
+
+    parser.add_argument(
+        "-od",
+        "--output_dir",
+        help="Directory of the segments and their keyframe indices.",
+        required=False,
+        default="recordings",
+        type=str,
+    )
+
     args = parser.parse_args()
 
     return parser, args
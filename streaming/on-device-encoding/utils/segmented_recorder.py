@@ -0,0 +1,275 @@
+import bisect
+import csv
+import time
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import av
+
+# Streamable containers, a segment that is cut short by a power loss stays playable
+CONTAINERS = {"h264": ("mpegts", ".ts"), "h265": ("mpegts", ".ts")}
+DEFAULT_CONTAINER = ("matroska", ".mkv")
+INDEX_SUFFIX = ".idx.csv"
+INDEX_HEADER = ["wall_time", "pts_us", "offset"]
+TIME_BASE = Fraction(1, 1_000_000)  # Microseconds
+
+# NAL unit types that start a decodable picture sequence, and parameter sets
+H264_IDR = {5}
+H265_IRAP = set(range(16, 22))
+H264_PARAMETER_SETS = {7, 8}
+H265_PARAMETER_SETS = {32, 33, 34}
+
+
+def nal_units(data: bytes, codec: str) -> List[Tuple[int, bytes]]:
+    """Split an Annex-B packet into (NAL unit type, unit with its start code)."""
+    starts = []
+    i = data.find(b"\x00\x00\x01")
+    while i != -1:
+        # 4-byte start codes keep their leading zero
+        starts.append(i - 1 if i > 0 and data[i - 1] == 0 else i)
+        i = data.find(b"\x00\x00\x01", i + 3)
+    units = []
+    for start, end in zip(starts, starts[1:] + [len(data)]):
+        unit = data[start:end]
+        header = unit[unit.index(b"\x00\x00\x01") + 3 :][:1]
+        if not header:
+            continue
+        nal_type = (header[0] >> 1) & 0x3F if codec == "h265" else header[0] & 0x1F
+        units.append((nal_type, unit))
+    return units
+
+
+def is_keyframe(data: bytes, codec: str) -> bool:
+    """Detect a keyframe in an Annex-B H.264/H.265 packet. MJPEG frames always are."""
+    if codec == "mjpeg":
+        return True
+    keyframe_types = H265_IRAP if codec == "h265" else H264_IDR
+    return any(t in keyframe_types for t, _ in nal_units(bytes(data), codec))
+
+
+class _CountingFile:
+    """File wrapper that counts the bytes the muxer has written."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "wb")
+        self.written = 0
+
+    def write(self, data) -> int:
+        n = self._file.write(data)
+        self.written += n
+        return n
+
+    def seek(self, *args) -> int:
+        return self._file.seek(*args)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+@dataclass
+class KeyframeEntry:
+    segment: Path
+    wall_time: float
+    pts_us: int
+    offset: int
+
+
+class SegmentedRecorder:
+    """Muxes already encoded packets into rotating segment files.
+
+    A new segment is started on the first keyframe after the current one reached
+    `segment_seconds` or `segment_bytes`, so every segment starts with a keyframe.
+    Packets before the first keyframe are dropped. For every keyframe a row with
+    its wall-clock time, presentation timestamp and byte offset is appended to a
+    sidecar `<segment>.idx.csv`. The offset is where the muxer output stood when the
+    keyframe was submitted, so reading from it reaches the keyframe within one I/O
+    buffer. When the recordings exceed `retention_bytes`, the oldest segments are
+    deleted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        codec: str,
+        output_shape: Tuple[int, int],
+        fps: int,
+        segment_seconds: float = 300.0,
+        segment_bytes: int = 0,
+        retention_bytes: int = 0,
+        prefix: str = "segment",
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        self.output_shape = output_shape
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.prefix = prefix
+        self.format, self.suffix = CONTAINERS.get(codec, DEFAULT_CONTAINER)
+
+        self.segment_path: Optional[Path] = None
+        self._file: Optional[_CountingFile] = None
+        self._container = None
+        self._stream = None
+        self._index_file = None
+        self._index = None
+        self._start_ts: float = 0.0
+        self._parameter_sets = b""
+
+    def write(
+        self, data, timestamp: float, keyframe: bool, wall_time: float = None
+    ) -> bool:
+        """Mux one encoded packet with a `timestamp` in seconds.
+
+        Returns False if the packet was dropped because no segment is open and the
+        packet is not a keyframe.
+        """
+        if wall_time is None:
+            wall_time = time.time()
+
+        if keyframe and (self._container is None or self._segment_full(timestamp)):
+            self._rotate(timestamp, wall_time)
+        if self._container is None:
+            return False
+
+        pts = int(round((timestamp - self._start_ts) * 1_000_000))
+        if keyframe:
+            self._index.writerow([f"{wall_time:.6f}", pts, self._file.written])
+            self._index_file.flush()
+
+        if keyframe and self.codec in ("h264", "h265"):
+            data = self._with_parameter_sets(bytes(data))
+        packet = av.Packet(data)
+        packet.pts = pts
+        packet.dts = pts
+        packet.time_base = TIME_BASE
+        packet.stream = self._stream
+        if keyframe:
+            packet.is_keyframe = True
+        self._container.mux(packet)
+        return True
+
+    def _with_parameter_sets(self, data: bytes) -> bytes:
+        """Make sure every segment starts with the SPS/PPS (and VPS) it needs.
+
+        Encoders may only emit the parameter sets with the first keyframe. They
+        are cached and prepended to keyframes that come without them.
+        """
+        types = H265_PARAMETER_SETS if self.codec == "h265" else H264_PARAMETER_SETS
+        units = nal_units(data, self.codec)
+        parameter_sets = b"".join(unit for t, unit in units if t in types)
+        if parameter_sets:
+            self._parameter_sets = parameter_sets
+            return data
+        return self._parameter_sets + data
+
+    def close(self):
+        if self._container is not None:
+            self._container.close()
+            self._file.close()
+            self._index_file.close()
+            self._container = None
+        self._enforce_retention()
+
+    def _segment_full(self, timestamp: float) -> bool:
+        if self.segment_seconds and timestamp - self._start_ts >= self.segment_seconds:
+            return True
+        return bool(self.segment_bytes) and self._file.written >= self.segment_bytes
+
+    def _rotate(self, timestamp: float, wall_time: float):
+        self.close()
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(wall_time))
+        name += f"-{int(wall_time * 1000) % 1000:03d}"
+        self.segment_path = self.directory / f"{self.prefix}_{name}{self.suffix}"
+
+        self._file = _CountingFile(self.segment_path)
+        self._container = av.open(self._file, "w", format=self.format)
+        self._stream = self._container.add_stream(
+            "hevc" if self.codec == "h265" else self.codec, rate=self.fps
+        )
+        if self.codec == "mjpeg":
+            # We need to set pixel format for MJPEG, for H264/H265 it's yuv420p by default
+            self._stream.pix_fmt = "yuvj420p"
+        self._stream.time_base = TIME_BASE
+        self._stream.width, self._stream.height = self.output_shape
+
+        self._index_file = open(
+            self.segment_path.with_suffix(INDEX_SUFFIX), "w", newline=""
+        )
+        self._index = csv.writer(self._index_file)
+        self._index.writerow(INDEX_HEADER)
+        self._start_ts = timestamp
+
+    def segments(self) -> List[Path]:
+        """Finished and current segments, oldest first."""
+        return sorted(self.directory.glob(f"{self.prefix}_*{self.suffix}"))
+
+    def _enforce_retention(self):
+        if not self.retention_bytes:
+            return
+        segments = self.segments()
+        sizes = [
+            p.stat().st_size + _size_or_zero(p.with_suffix(INDEX_SUFFIX))
+            for p in segments
+        ]
+        total = sum(sizes)
+        for path, size in zip(segments, sizes):
+            if total <= self.retention_bytes or path == self.segment_path:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(INDEX_SUFFIX).unlink(missing_ok=True)
+            total -= size
+
+
+def _size_or_zero(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def load_index(directory: str) -> List[KeyframeEntry]:
+    """Read the keyframe index of all segments in `directory`, oldest first."""
+    suffixes = {suffix for _, suffix in CONTAINERS.values()} | {DEFAULT_CONTAINER[1]}
+    entries = []
+    for index_path in Path(directory).glob(f"*{INDEX_SUFFIX}"):
+        stem = index_path.name[: -len(INDEX_SUFFIX)]
+        segments = [
+            index_path.with_name(stem + suffix)
+            for suffix in suffixes
+            if index_path.with_name(stem + suffix).exists()
+        ]
+        if not segments:
+            # Segment was removed by retention or by hand
+            continue
+        with open(index_path, newline="") as f:
+            for row in csv.DictReader(f):
+                entries.append(
+                    KeyframeEntry(
+                        segment=segments[0],
+                        wall_time=float(row["wall_time"]),
+                        pts_us=int(row["pts_us"]),
+                        offset=int(row["offset"]),
+                    )
+                )
+    entries.sort(key=lambda e: e.wall_time)
+    return entries
+
+
+def find_keyframe(
+    entries: List[KeyframeEntry], wall_time: float
+) -> Optional[KeyframeEntry]:
+    """Last keyframe at or before `wall_time`, where decoding of that moment starts."""
+    times = [e.wall_time for e in entries]
+    i = bisect.bisect_right(times, wall_time) - 1
+    return entries[i] if i >= 0 else None
@@ -1,8 +1,11 @@
+import time
 from fractions import Fraction
 from typing import Tuple
 import av
 import depthai as dai
 
+from utils.segmented_recorder import SegmentedRecorder
+
 
 class VideoSaver(dai.node.HostNode):
     def __init__(self):
@@ -54,3 +57,38 @@ class VideoSaver(dai.node.HostNode):
 
         # Mux the packet into container
         self.output_container.mux(packet)
+
+
+class SegmentedVideoSaver(dai.node.HostNode):
+    """Records the encoded stream into rotating segments with a keyframe index."""
+
+    def __init__(self):
+        super().__init__()
+
+    def build(
+        self,
+        encoded_stream: dai.Node.Output,
+        recorder: SegmentedRecorder,
+    ) -> "SegmentedVideoSaver":
+        self.link_args(encoded_stream)
+        self.recorder = recorder
+        return self
+
+    def process(self, encoded_frame: dai.EncodedFrame):
+        timestamp = encoded_frame.getTimestamp()
+        if self.recorder.codec == "mjpeg":
+            keyframe = True
+        else:
+            keyframe = encoded_frame.getFrameType() == dai.EncodedFrame.FrameType.I
+        # Wall-clock time of capture, used to look up events in the index
+        wall_time = time.time() - (dai.Clock.now() - timestamp).total_seconds()
+
+        self.recorder.write(
+            encoded_frame.getData(),
+            timestamp.total_seconds(),
+            keyframe,
+            wall_time=wall_time,
+        )
+
+    def close(self):
+        self.recorder.close()
@@ -0,0 +1,71 @@
+import argparse
+import importlib
+import resource
+import time
+import tracemalloc
+
+import depthai as dai
+import numpy as np
+from utils.replay import load_recording, unwrapped_process
+
+parser = argparse.ArgumentParser(
+    description="Replay a recording into a host node's process() at full speed.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("recording", help="Path to a .rec file created with -rec.")
+parser.add_argument(
+    "-n",
+    "--node",
+    default="utils.edge_detector:EdgeDetector",
+    help="Host node class or factory as 'module:attribute'. A factory is called "
+    "with the pipeline and must return the node ready for process() calls.",
+)
+parser.add_argument(
+    "-r", "--repeat", default=5, type=int, help="How many times to replay."
+)
+parser.add_argument(
+    "-w", "--warmup", default=10, type=int, help="Number of untimed calls."
+)
+args = parser.parse_args()
+
+module_name, attribute = args.node.split(":")
+target = getattr(importlib.import_module(module_name), attribute)
+
+calls = load_recording(args.recording)
+if not calls:
+    raise SystemExit(f"Recording {args.recording} is empty.")
+print(f"Loaded {len(calls)} process() calls from {args.recording}")
+
+# No device is needed, the node is only used as a plain Python object.
+pipeline = dai.Pipeline(False)
+node = pipeline.create(target) if isinstance(target, type) else target(pipeline)
+process = unwrapped_process(node)
+
+for i in range(args.warmup):
+    process(*calls[i % len(calls)])
+
+durations = np.empty(len(calls) * args.repeat, dtype=np.float64)
+start = time.perf_counter()
+for i in range(durations.size):
+    call_start = time.perf_counter()
+    process(*calls[i % len(calls)])
+    durations[i] = time.perf_counter() - call_start
+total = time.perf_counter() - start
+
+# tracemalloc slows down every allocation, so the peak heap is measured in a
+# separate, untimed replay of the recording.
+tracemalloc.start()
+for call in calls:
+    process(*call)
+_, peak_python = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+p50, p99 = np.percentile(durations * 1000, [50, 99])
+print(f"Calls:            {durations.size}")
+print(f"Throughput:       {durations.size / total:.1f} msg/s")
+print(f"Latency p50:      {p50:.3f} ms")
+print(f"Latency p99:      {p99:.3f} ms")
+print(f"Peak Python heap: {peak_python / 2**20:.1f} MiB")
+print(
+    f"Max RSS:          {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"
+)
@@ -0,0 +1,45 @@
+import depthai as dai
+from utils.arguments import initialize_argparser
+from utils.edge_detector import EdgeDetector
+from utils.metrics_server import start_metrics_server
+from utils.profiling import REGISTRY
+from utils.replay import RECORDER
+
+_, args = initialize_argparser()
+
+visualizer = dai.RemoteConnection(httpPort=8082)
+device = dai.Device(dai.DeviceInfo(args.device)) if args.device else dai.Device()
+
+if args.trace:
+    REGISTRY.enable_trace(args.trace)
+if args.record:
+    RECORDER.enable(args.record)
+start_metrics_server(args.metrics_port)
+print(f"Metrics available at http://localhost:{args.metrics_port}/metrics")
+
+with dai.Pipeline(device) as pipeline:
+    print("Creating pipeline...")
+
+    cam = pipeline.create(dai.node.Camera).build()
+    cam_out = cam.requestOutput((1280, 720), dai.ImgFrame.Type.NV12, fps=args.fps_limit)
+
+    edge_detector = pipeline.create(EdgeDetector).build(frame=cam_out)
+    edge_detector.inputs["frame"].setBlocking(False)
+    edge_detector.inputs["frame"].setMaxSize(4)
+
+    visualizer.addTopic("Video", cam_out, "images")
+    visualizer.addTopic("Edges", edge_detector.out, "images")
+
+    print("Pipeline created.")
+
+    pipeline.start()
+    visualizer.registerPipeline(pipeline)
+
+    while pipeline.isRunning():
+        key = visualizer.waitKey(1)
+        if key == ord("q"):
+            print("Got q key from the remote connection!")
+            break
+
+REGISTRY.close()
+RECORDER.close()
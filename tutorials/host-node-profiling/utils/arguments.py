@@ -0,0 +1,57 @@
+import argparse
+
+
+def initialize_argparser():
+    """Initialize the argument parser for the script."""
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "-d",
+        "--device",
+        help="Optional name, DeviceID or IP of the camera to connect to.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
+    parser.add_argument(
+        "-fps",
+        "--fps_limit",
+        help="FPS limit for the camera.",
+        required=False,
+        default=30,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-mp",
+        "--metrics_port",
+        help="Port on which the Prometheus metrics endpoint is served.",
+        required=False,
+        default=9100,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-t",
+        "--trace",
+        help="Optional path to a CSV file with a per-message timing trace.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
+    parser.add_argument(
+        "-rec",
+        "--record",
+        help="Optional directory where the inputs of recorded host nodes are saved for offline benchmarking with benchmark.py.",
+        required=False,
+        default=None,
+        type=str,
+    )
+
+    args = parser.parse_args()
+
+    return parser, args
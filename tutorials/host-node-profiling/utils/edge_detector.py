@@ -0,0 +1,29 @@
+import cv2
+import depthai as dai
+
+from utils.profiling import profiled
+from utils.replay import recorded
+
+
+@profiled
+@recorded
+class EdgeDetector(dai.node.HostNode):
+    """Example host node doing a moderate amount of per-frame CPU work."""
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def build(self, frame: dai.Node.Output) -> "EdgeDetector":
+        self.link_args(frame)
+        return self
+
+    def process(self, frame: dai.ImgFrame) -> None:
+        gray = cv2.cvtColor(frame.getCvFrame(), cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+
+        out = dai.ImgFrame()
+        out.setCvFrame(edges, dai.ImgFrame.Type.GRAY8)
+        out.setTimestamp(frame.getTimestamp())
+        out.setTimestampDevice(frame.getTimestampDevice())
+        out.setSequenceNum(frame.getSequenceNum())
+        self.out.send(out)
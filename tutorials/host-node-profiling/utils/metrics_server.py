@@ -0,0 +1,38 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from utils.profiling import REGISTRY, ProfileRegistry
+
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    """Handle requests in a separate thread."""
+
+    daemon_threads = True
+
+
+def start_metrics_server(
+    port: int, registry: ProfileRegistry = REGISTRY
+) -> ThreadedHTTPServer:
+    """Serve the registry in Prometheus text format on `http://<host>:<port>/metrics`."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-type", "text/plain; version=0.0.4")
+            self.send_header("Content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedHTTPServer(("0.0.0.0", port), MetricsHandler)
+    th = threading.Thread(target=server.serve_forever)
+    th.daemon = True
+    th.start()
+    return server
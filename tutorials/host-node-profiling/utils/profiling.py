@@ -0,0 +1,261 @@
+import csv
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, TextIO
+
+import depthai as dai
+
+# Bucket upper bounds in milliseconds, chosen around common camera frame periods.
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 33, 50, 66, 100, 200, 500, 1000)
+
+METRIC_TYPES = {
+    "hostnode_process_ms": "histogram",
+    "hostnode_latency_ms": "histogram",
+    "hostnode_clock_offset_ms": "gauge",
+    "hostnode_dropped_messages_total": "counter",
+    "hostnode_process_errors_total": "counter",
+    "hostnode_queue_depth": "gauge",
+}
+
+TRACE_HEADER = ["node", "input", "sequence_num", "process_ms", "latency_ms"]
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-compatible cumulative output."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, metric: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{metric}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{metric}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class NodeProfile:
+    """Per-node counters: processing time, end-to-end latency, drops, errors and queue
+    depth.
+
+    Latency is measured as the time between the moment the message was captured
+    (`getTimestamp`, already synced to the host clock) and the moment the node
+    finished processing it. The device to host clock offset is tracked separately
+    from `getTimestampDevice` so that clock drift can be told apart from real
+    pipeline delay.
+    """
+
+    def __init__(self, name: str, registry: "ProfileRegistry") -> None:
+        self.name = name
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.process_ms = Histogram()
+        self.latency_ms = Histogram()
+        self.clock_offset_ms = 0.0
+        self.drops: Dict[str, int] = {}
+        self.errors = 0
+        self.queue_depth: Dict[str, int] = {}
+        self._last_seq: Dict[str, int] = {}
+
+    @contextmanager
+    def measure(self, messages: Dict[str, dai.Buffer]):
+        """Time the enclosed block and account for the given input messages.
+
+        Meant for `ThreadedHostNode.run` loops, `profiled` uses it for `HostNode`s.
+        The messages are accounted for even if the block raises, which is also
+        counted as an error.
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self._record(messages, (time.perf_counter() - start) * 1000, failed)
+
+    def _record(
+        self, messages: Dict[str, dai.Buffer], process_ms: float, failed: bool
+    ) -> None:
+        now = dai.Clock.now()
+        with self._lock:
+            self.errors += failed
+            self.process_ms.observe(process_ms)
+            for input_name, message in messages.items():
+                latency_ms = self._account(input_name, message, now)
+                if latency_ms is not None:
+                    self._registry.trace(
+                        self.name,
+                        input_name,
+                        message.getSequenceNum(),
+                        process_ms,
+                        latency_ms,
+                    )
+
+    def set_queue_depth(self, input_name: str, depth: int) -> None:
+        with self._lock:
+            self.queue_depth[input_name] = depth
+
+    def _account(self, input_name: str, message: dai.Buffer, now) -> Optional[float]:
+        seq = message.getSequenceNum()
+        last_seq = self._last_seq.get(input_name)
+        self.drops.setdefault(input_name, 0)
+        if last_seq is not None and seq > last_seq + 1:
+            self.drops[input_name] += seq - last_seq - 1
+        self._last_seq[input_name] = seq
+
+        timestamp = message.getTimestamp()
+        if not timestamp:
+            # Host created messages without a timestamp carry no latency info
+            return None
+        latency_ms = (now - timestamp).total_seconds() * 1000
+        self.latency_ms.observe(latency_ms)
+        self.clock_offset_ms = (
+            timestamp - message.getTimestampDevice()
+        ).total_seconds() * 1000
+        return latency_ms
+
+    def render(self) -> Dict[str, List[str]]:
+        """Return the exposition lines of this node grouped by metric family."""
+        node = f'node="{self.name}"'
+        with self._lock:
+            return {
+                "hostnode_process_ms": self.process_ms.render(
+                    "hostnode_process_ms", node
+                ),
+                "hostnode_latency_ms": self.latency_ms.render(
+                    "hostnode_latency_ms", node
+                ),
+                "hostnode_clock_offset_ms": [
+                    f"hostnode_clock_offset_ms{{{node}}} {self.clock_offset_ms:.3f}"
+                ],
+                "hostnode_dropped_messages_total": [
+                    f'hostnode_dropped_messages_total{{{node},input="{input_name}"}} {drops}'
+                    for input_name, drops in self.drops.items()
+                ],
+                "hostnode_process_errors_total": [
+                    f"hostnode_process_errors_total{{{node}}} {self.errors}"
+                ],
+                "hostnode_queue_depth": [
+                    f'hostnode_queue_depth{{{node},input="{input_name}"}} {depth}'
+                    for input_name, depth in self.queue_depth.items()
+                ],
+            }
+
+
+class ProfileRegistry:
+    """Collects `NodeProfile`s and renders them as Prometheus text or a CSV trace."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, NodeProfile] = {}
+        self._trace_file: Optional[TextIO] = None
+        self._trace_writer = None
+
+    def get(self, name: str) -> NodeProfile:
+        with self._lock:
+            if name not in self._profiles:
+                self._profiles[name] = NodeProfile(name, self)
+            return self._profiles[name]
+
+    def enable_trace(self, path: str) -> None:
+        """Write one CSV row per processed message to `path`."""
+        with self._lock:
+            self._trace_file = open(path, "w", newline="")
+            self._trace_writer = csv.writer(self._trace_file)
+            self._trace_writer.writerow(TRACE_HEADER)
+
+    def trace(
+        self,
+        node: str,
+        input_name: str,
+        sequence_num: int,
+        process_ms: float,
+        latency_ms: float,
+    ) -> None:
+        with self._lock:
+            if self._trace_writer is None:
+                return
+            self._trace_writer.writerow(
+                [
+                    node,
+                    input_name,
+                    sequence_num,
+                    f"{process_ms:.3f}",
+                    f"{latency_ms:.3f}",
+                ]
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+                self._trace_writer = None
+
+    def render(self) -> str:
+        """Render all profiles in the Prometheus text exposition format."""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        families: Dict[str, List[str]] = {metric: [] for metric in METRIC_TYPES}
+        for profile in profiles:
+            for metric, lines in profile.render().items():
+                families[metric] += lines
+        output = []
+        for metric, lines in families.items():
+            output.append(f"# TYPE {metric} {METRIC_TYPES[metric]}")
+            output += lines
+        return "\n".join(output) + "\n"
+
+
+REGISTRY = ProfileRegistry()
+
+
+def profiled(
+    cls=None, *, name: Optional[str] = None, registry: ProfileRegistry = REGISTRY
+):
+    """Class decorator that instruments `process` of a `dai.node.HostNode` subclass.
+
+    Usage:
+        @profiled
+        class MyNode(dai.node.HostNode):
+            def process(self, frame, detections): ...
+
+    The wrapped `process` keeps its signature, so `link_args` still creates the
+    inputs by parameter name.
+    """
+
+    def decorate(node_cls):
+        process = node_cls.process
+        input_names = list(inspect.signature(process).parameters)[1:]
+        profile_name = name or node_cls.__name__
+
+        @functools.wraps(process)
+        def wrapper(self, *messages):
+            profile = registry.get(profile_name)
+            for input_name in input_names:
+                profile.set_queue_depth(input_name, self.inputs[input_name].getSize())
+            with profile.measure(dict(zip(input_names, messages))):
+                process(self, *messages)
+
+        node_cls.process = wrapper
+        return node_cls
+
+    if cls is not None:
+        return decorate(cls)
+    return decorate
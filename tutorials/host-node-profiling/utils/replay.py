@@ -0,0 +1,277 @@
+import functools
+import inspect
+import os
+import pickle
+import struct
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import depthai as dai
+import numpy as np
+
+# Every record is a little-endian uint32 length followed by a pickled dict of
+# plain Python values and NumPy arrays. Messages are stored in their native
+# layout (e.g. NV12 bytes, not BGR), which keeps recordings compact.
+RECORD_HEADER = struct.Struct("<I")
+RECORDING_SUFFIX = ".rec"
+
+
+def _common_fields(msg: dai.Buffer) -> Dict:
+    return {
+        "seq": msg.getSequenceNum(),
+        "ts": msg.getTimestamp(),
+        "ts_device": msg.getTimestampDevice(),
+    }
+
+
+def _set_common_fields(msg: dai.Buffer, fields: Dict) -> dai.Buffer:
+    msg.setSequenceNum(fields["seq"])
+    msg.setTimestamp(fields["ts"])
+    msg.setTimestampDevice(fields["ts_device"])
+    return msg
+
+
+def _encode_img_frame(msg: dai.ImgFrame) -> Dict:
+    return {
+        "data": np.array(msg.getData(), dtype=np.uint8),
+        "width": msg.getWidth(),
+        "height": msg.getHeight(),
+        "stride": msg.getStride(),
+        "frame_type": msg.getType().name,
+    }
+
+
+def _decode_img_frame(fields: Dict) -> dai.ImgFrame:
+    msg = dai.ImgFrame()
+    msg.setData(fields["data"])
+    msg.setWidth(fields["width"])
+    msg.setHeight(fields["height"])
+    msg.setStride(fields["stride"])
+    msg.setType(getattr(dai.ImgFrame.Type, fields["frame_type"]))
+    return msg
+
+
+def _encode_detections(msg: dai.ImgDetections) -> Dict:
+    spatial = isinstance(msg, dai.SpatialImgDetections)
+    rows = []
+    for det in msg.detections:
+        row = [det.label, det.confidence, det.xmin, det.ymin, det.xmax, det.ymax]
+        if spatial:
+            coords = det.spatialCoordinates
+            row += [coords.x, coords.y, coords.z]
+        rows.append(row)
+    return {
+        "spatial": spatial,
+        "detections": np.array(rows, dtype=np.float32).reshape(-1, 9 if spatial else 6),
+    }
+
+
+def _decode_detections(fields: Dict) -> dai.ImgDetections:
+    spatial = fields["spatial"]
+    msg = dai.SpatialImgDetections() if spatial else dai.ImgDetections()
+    detections = []
+    for row in fields["detections"].tolist():
+        det = dai.SpatialImgDetection() if spatial else dai.ImgDetection()
+        det.label = int(row[0])
+        det.confidence, det.xmin, det.ymin, det.xmax, det.ymax = row[1:6]
+        if spatial:
+            det.spatialCoordinates = dai.Point3f(*row[6:9])
+        detections.append(det)
+    msg.detections = detections
+    return msg
+
+
+def _encode_tracklets(msg: dai.Tracklets) -> Dict:
+    rows = []
+    for t in msg.tracklets:
+        src = t.srcImgDetection
+        rows.append(
+            [
+                t.id,
+                t.label,
+                t.age,
+                int(t.status),
+                t.roi.x,
+                t.roi.y,
+                t.roi.width,
+                t.roi.height,
+                t.spatialCoordinates.x,
+                t.spatialCoordinates.y,
+                t.spatialCoordinates.z,
+                src.confidence,
+                src.xmin,
+                src.ymin,
+                src.xmax,
+                src.ymax,
+            ]
+        )
+    return {"tracklets": np.array(rows, dtype=np.float64).reshape(-1, 16)}
+
+
+def _decode_tracklets(fields: Dict) -> dai.Tracklets:
+    msg = dai.Tracklets()
+    tracklets = []
+    for row in fields["tracklets"].tolist():
+        t = dai.Tracklet()
+        t.id, t.label, t.age = int(row[0]), int(row[1]), int(row[2])
+        t.status = dai.Tracklet.TrackingStatus(int(row[3]))
+        t.roi = dai.Rect(*row[4:8])
+        t.spatialCoordinates = dai.Point3f(*row[8:11])
+        src = dai.ImgDetection()
+        src.label = t.label
+        src.confidence, src.xmin, src.ymin, src.xmax, src.ymax = row[11:16]
+        t.srcImgDetection = src
+        tracklets.append(t)
+    msg.tracklets = tracklets
+    return msg
+
+
+def _encode_nn_data(msg: dai.NNData) -> Dict:
+    return {"tensors": {name: msg.getTensor(name) for name in msg.getAllLayerNames()}}
+
+
+def _decode_nn_data(fields: Dict) -> dai.NNData:
+    msg = dai.NNData()
+    for name, tensor in fields["tensors"].items():
+        msg.addTensor(name, tensor)
+    return msg
+
+
+def _encode_point_cloud(msg: dai.PointCloudData) -> Dict:
+    if msg.isColor():
+        points, colors = msg.getPointsRGB()
+    else:
+        points, colors = msg.getPoints(), None
+    return {
+        "points": points,
+        "colors": colors,
+        "width": msg.getWidth(),
+        "height": msg.getHeight(),
+    }
+
+
+def _decode_point_cloud(fields: Dict) -> dai.PointCloudData:
+    msg = dai.PointCloudData()
+    if fields["colors"] is None:
+        msg.setPoints(fields["points"])
+    else:
+        msg.setPointsRGB(fields["points"], fields["colors"])
+    msg.setWidth(fields["width"])
+    msg.setHeight(fields["height"])
+    return msg
+
+
+# Ordered from the most specific type, SpatialImgDetections is an ImgDetections
+# in some DepthAI versions.
+CODECS: List[Tuple[str, type, Callable, Callable]] = [
+    ("ImgFrame", dai.ImgFrame, _encode_img_frame, _decode_img_frame),
+    ("ImgDetections", dai.SpatialImgDetections, _encode_detections, _decode_detections),
+    ("ImgDetections", dai.ImgDetections, _encode_detections, _decode_detections),
+    ("Tracklets", dai.Tracklets, _encode_tracklets, _decode_tracklets),
+    ("NNData", dai.NNData, _encode_nn_data, _decode_nn_data),
+    ("PointCloudData", dai.PointCloudData, _encode_point_cloud, _decode_point_cloud),
+]
+DECODERS = {name: decode for name, _, _, decode in CODECS}
+
+
+def encode_message(msg: dai.Buffer) -> Dict:
+    for name, msg_type, encode, _ in CODECS:
+        if isinstance(msg, msg_type):
+            return {"type": name, **_common_fields(msg), **encode(msg)}
+    raise TypeError(f"Recording of {type(msg).__name__} messages is not supported.")
+
+
+def decode_message(record: Dict) -> dai.Buffer:
+    return _set_common_fields(DECODERS[record["type"]](record), record)
+
+
+def write_record(file: BinaryIO, record: Dict) -> None:
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    file.write(RECORD_HEADER.pack(len(payload)))
+    file.write(payload)
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            (size,) = RECORD_HEADER.unpack(header)
+            yield pickle.loads(file.read(size))
+
+
+def load_recording(path: str) -> List[List[dai.Buffer]]:
+    """Read a recording into memory as a list of `process()` argument lists."""
+    return [
+        [decode_message(msg) for msg in record["messages"]]
+        for record in read_records(path)
+    ]
+
+
+class MessageRecorder:
+    """Writes the inputs of every `process()` call of `recorded` nodes to disk.
+
+    Each node class gets its own `<directory>/<NodeName>.rec` file.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+        self._files: Dict[str, BinaryIO] = {}
+
+    def enable(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    @property
+    def enabled(self) -> bool:
+        return self._directory is not None
+
+    def write(self, node: str, messages: Tuple[dai.Buffer, ...]) -> None:
+        record = {"node": node, "messages": [encode_message(msg) for msg in messages]}
+        with self._lock:
+            if node not in self._files:
+                path = os.path.join(self._directory, node + RECORDING_SUFFIX)
+                self._files[node] = open(path, "wb")
+            write_record(self._files[node], record)
+
+    def close(self) -> None:
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files.clear()
+
+
+RECORDER = MessageRecorder()
+
+
+def recorded(
+    cls=None, *, name: Optional[str] = None, recorder: MessageRecorder = RECORDER
+):
+    """Class decorator that records the inputs of `process` of a `dai.node.HostNode`.
+
+    Nothing is written until `recorder.enable(directory)` is called.
+    """
+
+    def decorate(node_cls):
+        process = node_cls.process
+        node_name = name or node_cls.__name__
+
+        @functools.wraps(process)
+        def wrapper(self, *messages):
+            if recorder.enabled:
+                recorder.write(node_name, messages)
+            process(self, *messages)
+
+        node_cls.process = wrapper
+        return node_cls
+
+    if cls is not None:
+        return decorate(cls)
+    return decorate
+
+
+def unwrapped_process(node: dai.node.HostNode) -> Callable:
+    """Return the original `process` of `node`, without profiling or recording."""
+    return functools.partial(inspect.unwrap(type(node).process), node)
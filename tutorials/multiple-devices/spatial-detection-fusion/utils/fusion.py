@@ -1,9 +1,9 @@
 import depthai as dai
-import time
 import datetime
 import collections
+import heapq
+import threading
 import numpy as np
-import bisect
 from typing import Dict, List, Any
 from scipy.optimize import linear_sum_assignment
 
@@ -53,11 +53,16 @@ class FusionManager(dai.node.ThreadedHostNode):
             )
             self.inputs[mxid] = inp
 
-        self.detection_buffer: Dict[int, List[WorldDetection]] = (
-            collections.defaultdict(list)
-        )
+        self.detection_buffer: Dict[int, List[WorldDetection]] = {}
+        # min-heap of the timestamps present in detection_buffer
         self.timestamp_queue: List[int] = []
 
+        # input callbacks wake up the fusion thread instead of sleep polling
+        self._new_data = threading.Condition()
+        self._has_new_data = False
+        for inp in self.inputs.values():
+            inp.addCallback(self._on_new_data)
+
         frame_time_ms = 1000 / self.fps  # time for one frame in milliseconds
         self.time_window_ms = (
             frame_time_ms * 0.8
@@ -71,60 +76,69 @@ class FusionManager(dai.node.ThreadedHostNode):
 
     def run(self):
         while self.isRunning():
+            with self._new_data:
+                # the timeout only bounds how long a stopped pipeline goes unnoticed
+                self._new_data.wait_for(lambda: self._has_new_data, timeout=0.1)
+                self._has_new_data = False
             self._read_inputs()
-            self._process_buffer()
-            time.sleep(0.75 / self.fps)
+            while self._process_buffer():
+                pass
+
+    def _on_new_data(self, *_) -> None:
+        with self._new_data:
+            self._has_new_data = True
+            self._new_data.notify()
 
     def _read_inputs(self):
         """Read all available detections from input queues and buffer them."""
         for mxid, inp in self.inputs.items():
-            msg = inp.tryGet()
-            if msg is None:
-                continue
-
-            assert isinstance(msg, dai.SpatialImgDetections)
             extrinsics = self.all_cam_extrinsics.get(mxid)
-            if not extrinsics:
-                continue
-
-            world_dets = self._transform_detections_to_world(
-                msg.detections, extrinsics["cam_to_world"], extrinsics["friendly_id"]
-            )
-
-            ts_ms = int(msg.getTimestamp().total_seconds() * 1000)
-            self.latest_device_timestamp_ms = max(
-                self.latest_device_timestamp_ms, ts_ms
-            )
+            for msg in inp.tryGetAll():
+                assert isinstance(msg, dai.SpatialImgDetections)
+                if not extrinsics:
+                    continue
+
+                world_dets = self._transform_detections_to_world(
+                    msg.detections,
+                    extrinsics["cam_to_world"],
+                    extrinsics["friendly_id"],
+                )
 
-            self.detection_buffer[ts_ms].extend(world_dets)
+                ts_ms = int(msg.getTimestamp().total_seconds() * 1000)
+                self.latest_device_timestamp_ms = max(
+                    self.latest_device_timestamp_ms, ts_ms
+                )
 
-            if ts_ms not in self.timestamp_queue:
-                bisect.insort(self.timestamp_queue, ts_ms)
+                if ts_ms not in self.detection_buffer:
+                    self.detection_buffer[ts_ms] = []
+                    heapq.heappush(self.timestamp_queue, ts_ms)
+                self.detection_buffer[ts_ms].extend(world_dets)
 
-    def _process_buffer(self):
+    def _process_buffer(self) -> bool:
         """
-        Process timestamps that are older than the fusion timeout,
-        ensuring all relevant cameras have reported.
+        Process the oldest time window if it is older than the fusion timeout,
+        ensuring all relevant cameras have reported. Returns True if a window was
+        consumed.
         """
         if not self.timestamp_queue:
-            return
+            return False
 
         oldest_ts_ms = self.timestamp_queue[0]
 
         if (self.latest_device_timestamp_ms - oldest_ts_ms) / 1000 > self.timeout:
-            start_ts = self.timestamp_queue.pop(0)
+            start_ts = heapq.heappop(self.timestamp_queue)
             end_ts = start_ts + self.time_window_ms
 
             all_detections_in_window = self.detection_buffer.pop(start_ts, [])
 
             while self.timestamp_queue and self.timestamp_queue[0] <= end_ts:
-                ts_to_pop = self.timestamp_queue.pop(0)
+                ts_to_pop = heapq.heappop(self.timestamp_queue)
                 all_detections_in_window.extend(
                     self.detection_buffer.pop(ts_to_pop, [])
                 )
 
             if not all_detections_in_window:
-                return
+                return True
 
             groups = self._group_detections(all_detections_in_window)
             pruned_groups = self._prune_redundant_detections(groups)
@@ -132,6 +146,9 @@ class FusionManager(dai.node.ThreadedHostNode):
             buffer = DetectionGroupBuffer(pruned_groups)
             buffer.setTimestamp(datetime.timedelta(milliseconds=start_ts))
             self.output.send(buffer)
+            return True
+
+        return False
 
     def _prune_redundant_detections(
         self, groups: List[List[WorldDetection]]
@@ -163,29 +180,33 @@ class FusionManager(dai.node.ThreadedHostNode):
         cam_to_world: np.ndarray,
         friendly_id: int,
     ) -> List[WorldDetection]:
-        world_detections: List[WorldDetection] = []
-        for det in detections:
-            coords = det.spatialCoordinates
-
-            # filter out ghost detections with z=0
-            if coords.z == 0:
-                continue
+        if not detections:
+            return []
 
-            # Convert from mm to m and add homogeneous w=1
-            pos_cam = np.array(
-                [coords.x / 1000.0, -coords.y / 1000.0, coords.z / 1000.0, 1.0]
-            )
-            pos_world = cam_to_world @ pos_cam.reshape(4, 1)
-
-            world_detections.append(
-                WorldDetection(
-                    label=det.labelName,
-                    confidence=det.confidence,
-                    pos_world_homogeneous=pos_world,
-                    camera_friendly_id=friendly_id,
-                )
+        coords = np.array(
+            [
+                (d.spatialCoordinates.x, d.spatialCoordinates.y, d.spatialCoordinates.z)
+                for d in detections
+            ]
+        )
+        # filter out ghost detections with z=0
+        valid = np.flatnonzero(coords[:, 2] != 0)
+
+        # Convert from mm to m and add homogeneous w=1, then transform all at once
+        pos_cam = np.ones((len(valid), 4))
+        pos_cam[:, :3] = coords[valid] / 1000.0
+        pos_cam[:, 1] *= -1
+        pos_world = cam_to_world @ pos_cam.T
+
+        return [
+            WorldDetection(
+                label=detections[idx].labelName,
+                confidence=detections[idx].confidence,
+                pos_world_homogeneous=pos_world[:, i : i + 1],
+                camera_friendly_id=friendly_id,
             )
-        return world_detections
+            for i, idx in enumerate(valid)
+        ]
 
     def _group_detections(
         self, detections: List[WorldDetection]
@@ -204,43 +225,97 @@ class FusionManager(dai.node.ThreadedHostNode):
         all_groups = []
 
         for _, dets in detections_by_label.items():
-            num_dets = len(dets)
-            if num_dets <= 1:
+            if len(dets) <= 1:
                 all_groups.append(dets)
                 continue
 
-            cost_matrix = np.full((num_dets, num_dets), np.inf)
-            for i in range(num_dets):
-                for j in range(i + 1, num_dets):
-                    dist = np.linalg.norm(
-                        dets[i].pos_world_homogeneous[:3]
-                        - dets[j].pos_world_homogeneous[:3]
-                    )
-                    cost_matrix[i, j] = dist
-                    cost_matrix[j, i] = dist
-
-            row_ind, col_ind = linear_sum_assignment(cost_matrix)
-
-            adj = collections.defaultdict(list)
-            for r, c in zip(row_ind, col_ind):
-                if r < c and cost_matrix[r, c] < self.distance_threshold_m:
-                    adj[r].append(c)
-                    adj[c].append(r)
-
-            visited = set()
-            for i in range(num_dets):
-                if i not in visited:
-                    current_group_indices = []
-                    q = collections.deque([i])
-                    visited.add(i)
-                    while q:
-                        u = q.popleft()
-                        current_group_indices.append(u)
-                        for v in adj.get(u, []):
-                            if v not in visited:
-                                visited.add(v)
-                                q.append(v)
-
-                    all_groups.append([dets[idx] for idx in current_group_indices])
+            positions = np.array([d.pos_world_cartesian for d in dets])
+            for cluster in self._spatial_clusters(positions):
+                all_groups.extend(
+                    [dets[cluster[idx]] for idx in group]
+                    for group in self._assign_cluster(positions[cluster])
+                )
 
         return all_groups
+
+    def _spatial_clusters(self, positions: np.ndarray) -> List[np.ndarray]:
+        """
+        Splits detections into clusters that can possibly be matched, using a grid
+        with cell size equal to the distance threshold. Detections further apart than
+        the threshold can never be grouped, so each cluster can be assigned on its own.
+        """
+        cells = np.floor(positions / self.distance_threshold_m).astype(np.int64)
+        cell_members = collections.defaultdict(list)
+        for idx, cell in enumerate(map(tuple, cells)):
+            cell_members[cell].append(idx)
+
+        parent = list(range(len(positions)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for (cx, cy, cz), members in cell_members.items():
+            neighbours = [
+                n
+                for dx in (-1, 0, 1)
+                for dy in (-1, 0, 1)
+                for dz in (-1, 0, 1)
+                for n in cell_members.get((cx + dx, cy + dy, cz + dz), ())
+            ]
+            dists = np.linalg.norm(
+                positions[members][:, None, :] - positions[neighbours][None, :, :],
+                axis=2,
+            )
+            for i, j in zip(*np.nonzero(dists < self.distance_threshold_m)):
+                root_a, root_b = find(members[i]), find(neighbours[j])
+                if root_a != root_b:
+                    parent[root_a] = root_b
+
+        clusters = collections.defaultdict(list)
+        for idx in range(len(positions)):
+            clusters[find(idx)].append(idx)
+        return [np.array(members) for members in clusters.values()]
+
+    def _assign_cluster(self, positions: np.ndarray) -> List[List[int]]:
+        """
+        Groups detections of one cluster using the Hungarian algorithm for optimal
+        assignment, then finds connected components to form final groups.
+        """
+        num_dets = len(positions)
+        if num_dets <= 1:
+            return [list(range(num_dets))]
+
+        cost_matrix = np.linalg.norm(
+            positions[:, None, :] - positions[None, :, :], axis=2
+        )
+        np.fill_diagonal(cost_matrix, np.inf)
+
+        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+
+        adj = collections.defaultdict(list)
+        for r, c in zip(row_ind, col_ind):
+            if r < c and cost_matrix[r, c] < self.distance_threshold_m:
+                adj[r].append(c)
+                adj[c].append(r)
+
+        groups = []
+        visited = set()
+        for i in range(num_dets):
+            if i not in visited:
+                current_group_indices = []
+                q = collections.deque([i])
+                visited.add(i)
+                while q:
+                    u = q.popleft()
+                    current_group_indices.append(u)
+                    for v in adj.get(u, []):
+                        if v not in visited:
+                            visited.add(v)
+                            q.append(v)
+
+                groups.append(current_group_indices)
+
+        return groups
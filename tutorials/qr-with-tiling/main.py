@@ -2,6 +2,7 @@ from pathlib import Path
 
 import depthai as dai
 from depthai_nodes.node import ParsingNeuralNetwork, TilesPatcher, Tiling
+from utils.adaptive_tiling import AdaptiveTiling, AdaptiveTilesPatcher
 from utils.arguments import initialize_argparser
 from utils.host_qr_scanner import QRScanner
 
@@ -41,40 +42,82 @@ with dai.Pipeline(device) as pipeline:
 
     grid_size = (args.rows, args.columns)
 
-    tile_manager = pipeline.create(Tiling).build(
-        img_output=cam_out,
-        img_shape=IMG_SHAPE,
-        overlap=OVERLAP,
-        grid_size=grid_size,
-        grid_matrix=GRID_MATRIX,
-        global_detection=GLOBAL_DETECTION,
-        nn_shape=nn_archive.getInputSize(),
-        resize_mode=dai.ImageManipConfig.ResizeMode.STRETCH,
-    )
+    if args.fixed_grid:
+        tile_manager = pipeline.create(Tiling).build(
+            img_output=cam_out,
+            img_shape=IMG_SHAPE,
+            overlap=OVERLAP,
+            grid_size=grid_size,
+            grid_matrix=GRID_MATRIX,
+            global_detection=GLOBAL_DETECTION,
+            nn_shape=nn_archive.getInputSize(),
+            resize_mode=dai.ImageManipConfig.ResizeMode.STRETCH,
+        )
 
-    nn_input = tile_manager.out
-    if platform == dai.Platform.RVC4:
-        interleaved_manip = pipeline.create(dai.node.ImageManip)
-        interleaved_manip.initialConfig.setFrameType(dai.ImgFrame.Type.BGR888i)
-        tile_manager.out.link(interleaved_manip.inputImage)
-        nn_input = interleaved_manip.out
+        nn_input = tile_manager.out
+        if platform == dai.Platform.RVC4:
+            interleaved_manip = pipeline.create(dai.node.ImageManip)
+            interleaved_manip.initialConfig.setFrameType(dai.ImgFrame.Type.BGR888i)
+            tile_manager.out.link(interleaved_manip.inputImage)
+            nn_input = interleaved_manip.out
 
-    nn = pipeline.create(ParsingNeuralNetwork).build(nn_input, nn_archive)
+        nn = pipeline.create(ParsingNeuralNetwork).build(nn_input, nn_archive)
 
-    nn.input.setMaxSize(grid_size[0] * grid_size[1])
-    nn.input.setBlocking(False)
+        nn.input.setMaxSize(grid_size[0] * grid_size[1])
+        nn.input.setBlocking(False)
 
-    patcher = pipeline.create(TilesPatcher).build(
-        img_frames=cam_out, nn=nn.out, conf_thresh=0.3, iou_thresh=0.2
-    )
+        patcher = pipeline.create(TilesPatcher).build(
+            img_frames=cam_out, nn=nn.out, conf_thresh=0.3, iou_thresh=0.2
+        )
 
-    tile_positions = tile_manager._computeTilePositions(
-        overlap=OVERLAP,
-        grid_size=grid_size,
-        img_shape=IMG_SHAPE,
-        grid_matrix=GRID_MATRIX,
-        global_detection=GLOBAL_DETECTION,
-    )
+        tile_positions = tile_manager._computeTilePositions(
+            overlap=OVERLAP,
+            grid_size=grid_size,
+            img_shape=IMG_SHAPE,
+            grid_matrix=GRID_MATRIX,
+            global_detection=GLOBAL_DETECTION,
+        )
+    else:
+        # Only tiles with recent detections or motion are sent to the NN
+        tile_scheduler = pipeline.create(AdaptiveTiling).build(
+            frame=cam_out,
+            img_shape=IMG_SHAPE,
+            grid_size=(args.columns, args.rows),
+            overlap=OVERLAP,
+            nn_shape=nn_archive.getInputSize(),
+            frame_type=dai.ImgFrame.Type.BGR888i
+            if platform == dai.Platform.RVC4
+            else dai.ImgFrame.Type.BGR888p,
+            scan_interval=args.scan_interval,
+        )
+        tile_scheduler.inputs["frame"].setBlocking(False)
+        tile_scheduler.inputs["frame"].setMaxSize(2)
+
+        nn_w, nn_h = nn_archive.getInputSize()
+        crop_manip = pipeline.create(dai.node.ImageManip)
+        crop_manip.inputConfig.setReusePreviousMessage(False)
+        crop_manip.setMaxOutputFrameSize(nn_w * nn_h * 3)
+        # Crops are made from the frames the scheduler processed, never from the
+        # camera directly, so the configs always apply to the frame they were made for
+        tile_scheduler.frame_output.link(crop_manip.inputImage)
+        tile_scheduler.config_output.link(crop_manip.inputConfig)
+        crop_manip.inputImage.setBlocking(True)
+        crop_manip.inputConfig.setBlocking(True)
+
+        nn = pipeline.create(ParsingNeuralNetwork).build(crop_manip.out, nn_archive)
+
+        # Tile results are matched to the schedule in order, so nothing may be dropped
+        nn.input.setMaxSize(2 * (grid_size[0] * grid_size[1] + 1))
+        nn.input.setBlocking(True)
+
+        patcher = pipeline.create(AdaptiveTilesPatcher).build(
+            tiling=tile_scheduler, nn=nn.out, conf_thresh=0.3, iou_thresh=0.2
+        )
+
+        # QRScanner draws tiles as x1, y1, x2, y2, as Tiling computes them
+        tile_positions = [
+            (x, y, x + w, y + h) for x, y, w, h in tile_scheduler.tile_positions
+        ]
 
     scanner = pipeline.create(QRScanner).build(
         preview=cam_out, nn=patcher.out, tile_positions=tile_positions
@@ -0,0 +1,313 @@
+import threading
+from typing import List, Optional, Tuple
+
+import depthai as dai
+import numpy as np
+
+# Downscaling factor of the luma plane used for motion detection.
+MOTION_SCALE = 8
+
+
+class TileSchedule(dai.Buffer):
+    """Tiles (x, y, w, h in pixels) that were sent to the NN for one frame, in order."""
+
+    def __init__(self, tiles: List[Tuple[int, int, int, int]]):
+        super().__init__()
+        self.tiles = tiles
+
+
+def compute_tile_positions(
+    img_shape: Tuple[int, int], grid_size: Tuple[int, int], overlap: float
+) -> List[Tuple[int, int, int, int]]:
+    """Split the image into a (columns, rows) grid of overlapping tiles."""
+    img_w, img_h = img_shape
+    cols, rows = grid_size
+    tile_w = img_w / (cols - (cols - 1) * overlap)
+    tile_h = img_h / (rows - (rows - 1) * overlap)
+    positions = []
+    for row in range(rows):
+        for col in range(cols):
+            x = int(round(col * tile_w * (1 - overlap)))
+            y = int(round(row * tile_h * (1 - overlap)))
+            positions.append(
+                (
+                    x,
+                    y,
+                    min(int(round(tile_w)), img_w - x),
+                    min(int(round(tile_h)), img_h - y),
+                )
+            )
+    return positions
+
+
+class AdaptiveTiling(dai.node.HostNode):
+    """Decides for every frame which tiles are worth running the detector on.
+
+    A cheap full-frame (global) pass runs every `scan_interval` frames. In between,
+    only tiles that had detections in the last `hold_frames` frames or that show
+    motion are cropped, plus one tile in round-robin order so that small objects
+    the global pass can not see are still found eventually.
+
+    Each processed frame is forwarded on `frame_output`, followed by its crop
+    configurations, to an ImageManip node with
+    `inputConfig.setReusePreviousMessage(False)`. The ImageManip must take its
+    images from `frame_output` and not from the camera: frames dropped on the input
+    of this node would otherwise shift the crops onto a different frame. The list of
+    cropped tiles is sent to `AdaptiveTilesPatcher`, which maps the NN results back
+    to the full frame.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.frame_output = self.createOutput(
+            possibleDatatypes=[
+                dai.Node.DatatypeHierarchy(dai.DatatypeEnum.ImgFrame, True)
+            ]
+        )
+        self.config_output = self.createOutput(
+            possibleDatatypes=[
+                dai.Node.DatatypeHierarchy(dai.DatatypeEnum.ImageManipConfig, True)
+            ]
+        )
+        self.schedule_output = self.createOutput(
+            possibleDatatypes=[
+                dai.Node.DatatypeHierarchy(dai.DatatypeEnum.Buffer, True)
+            ]
+        )
+        self._lock = threading.Lock()
+        self._frame_count = 0
+        self._prev_luma: Optional[np.ndarray] = None
+
+    def build(
+        self,
+        frame: dai.Node.Output,
+        img_shape: Tuple[int, int],
+        grid_size: Tuple[int, int],
+        overlap: float,
+        nn_shape: Tuple[int, int],
+        frame_type: dai.ImgFrame.Type,
+        scan_interval: int = 10,
+        hold_frames: int = 15,
+        motion_threshold: int = 25,
+        motion_fraction: float = 0.01,
+    ) -> "AdaptiveTiling":
+        self.link_args(frame)
+        self.img_shape = img_shape
+        self.nn_shape = nn_shape
+        self.frame_type = frame_type
+        self.scan_interval = scan_interval
+        self.hold_frames = hold_frames
+        self.motion_threshold = motion_threshold
+        self.motion_fraction = motion_fraction
+
+        self.tile_positions = compute_tile_positions(img_shape, grid_size, overlap)
+        self._tiles = np.array(self.tile_positions, dtype=np.int32)
+        # frame index at which each tile last had a detection
+        self._last_active = np.full(len(self._tiles), -(10**9), dtype=np.int64)
+        return self
+
+    def process(self, frame: dai.ImgFrame) -> None:
+        luma = self._downscaled_luma(frame)
+        with self._lock:
+            active = self._frame_count - self._last_active <= self.hold_frames
+            frame_index = self._frame_count
+            self._frame_count += 1
+        if self._prev_luma is not None and self._prev_luma.shape == luma.shape:
+            active |= self._motion_tiles(luma)
+        self._prev_luma = luma
+        active[frame_index % len(self._tiles)] = True
+
+        tiles = [tuple(int(v) for v in self._tiles[i]) for i in np.flatnonzero(active)]
+        if frame_index % self.scan_interval == 0:
+            tiles.insert(0, (0, 0, self.img_shape[0], self.img_shape[1]))
+
+        timestamp = frame.getTimestamp()
+        sequence_num = frame.getSequenceNum()
+
+        # The crops below are made from this frame, with the same sequence number
+        self.frame_output.send(frame)
+
+        # Skip the current frame / load new frame
+        cfg = dai.ImageManipConfig()
+        cfg.setSkipCurrentImage(True)
+        cfg.setTimestamp(timestamp)
+        cfg.setSequenceNum(sequence_num)
+        self.config_output.send(cfg)
+
+        for x, y, w, h in tiles:
+            cfg = dai.ImageManipConfig()
+            cfg.addCrop(x, y, w, h)
+            cfg.setOutputSize(
+                self.nn_shape[0],
+                self.nn_shape[1],
+                dai.ImageManipConfig.ResizeMode.STRETCH,
+            )
+            cfg.setFrameType(self.frame_type)
+            cfg.setReusePreviousImage(True)
+            cfg.setTimestamp(timestamp)
+            cfg.setSequenceNum(sequence_num)
+            self.config_output.send(cfg)
+
+        schedule = TileSchedule(tiles)
+        schedule.setTimestamp(timestamp)
+        schedule.setSequenceNum(sequence_num)
+        self.schedule_output.send(schedule)
+
+    def report_detections(self, boxes: np.ndarray) -> None:
+        """Mark tiles overlapping the (N, 4) xyxy pixel `boxes` as active."""
+        if len(boxes) == 0:
+            return
+        x1, y1 = self._tiles[:, 0], self._tiles[:, 1]
+        x2, y2 = x1 + self._tiles[:, 2], y1 + self._tiles[:, 3]
+        overlaps = (
+            (boxes[:, None, 0] < x2)
+            & (boxes[:, None, 2] > x1)
+            & (boxes[:, None, 1] < y2)
+            & (boxes[:, None, 3] > y1)
+        ).any(axis=0)
+        with self._lock:
+            self._last_active[overlaps] = self._frame_count
+
+    def _downscaled_luma(self, frame: dai.ImgFrame) -> np.ndarray:
+        if frame.getType() == dai.ImgFrame.Type.NV12:
+            # The Y plane comes first, no color conversion is needed
+            h, stride = frame.getHeight(), frame.getStride()
+            luma = frame.getData()[: h * stride].reshape(h, stride)
+            luma = luma[:, : frame.getWidth()]
+        else:
+            luma = frame.getCvFrame()
+            if luma.ndim == 3:
+                luma = luma.mean(axis=2)
+        return luma[::MOTION_SCALE, ::MOTION_SCALE].astype(np.int16)
+
+    def _motion_tiles(self, luma: np.ndarray) -> np.ndarray:
+        moving = (np.abs(luma - self._prev_luma) > self.motion_threshold).astype(
+            np.int32
+        )
+        # Summed-area table gives the number of moving pixels of any tile in O(1)
+        integral = np.pad(moving.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        scaled = self._tiles // MOTION_SCALE
+        x1, y1 = scaled[:, 0], scaled[:, 1]
+        x2 = np.minimum(x1 + np.maximum(scaled[:, 2], 1), luma.shape[1])
+        y2 = np.minimum(y1 + np.maximum(scaled[:, 3], 1), luma.shape[0])
+        counts = (
+            integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        )
+        areas = np.maximum((x2 - x1) * (y2 - y1), 1)
+        return counts / areas > self.motion_fraction
+
+
+class AdaptiveTilesPatcher(dai.node.ThreadedHostNode):
+    """Merges NN results of the scheduled tiles into detections on the full frame."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.schedule_input = self.createInput()
+        self.nn_input = self.createInput()
+        self.out = self.createOutput(
+            possibleDatatypes=[
+                dai.Node.DatatypeHierarchy(dai.DatatypeEnum.ImgDetections, True)
+            ]
+        )
+        self._pending: Optional[dai.ImgDetections] = None
+
+    def build(
+        self,
+        tiling: AdaptiveTiling,
+        nn: dai.Node.Output,
+        conf_thresh: float = 0.3,
+        iou_thresh: float = 0.2,
+    ) -> "AdaptiveTilesPatcher":
+        tiling.schedule_output.link(self.schedule_input)
+        nn.link(self.nn_input)
+        self.tiling = tiling
+        self.conf_thresh = conf_thresh
+        self.iou_thresh = iou_thresh
+        return self
+
+    def run(self) -> None:
+        while self.isRunning():
+            schedule: TileSchedule = self.schedule_input.get()
+            seq = schedule.getSequenceNum()
+
+            boxes, scores, labels = [], [], []
+            for x, y, w, h in schedule.tiles:
+                nn_msg = self._next_nn_message(seq)
+                if nn_msg is None:
+                    # results of this frame were dropped, keep what we have
+                    break
+                for det in nn_msg.detections:
+                    if det.confidence < self.conf_thresh:
+                        continue
+                    boxes.append(
+                        (
+                            x + det.xmin * w,
+                            y + det.ymin * h,
+                            x + det.xmax * w,
+                            y + det.ymax * h,
+                        )
+                    )
+                    scores.append(det.confidence)
+                    labels.append(det.label)
+
+            boxes = np.array(boxes, dtype=np.float32).reshape(-1, 4)
+            keep = nms(boxes, np.array(scores), np.array(labels), self.iou_thresh)
+            boxes = boxes[keep]
+            self.tiling.report_detections(boxes)
+
+            img_w, img_h = self.tiling.img_shape
+            detections = []
+            for box, idx in zip(boxes, keep):
+                det = dai.ImgDetection()
+                det.xmin, det.xmax = float(box[0] / img_w), float(box[2] / img_w)
+                det.ymin, det.ymax = float(box[1] / img_h), float(box[3] / img_h)
+                det.confidence = float(scores[idx])
+                det.label = int(labels[idx])
+                detections.append(det)
+
+            out = dai.ImgDetections()
+            out.detections = detections
+            out.setTimestamp(schedule.getTimestamp())
+            out.setSequenceNum(seq)
+            self.out.send(out)
+
+    def _next_nn_message(self, seq: int) -> Optional[dai.ImgDetections]:
+        """Return the next NN result of frame `seq`, skipping stale ones.
+
+        `seq` is the sequence number of the schedule and of the crop
+        configurations. The crops are made from the frame `AdaptiveTiling`
+        forwarded with them, so the NN results carry the same number.
+        """
+        while True:
+            msg = self._pending if self._pending is not None else self.nn_input.get()
+            self._pending = None
+            if msg.getSequenceNum() == seq:
+                return msg
+            if msg.getSequenceNum() > seq:
+                self._pending = msg
+                return None
+
+
+def nms(
+    boxes: np.ndarray, scores: np.ndarray, labels: np.ndarray, iou_thresh: float
+) -> List[int]:
+    """Class-aware non-maximum suppression of xyxy boxes."""
+    if len(boxes) == 0:
+        return []
+    # Offset boxes per label so boxes of different classes never overlap
+    offset = labels[:, None] * (boxes.max() + 1)
+    shifted = boxes + offset
+    areas = (shifted[:, 2] - shifted[:, 0]) * (shifted[:, 3] - shifted[:, 1])
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(int(i))
+        xx1 = np.maximum(shifted[i, 0], shifted[order[1:], 0])
+        yy1 = np.maximum(shifted[i, 1], shifted[order[1:], 1])
+        xx2 = np.minimum(shifted[i, 2], shifted[order[1:], 2])
+        yy2 = np.minimum(shifted[i, 3], shifted[order[1:], 3])
+        inter = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[1:][iou <= iou_thresh]
+    return keep
@@ -62,6 +62,23 @@ def initialize_argparser():
         type=str,
     )
 
+    parser.add_argument(
+        "-fg",
+        "--fixed_grid",
+        help="Run the detector on every tile of the grid in every frame instead of scheduling only tiles with recent detections or motion.",
+        required=False,
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "-si",
+        "--scan_interval",
+        help="Number of frames between two full-frame detection passes when adaptive tiling is used.",
+        required=False,
+        default=10,
+        type=int,
+    )
+
     args = parser.parse_args()
 
     return parser, args
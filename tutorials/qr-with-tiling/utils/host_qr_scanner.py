@@ -7,12 +7,23 @@ from pyzbar.pyzbar import decode
 from utils.qr_detections import QRDetection, QRDetections
 
 DECODE = True
+# IoU above which a detection is considered the same QR code as a decoded one
+TRACK_IOU_THRESH = 0.5
+# Number of frames a decoded QR code is remembered after it was last detected
+TRACK_MAX_AGE = 30
+# Number of frames to wait before retrying a QR code that could not be decoded
+DECODE_RETRY_FRAMES = 5
 
 
 class QRScanner(dai.node.HostNode):
     def __init__(self) -> None:
         super().__init__()
         self.tile_positions = None
+        self._frame_count = 0
+        # Decoded QR codes by position, so each code is decoded with pyzbar only once
+        self._tracked_boxes = np.empty((0, 4), dtype=np.float32)
+        self._tracked_texts: list[str] = []
+        self._tracked_last_seen = np.empty(0, dtype=np.int64)
         self._out = self.createOutput(
             possibleDatatypes=[
                 dai.Node.DatatypeHierarchy(dai.DatatypeEnum.Buffer, True)
@@ -34,6 +45,9 @@ class QRScanner(dai.node.HostNode):
     def process(self, preview, detections) -> None:
         frame = preview.getCvFrame()
 
+        self._frame_count += 1
+        self._evict_stale_codes()
+
         qr_dets = QRDetections()
         for det in detections.detections:
             qr_det = QRDetection()
@@ -45,7 +59,7 @@ class QRScanner(dai.node.HostNode):
 
             if DECODE:
                 bbox = frame_denorm(frame, (det.xmin, det.ymin, det.xmax, det.ymax))
-                decoded_text = self.decode(frame, bbox)
+                decoded_text = self._lookup_or_decode(frame, bbox)
                 if decoded_text:
                     qr_det.label = decoded_text
             qr_dets.detections.append(qr_det)
@@ -56,6 +70,45 @@ class QRScanner(dai.node.HostNode):
         self.out_grid.send(grid_annot)
         self.out.send(qr_dets)
 
+    def _lookup_or_decode(self, frame: np.ndarray, bbox: np.ndarray) -> str:
+        """Return the text of an already decoded QR code at this position or decode it."""
+        idx = None
+        if len(self._tracked_boxes):
+            ious = box_iou(bbox.astype(np.float32), self._tracked_boxes)
+            best = int(ious.argmax())
+            if ious[best] > TRACK_IOU_THRESH:
+                idx = best
+
+        if idx is not None:
+            self._tracked_boxes[idx] = bbox
+            text = self._tracked_texts[idx]
+            if text or self._frame_count < self._tracked_last_seen[idx]:
+                if text:
+                    self._tracked_last_seen[idx] = self._frame_count
+                return text
+
+        text = self.decode(frame, bbox)
+        # Failed decodes are stored with a future timestamp to delay the retry
+        last_seen = (
+            self._frame_count if text else self._frame_count + DECODE_RETRY_FRAMES
+        )
+        if idx is None:
+            self._tracked_boxes = np.vstack([self._tracked_boxes, bbox[None]])
+            self._tracked_texts.append(text)
+            self._tracked_last_seen = np.append(self._tracked_last_seen, last_seen)
+        else:
+            self._tracked_texts[idx] = text
+            self._tracked_last_seen[idx] = last_seen
+        return text
+
+    def _evict_stale_codes(self) -> None:
+        keep = self._frame_count - self._tracked_last_seen <= TRACK_MAX_AGE
+        if keep.all():
+            return
+        self._tracked_boxes = self._tracked_boxes[keep]
+        self._tracked_texts = [t for t, k in zip(self._tracked_texts, keep) if k]
+        self._tracked_last_seen = self._tracked_last_seen[keep]
+
     def decode(self, frame, bbox):
         """
         Decode the QR code present in the given bounding box.
@@ -143,6 +196,18 @@ def expand_bbox(bbox: np.ndarray, frame: np.ndarray, percentage: float) -> np.nd
     return bbox_copy
 
 
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one xyxy box with an (N, 4) array of xyxy boxes."""
+    xx1 = np.maximum(box[0], boxes[:, 0])
+    yy1 = np.maximum(box[1], boxes[:, 1])
+    xx2 = np.minimum(box[2], boxes[:, 2])
+    yy2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-6)
+
+
 def frame_denorm(frame, bbox):
     norm_vals = np.full(len(bbox), frame.shape[0])
     norm_vals[::2] = frame.shape[1]